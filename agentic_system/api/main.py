@@ -7,6 +7,7 @@ from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
 from typing import Optional
+import asyncio
 import uvicorn
 import sys
 from pathlib import Path
@@ -70,11 +71,15 @@ if _openai_key:
 else:
     print("[API] OpenAI API 키 없음 — 대화 시 고정 안내 문구만 사용됩니다. .env 에 OpenAI_API_Key= 또는 OPENAI_API_KEY= 설정 후 서버 재시작하세요.")
 
-from agentic_system.core import CustomUI, AgentRuntime, FLLM
+from agentic_system.core import CustomUI, AgentRuntime, RetryPolicy, FLLM
+from agentic_system.core.f_llm import FLLM_PRELOAD
 from agentic_system.core.memory import MemoryManager
-from agentic_system.tools.gemini_tryon import gemini_tryon_tool
-from agentic_system.tools.functions import product_search_function_tool
+from agentic_system.tools.gemini_tryon import get_gemini_tryon_tool
+from agentic_system.tools.functions import get_product_search_function
+from agentic_system.tools.render_store import get_render_store
+from agentic_system.api.uploads import UploadSizeLimitMiddleware, save_upload
 from agentic_system.data_stores.rag import RAGStore
+from agentic_system.utils.http_client import get_http_client
 
 app = FastAPI(
     title="Fashion Agentic AI System API",
@@ -90,30 +95,51 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 업로드 요청 본문 상한 (폼 파싱 전에 413 — 큰 본문을 다 받아 임시 파일로 풀지 않음)
+app.add_middleware(UploadSizeLimitMiddleware)
 
 # 전역 컴포넌트 초기화
 memory_manager = MemoryManager()
 rag_store = RAGStore()
 
-# InternVL2-8B 모델 통합 (자동 디바이스 감지)
-import torch
-device = "cuda" if torch.cuda.is_available() else "cpu"
+# InternVL2-8B 모델 통합 — FLLM_ENABLE=1 일 때만 사용, 모델(torch 포함)은 첫 LLM 요청·readiness 확인
+# (또는 FLLM_PRELOAD=1 이면 startup) 시 백그라운드 스레드에서 로딩, 로딩 중에는 규칙 기반 계획으로 응답,
+# 상태는 /api/v1/ready 에서 확인
 agent2 = FLLM(
     model_name="internvl2-8b",
     model_path=None,  # 자동 경로 감지
     rag_enabled=True,  # 외부(웹) + 내부(로컬) RAG 사용
-    use_llm=True,  # InternVL2 모델 사용
-    device=device
+    use_llm=True,  # InternVL2 모델 사용 (FLLM_ENABLE 설정 시)
+    device=None  # 로딩 스레드에서 자동 디바이스 감지
 )
 agent_runtime = AgentRuntime(agent2=agent2, memory_manager=memory_manager, rag_store=rag_store)
 
 # 도구 등록 (가상 피팅: Gemini Try-On, 상품 검색: Function)
-agent_runtime.register_tool("gemini_tryon", gemini_tryon_tool)
-agent_runtime.register_tool("function_product_search", product_search_function_tool)
+# 도구 인스턴스는 프로세스당 1개 (Gemini Client·상품 카탈로그 재사용)
+# 재시도 정책: 합성은 도구 안에서 이미 여러 모델로 헤지·대체하므로 런타임 재시도 없음, 상품 검색은 가벼워 2회까지
+agent_runtime.register_tool("gemini_tryon", get_gemini_tryon_tool(), RetryPolicy(max_retries=0))
+agent_runtime.register_tool("function_product_search", get_product_search_function(), RetryPolicy(max_retries=2, backoff_base=0.2))
 
 custom_ui = CustomUI()
 
 
+@app.on_event("startup")
+async def startup():
+    """도구 인스턴스 준비 (warm-up), FLLM_PRELOAD 설정 시 InternVL2 백그라운드 로딩 시작"""
+    await agent_runtime.astartup()
+    if FLLM_PRELOAD:
+        agent2.start_loading()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """도구 인스턴스·배치 추론 큐·세션 정리 스레드·공용 HTTP 세션 정리"""
+    agent_runtime.shutdown()
+    agent2.close()
+    memory_manager.close()
+    get_http_client().close()
+
+
 @app.get("/")
 async def root():
     """루트 엔드포인트"""
@@ -130,6 +156,49 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/api/v1/ready")
+async def readiness():
+    """
+    준비 상태 (오케스트레이터 readiness probe 용)
+
+    - FLLM_ENABLE 꺼짐(disabled) 또는 모델 ready: 200
+    - 모델 로딩 전·로딩 중(idle/loading) 또는 로딩 실패(failed): 503
+      (idle 이면 이 확인으로 백그라운드 로딩 시작)
+
+    규칙 기반 계획 fallback 으로 요청 처리 자체는 기동 직후부터 가능 — 프로세스 생존 여부는 /health
+    """
+    status = agent2.model_status()
+    if status["state"] == "idle":
+        agent2.start_loading()
+        status = agent2.model_status()
+    ready = status["state"] in ("ready", "disabled")
+    content = {"status": "ready" if ready else status["state"], "model": status}
+    return JSONResponse(content=content, status_code=200 if ready else 503)
+
+
+@app.get("/api/v1/metrics/http")
+async def http_metrics():
+    """외부 HTTP 호출 통계 (호스트별 요청 수·오류·재시도·지연 시간 히스토그램)"""
+    return {"hosts": get_http_client().stats()}
+
+
+@app.get("/api/v1/metrics/sessions")
+async def session_metrics():
+    """세션 저장소 지표 (활성 세션 수, LRU 제거·유휴 만료 수)"""
+    return await asyncio.to_thread(memory_manager.stats)
+
+
+@app.get("/api/v1/metrics/tryon")
+async def tryon_metrics():
+    """가상 피팅 모델별 성공률·지연 시간 및 결과 캐시 통계"""
+    tool = get_gemini_tryon_tool()
+    return {
+        "models": tool.model_stats.snapshot(),
+        "hedge_delay": tool.hedge_delay,
+        "result_cache": tool.result_cache.stats(),
+    }
+
+
 @app.post("/api/v1/tryon")
 async def tryon_direct(
     image: UploadFile = File(..., description="입을 옷 사진 (의류)"),
@@ -141,16 +210,10 @@ async def tryon_direct(
     POC 뼈대(Agent 1 → Agent 2 → 실행 계획)로 인한 context 누락 여부를 검증할 때 사용하세요.
     """
     try:
-        sid = session_id or "direct"
         upload_dir = project_root / "uploads"
-        upload_dir.mkdir(parents=True, exist_ok=True)
-
-        path_garment = (upload_dir / f"{sid}_garment_{image.filename}").resolve()
-        path_person = (upload_dir / f"{sid}_person_{person_image.filename}").resolve()
-        with open(path_garment, "wb") as f:
-            f.write(await image.read())
-        with open(path_person, "wb") as f:
-            f.write(await person_image.read())
+        # 청크 스트리밍 저장 (크기 상한·내용 해시 경로·중복 제거)
+        path_garment = await save_upload(image, upload_dir)
+        path_person = await save_upload(person_image, upload_dir)
         image_path = str(path_garment)
         person_image_path = str(path_person)
         if not path_garment.exists() or not path_person.exists():
@@ -167,7 +230,8 @@ async def tryon_direct(
             "person_image_path": person_image_path,
             "text": "입혀줘",
         }
-        tool_result = gemini_tryon_tool("try_on", params, context)
+        # 블로킹 Gemini 호출은 AgentRuntime 도구 스레드 풀에서 실행 (이벤트 루프 비차단)
+        tool_result = await agent_runtime.acall_tool("gemini_tryon", "try_on", params, context)
 
         result = {
             "status": tool_result.get("status", "success"),
@@ -182,6 +246,8 @@ async def tryon_direct(
         }
         response = custom_ui.format_output(result)
         return JSONResponse(content=response)
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         print(f"[API /tryon] 오류: {e}\n{traceback.format_exc()}")
@@ -208,20 +274,14 @@ async def process_request(
         print(f"[API] 요청 수신: text={text is not None}, image={image is not None}, person_image={person_image is not None}, session_id={sid}")
         
         upload_dir = project_root / "uploads"
-        upload_dir.mkdir(parents=True, exist_ok=True)
         image_path = None
         person_image_path = None
+        # 청크 스트리밍 저장 (크기 상한·내용 해시 경로·중복 제거)
         if image:
-            path = upload_dir / f"{sid}_garment_{image.filename}"
-            with open(path, "wb") as f:
-                f.write(await image.read())
-            image_path = str(path)
+            image_path = str(await save_upload(image, upload_dir))
             print(f"[API] 의류 이미지 저장: {image_path}")
         if person_image:
-            path = upload_dir / f"{sid}_person_{person_image.filename}"
-            with open(path, "wb") as f:
-                f.write(await person_image.read())
-            person_image_path = str(path)
+            person_image_path = str(await save_upload(person_image, upload_dir))
             print(f"[API] 인물 이미지 저장: {person_image_path}")
         if person_image_path:
             print("[API] person_image_path 있음 → Try-On 시 Gemini 인물+의류 합성 가능")
@@ -238,7 +298,7 @@ async def process_request(
         
         # Agent Runtime을 통한 요청 처리
         print("[API] Agent Runtime 요청 처리 시작...")
-        result = agent_runtime.process_request(
+        result = await agent_runtime.aprocess_request(
             payload.dict(),
             session_id=session_id or payload.session_id
         )
@@ -251,6 +311,8 @@ async def process_request(
         
         return JSONResponse(content=response)
     
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
@@ -282,7 +344,7 @@ async def process_request_json(request_data: dict):
         )
         
         # Agent Runtime을 통한 요청 처리
-        result = agent_runtime.process_request(
+        result = await agent_runtime.aprocess_request(
             payload.dict(),
             session_id=request_data.get("session_id") or payload.session_id
         )
@@ -296,17 +358,24 @@ async def process_request_json(request_data: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _session_history(session_id: str) -> dict:
+    # 없는 세션은 조회만으로 새로 만들지 않음
+    if session_id not in memory_manager.short_term_memories:
+        return {"session_id": session_id, "history": [], "context": {}}
+    memory = memory_manager.get_short_term_memory(session_id)
+    history = [turn.to_dict() for turn in memory.get_conversation_history()]
+    return {
+        "session_id": session_id,
+        "history": history,
+        "context": memory.get_context()
+    }
+
+
 @app.get("/api/v1/session/{session_id}/history")
 async def get_session_history(session_id: str):
-    """세션 대화 기록 조회"""
+    """세션 대화 기록 조회 (SQLite 세션 저장소 조회는 스레드 풀에서)"""
     try:
-        memory = memory_manager.get_short_term_memory(session_id)
-        history = memory.get_conversation_history()
-        return {
-            "session_id": session_id,
-            "history": history,
-            "context": memory.get_context()
-        }
+        return await asyncio.to_thread(_session_history, session_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -315,7 +384,7 @@ async def get_session_history(session_id: str):
 async def clear_session(session_id: str):
     """세션 메모리 삭제"""
     try:
-        memory_manager.clear_session(session_id)
+        await asyncio.to_thread(memory_manager.clear_session, session_id)
         return {"message": f"Session {session_id} cleared", "session_id": session_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -335,7 +404,8 @@ async def get_file(path: str = Query(..., description="파일 경로")):
         if not str(file_path.resolve()).startswith(str(project_root.resolve())):
             raise HTTPException(status_code=403, detail="접근할 수 없는 경로입니다.")
         
-        if not file_path.exists():
+        # 방금 생성된 Try-On 결과는 백그라운드 쓰기가 끝나지 않았을 수 있음 → 완료까지 잠시 대기
+        if not file_path.exists() and not await asyncio.to_thread(get_render_store().wait, file_path.resolve()):
             raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
         
         if not file_path.is_file():
@@ -0,0 +1,129 @@
+"""
+업로드 파일 저장 — 청크 스트리밍 + 내용 해시 경로
+
+UploadFile 전체를 메모리로 읽지 않고 1MB 단위로 임시 파일에 흘려 쓰면서
+- SHA-256 을 동시에 계산
+- 파일별 크기 상한을 넘으면 uploads/ 에 저장하지 않고 중단 (413)
+- 같은 내용은 uploads/<sha256><확장자> 하나로 중복 제거
+
+save_upload 가 호출될 때는 Starlette 가 multipart 본문을 이미 다 받아 임시 파일로 풀어 둔 상태이므로
+요청 본문 자체의 상한은 UploadSizeLimitMiddleware 가 폼 파싱 전에 적용
+(Content-Length 로 즉시 거절, 없으면 받은 바이트가 상한을 넘는 순간 중단)
+"""
+
+from pathlib import Path
+import asyncio
+import hashlib
+import os
+import uuid
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_MAX_MB = int(os.environ.get("UPLOAD_MAX_MB", "25"))
+# multipart 요청 본문 전체 상한 (기본: 이미지 2장 + 폼 필드 여유 1MB)
+UPLOAD_MAX_REQUEST_MB = int(os.environ.get("UPLOAD_MAX_REQUEST_MB", str(UPLOAD_MAX_MB * 2 + 1)))
+_IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".heic"}
+
+
+def _suffix(filename: str) -> str:
+    suffix = Path(filename or "").suffix.lower()
+    return suffix if suffix in _IMAGE_SUFFIXES else ".bin"
+
+
+class UploadSizeLimitMiddleware:
+    """
+    multipart 요청 본문 크기 상한 (ASGI 미들웨어, 폼 파싱 전에 적용)
+
+    - Content-Length 가 상한을 넘으면 본문을 읽지 않고 바로 413
+    - Content-Length 가 없으면 (chunked) 받은 바이트가 상한을 넘는 순간 413 으로 중단
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_REQUEST_MB * 1024 * 1024):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    def _too_large(self) -> str:
+        return f"요청 본문이 너무 큽니다 (최대 {self.max_bytes // (1024 * 1024)}MB)"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/"):
+            await self.app(scope, receive, send)
+            return
+        try:
+            content_length = int(headers.get(b"content-length", b""))
+        except ValueError:
+            content_length = None
+        if content_length is not None and content_length > self.max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": self._too_large()})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # 폼 파싱 중 발생 → FastAPI 예외 처리기가 413 응답으로 변환
+                    raise HTTPException(status_code=413, detail=self._too_large())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def save_upload(
+    upload: UploadFile,
+    upload_dir: Path,
+    max_bytes: int = UPLOAD_MAX_MB * 1024 * 1024,
+) -> Path:
+    """
+    업로드 파일을 내용 주소 경로에 저장하고 그 경로 반환
+
+    max_bytes 는 uploads/ 에 저장할 파일 하나의 상한 (요청 수신 상한은 UploadSizeLimitMiddleware)
+
+    Raises:
+        HTTPException(413): max_bytes 초과
+        HTTPException(400): 빈 파일
+    """
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = upload_dir / f".upload-{uuid.uuid4().hex}.tmp"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as out:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"업로드 파일이 너무 큽니다 (최대 {max_bytes // (1024 * 1024)}MB): {upload.filename}",
+                    )
+                digest.update(chunk)
+                # 디스크 쓰기는 스레드에서 (이벤트 루프 비차단)
+                await asyncio.to_thread(out.write, chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail=f"빈 파일입니다: {upload.filename}")
+        path = (upload_dir / f"{digest.hexdigest()}{_suffix(upload.filename)}").resolve()
+        if path.exists():
+            # 같은 내용이 이미 있음 → 새로 쓰지 않고 기존 파일 재사용
+            os.utime(path)
+        else:
+            os.replace(tmp_path, path)
+        return path
+    finally:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        await upload.close()
@@ -4,18 +4,27 @@ Fashion Agentic AI System - Core Components
 """
 
 from .custom_ui import CustomUI
-from .agent_runtime import AgentRuntime
+from .agent_runtime import AgentRuntime, RetryPolicy
 from .f_llm import FLLM, Agent2
-from .memory import MemoryManager, Memory, ShortTermMemory, LongTermMemory
+from .memory import (
+    MemoryManager, Memory, ShortTermMemory, ConversationTurn, LongTermMemory, LongTermStore,
+    SessionBackend, SessionStore, SQLiteSessionStore,
+)
 
 __all__ = [
     'CustomUI',
     'AgentRuntime',
+    'RetryPolicy',
     'FLLM',
     'Agent2',
     'MemoryManager',
     'Memory',
     'ShortTermMemory',
+    'ConversationTurn',
     'LongTermMemory',
+    'LongTermStore',
+    'SessionBackend',
+    'SessionStore',
+    'SQLiteSessionStore',
 ]
 
@@ -10,15 +10,31 @@ Agent Runtime Component - Agent 1
 """
 
 from typing import Dict, List, Optional, Any, Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import asyncio
+import functools
+import inspect
 import json
 import os
+import random
+import time
 
 from .f_llm import FLLM, ExecutionPlan
 from .memory import MemoryManager, ShortTermMemory
 from pydantic import BaseModel
 
 
+def _run_coroutine_sync(coro):
+    """동기 코드에서 코루틴 실행 (이미 이벤트 루프 안이면 별도 스레드의 새 루프에서 실행)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
+
+
 class AbstractPlan(BaseModel):
     """추상적 작업 계획"""
     plan_type: str  # "3d_generation" or "garment_recommendation"
@@ -28,6 +44,27 @@ class AbstractPlan(BaseModel):
     created_at: str
 
 
+class RetryPolicy(BaseModel):
+    """
+    도구별 단계 재시도 정책
+
+    - max_retries: 실패한 단계를 다시 실행하는 최대 횟수
+    - backoff_base / backoff_max: 재시도 전 대기 (지터가 있는 지수 백오프, 초)
+    - non_retryable_messages: 결과 message 에 포함되면 재시도하지 않는 문구 (입력 누락 등)
+    - non_retryable_errors: 재시도하지 않는 예외 타입 이름 (잘못된 인자 등)
+    """
+    max_retries: int = 1
+    backoff_base: float = 0.5
+    backoff_max: float = 4.0
+    non_retryable_messages: List[str] = [
+        "의류 이미지", "의류 사진", "이미지 경로", "image_path", "Unknown action",
+    ]
+    non_retryable_errors: List[str] = ["KeyError", "TypeError", "ValueError", "FileNotFoundError"]
+
+    def backoff(self, retry_count: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** retry_count)))
+
+
 class AgentRuntime:
     """
     Agent Runtime - Agent 1 (종합 감독 에이전트)
@@ -40,18 +77,112 @@ class AgentRuntime:
         agent2: Optional[FLLM] = None,
         memory_manager: Optional[MemoryManager] = None,
         rag_store: Optional[Any] = None,
-        max_retries: int = 1
+        max_retries: int = 1,
+        tool_workers: int = 8,
+        fail_fast: bool = False,
+        cancel_dependents: bool = False
     ):
         self.agent2 = agent2 or FLLM()
         self.memory_manager = memory_manager or MemoryManager()
         self.rag_store = rag_store
         self.max_retries = max_retries
+        self.fail_fast = fail_fast
+        # True 면 실패한 단계에 의존하는 단계를 실행하지 않음 (기본: 순차 실행 때처럼 실패 결과를 받아 실행)
+        self.cancel_dependents = cancel_dependents
         self.name = "Agent Runtime (Agent 1)"
         self.tools_registry: Dict[str, Callable] = {}
+        # execute() 를 가진 도구 인스턴스 (프로세스 수명 동안 재사용, startup/shutdown 대상)
+        self.tool_instances: Dict[str, Any] = {}
+        self.retry_policies: Dict[str, RetryPolicy] = {}
+        # 동기(블로킹) 도구 전용 스레드 풀: 동시에 실행되는 도구 수 상한
+        self._tool_executor = ThreadPoolExecutor(max_workers=tool_workers, thread_name_prefix="tool")
     
-    def register_tool(self, tool_name: str, tool_function: Callable):
-        """도구 등록"""
-        self.tools_registry[tool_name] = tool_function
+    def register_tool(
+        self,
+        tool_name: str,
+        tool: Any,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        """
+        도구 등록
+        
+        tool: 도구 함수 tool(action, parameters, context) -> Dict
+              또는 같은 시그니처의 execute() 를 가진 도구 인스턴스
+        동기 함수 또는 async def 모두 가능 (동기 도구는 도구 스레드 풀에서 실행)
+        도구 인스턴스는 요청마다 새로 만들지 않고 재사용하므로 스레드 안전해야 하며,
+        warm_up() / close() 가 있으면 startup() / shutdown() 에서 호출됨
+        retry_policy 를 생략하면 max_retries 를 따르는 기본 정책 사용
+        """
+        if callable(getattr(tool, "execute", None)):
+            self.tool_instances[tool_name] = tool
+            self.tools_registry[tool_name] = tool.execute
+        else:
+            self.tools_registry[tool_name] = tool
+        if retry_policy is not None:
+            self.retry_policies[tool_name] = retry_policy
+    
+    def _retry_policy(self, tool_name: str) -> RetryPolicy:
+        policy = self.retry_policies.get(tool_name)
+        return policy if policy is not None else RetryPolicy(max_retries=self.max_retries)
+    
+    def startup(self) -> None:
+        """도구 인스턴스 준비 (동기 진입점)"""
+        _run_coroutine_sync(self.astartup())
+    
+    async def astartup(self) -> None:
+        """등록된 도구 인스턴스의 warm_up() 을 동시에 실행 (실패해도 서버 기동은 계속)"""
+        names = [n for n, t in self.tool_instances.items() if callable(getattr(t, "warm_up", None))]
+        if not names:
+            return
+        loop = asyncio.get_running_loop()
+        outcomes = await asyncio.gather(
+            *(loop.run_in_executor(self._tool_executor, self.tool_instances[n].warm_up) for n in names),
+            return_exceptions=True
+        )
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"[AgentRuntime] 도구 준비 실패: {name} - {outcome}")
+            else:
+                print(f"[AgentRuntime] 도구 준비 완료: {name}")
+    
+    def shutdown(self) -> None:
+        """도구 인스턴스 정리 및 도구 스레드 풀 종료"""
+        for name, tool in self.tool_instances.items():
+            close = getattr(tool, "close", None)
+            if not callable(close):
+                continue
+            try:
+                close()
+            except Exception as e:
+                print(f"[AgentRuntime] 도구 종료 오류: {name} - {e}")
+        self._tool_executor.shutdown(wait=False)
+    
+    async def acall_tool(
+        self,
+        tool_name: str,
+        action: str,
+        parameters: Dict[str, Any],
+        context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """등록된 도구 비동기 호출 (동기 도구는 스레드 풀로 넘겨 이벤트 루프를 막지 않음)"""
+        tool_func = self.tools_registry.get(tool_name)
+        if tool_func is None:
+            raise KeyError(f"Tool '{tool_name}' not found")
+        if inspect.iscoroutinefunction(tool_func):
+            return await tool_func(action, parameters, context)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            self._tool_executor,
+            functools.partial(tool_func, action, parameters, context)
+        )
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+    
+    async def _run_blocking(self, func: Callable, *args: Any) -> Any:
+        """RAG·OpenAI·계획 생성 등 짧은 블로킹 호출을 기본 스레드 풀에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
     
     def process_request(
         self,
@@ -59,16 +190,31 @@ class AgentRuntime:
         session_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        사용자 요청 처리
+        사용자 요청 처리 (동기 진입점)
+        
+        aprocess_request 를 이벤트 루프에서 실행 (스크립트·테스트 등 동기 호출용)
+        """
+        return _run_coroutine_sync(self.aprocess_request(payload, session_id))
+    
+    async def aprocess_request(
+        self,
+        payload: Dict[str, Any],
+        session_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        사용자 요청 처리 (비동기)
         
         전체 프로세스:
         1. 인식 (Perception): 요청 분석
         2. 판단 (Judgment): 계획 수립
         3. 행동 (Action): 도구 실행
+        
+        블로킹 단계(RAG, OpenAI 대화, 계획 생성)와 동기 도구는 스레드 풀에서 실행하므로
+        느린 가상 피팅 하나가 같은 워커의 다른 요청을 막지 않음
         """
-        # 세션 메모리 가져오기
+        # 세션 메모리 가져오기 (SQLite 백엔드는 DB 조회 → 스레드 풀)
         session_id = session_id or payload.get("session_id", "default")
-        memory = self.memory_manager.get_short_term_memory(session_id)
+        memory = await self._run_blocking(self.memory_manager.get_short_term_memory, session_id)
         
         # 1. 인식 (Perception): 요청 분석
         user_intent = self._analyze_user_intent(payload)
@@ -88,17 +234,17 @@ class AgentRuntime:
         
         # 대화/일상 멘트는 도구 실행 없이 바로 응답 (Try-On 전용 모드가 아닐 때만)
         if not try_on_only and user_intent.get("type") == "conversation":
-            out = self._respond_conversation(payload, user_intent, memory, session_id)
+            out = await self._run_blocking(self._respond_conversation, payload, user_intent, memory, session_id)
             return {**out, "chat_only": True}
         
         # 정보성 질문 → RAG 검색 결과로만 응답 (Try-On 전용 모드가 아닐 때만)
         if not try_on_only and user_intent.get("type") == "information":
-            out = self._respond_with_rag(payload, memory, session_id)
+            out = await self._run_blocking(self._respond_with_rag, payload, memory, session_id)
             return {**out, "chat_only": True}
         
         # 가상 피팅 의도지만 실행 요청 없고 이미지도 없으면 채팅만 (Try-On 전용 모드가 아닐 때만)
         if not try_on_only and user_intent.get("type") == "3d_generation" and not user_intent.get("run_try_on"):
-            out = self._respond_try_on_prompt(payload, memory, session_id)
+            out = await self._run_blocking(self._respond_try_on_prompt, payload, memory, session_id)
             return {**out, "chat_only": True}
         
         # Try-On 전용 모드에서 입력이 전혀 없으면 안내만 반환
@@ -117,41 +263,58 @@ class AgentRuntime:
         # RAG: 외부(인터넷) + 내부(로컬) 로 사용자 입력 관련 정보 검색
         user_text = (payload.get("input_data", {}) or {}).get("text", "")
         rag_context = None
-        if self.rag_store and (user_text or abstract_plan.get("plan_type")):
+        if self.rag_store and (user_text or abstract_plan.plan_type):
             try:
-                rag_context = self.rag_store.get_context(
+                rag_context = await self._run_blocking(
+                    self.rag_store.get_context,
                     abstract_plan.plan_type,
-                    user_text or abstract_plan.get("parameters", {}).get("query", "")
+                    user_text or (abstract_plan.parameters or {}).get("query") or ""
                 )
             except Exception as e:
                 print(f"[AgentRuntime] RAG get_context 오류: {e}")
         
+        # 장기 메모리: 사용자 선호도 (핫 캐시의 메모리 dict 조회, DB 접근은 캐시 미스 때만 → 스레드 풀)
+        user_id = payload.get("user_id")
+        long_term = await self._run_blocking(self.memory_manager.get_long_term_memory, user_id) if user_id else None
+        
         # Agent 2에게 전달하여 구체적 실행 계획 생성
         input_data = payload.get("input_data", {})
-        execution_plan = self.agent2.generate_execution_plan(
-            abstract_plan.dict(),
-            context=input_data,
-            rag_context=rag_context,
-            user_text=input_data.get("text"),
-            image_path=input_data.get("image_path")
+        plan_context = input_data
+        if long_term is not None and long_term.preferences:
+            plan_context = {**input_data, "user_preferences": dict(long_term.preferences)}
+        execution_plan = await self._run_blocking(
+            functools.partial(
+                self.agent2.generate_execution_plan,
+                abstract_plan.dict(),
+                context=plan_context,
+                rag_context=rag_context,
+                user_text=input_data.get("text"),
+                image_path=input_data.get("image_path")
+            )
         )
         
         # 3. 행동 (Action): 실행 계획에 따라 도구 실행
-        execution_result = self._execute_plan(execution_plan, memory)
+        execution_result = await self._aexecute_plan(execution_plan, memory)
         
         # 결과 검증 및 재시도 (자기 수정 루프)
-        final_result = self._self_correction_loop(
+        final_result = await self._aself_correction_loop(
             execution_plan,
             execution_result,
             memory
         )
         
-        # 메모리에 대화 기록 저장
+        # 메모리에 대화 기록 저장 (변경 표시만, DB 기록은 세션 저장소의 배치 쓰기 스레드가 담당)
         memory.add_conversation(
             user_input=payload.get("input_data", {}).get("text", ""),
             agent_response=final_result.get("message", ""),
             metadata={"plan_id": execution_plan.plan_id}
         )
+        if long_term is not None:
+            await self._run_blocking(long_term.add_to_history, {
+                "intent": user_intent.get("type"),
+                "plan_id": execution_plan.plan_id,
+                "status": final_result.get("status"),
+            })
         
         # 2 판단 영역 표시용: 의도·추상계획·실행계획 요약 (Gemini Thoughts 스타일)
         thoughts = self._build_thoughts(user_intent, abstract_plan, execution_plan)
@@ -238,9 +401,9 @@ class AgentRuntime:
             openai_error = "입력 내용이 없습니다."
         else:
             try:
-                import requests
+                from ..utils.http_client import get_http_client
                 print(f"[AgentRuntime] 대화 OpenAI 호출 시도 (입력 길이: {len(user_text)})")
-                r = requests.post(
+                r = get_http_client().post(
                     "https://api.openai.com/v1/chat/completions",
                     headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
                     json={
@@ -252,6 +415,7 @@ class AgentRuntime:
                         "max_tokens": 150,
                     },
                     timeout=15,
+                    retries=1,
                 )
                 if r.status_code == 200:
                     data = r.json()
@@ -469,68 +633,107 @@ class AgentRuntime:
         self,
         execution_plan: ExecutionPlan,
         memory: ShortTermMemory
+    ) -> Dict[str, Any]:
+        """실행 계획에 따라 도구 실행 (동기 진입점)"""
+        return _run_coroutine_sync(self._aexecute_plan(execution_plan, memory))
+    
+    async def _aexecute_plan(
+        self,
+        execution_plan: ExecutionPlan,
+        memory: ShortTermMemory,
+        checkpoint: Optional[Dict[Any, Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """
-        실행 계획에 따라 도구 실행
-        
-        순차적으로 각 단계를 실행하고 결과를 수집
+        실행 계획에 따라 도구 실행 (의존성 그래프 스케줄링)
+        
+        각 단계의 dependencies 가 모두 끝난 단계들은 동시에 실행하므로
+        전체 소요 시간은 단계 합이 아니라 임계 경로(critical path) 길이에 가까움.
+        - 의존 단계가 실패해도 기본적으로는 (순차 실행 때와 같이) 그 실패 결과를 _dependency_result 로 받아 실행
+        - cancel_dependents=True 이면 실패한 단계에 (간접적으로라도) 의존하는 단계는 실행하지 않고 cancelled 처리
+        - fail_fast=True 이면 실패 즉시 실행 중/대기 중인 나머지 단계도 모두 취소
+        - 단계별 소요 시간(elapsed_ms)과 계획 전체 소요 시간(timing) 기록
+        - checkpoint: 이전 실행의 단계 결과. 성공했고 의존 단계도 모두 재사용되는 단계는 다시 실행하지 않음
+          (실패한 단계의 결과로 실행된 단계는 실패 단계와 함께 다시 실행)
         """
-        results = {}
-        execution_context = {}
-        
-        # 단계별 실행 (의존성 고려)
-        print(f"[AgentRuntime._execute_plan] 총 {len(execution_plan.steps)}개 단계 실행 시작")
-        for step_idx, step in enumerate(execution_plan.steps, 1):
-            step_id = step["step_id"]
-            tool_name = step["tool"]
-            action = step["action"]
-            parameters = step.get("parameters", {})
-            dependencies = step.get("dependencies", [])
-            print(f"[AgentRuntime._execute_plan] 단계 {step_idx}/{len(execution_plan.steps)}: {tool_name}.{action} (step_id={step_id})")
-            
-            # 의존성 확인
-            if dependencies:
-                # 의존성 결과를 파라미터에 포함
-                for dep_id in dependencies:
-                    if dep_id in results:
-                        # results[dep_id]는 {"status": "success", "result": {...}, "step_id": ...} 구조
-                        # 실제 결과는 "result" 키에 있음
-                        dep_result = results[dep_id]
-                        if isinstance(dep_result, dict) and "result" in dep_result:
-                            parameters["_dependency_result"] = dep_result["result"]
-                        else:
-                            parameters["_dependency_result"] = dep_result
-            
-            # 도구 실행
-            if tool_name in self.tools_registry:
-                try:
-                    print(f"[AgentRuntime._execute_plan] 도구 실행 중: {tool_name}.{action}")
-                    tool_func = self.tools_registry[tool_name]
-                    step_result = tool_func(action, parameters, execution_context)
-                    print(f"[AgentRuntime._execute_plan] 도구 실행 완료: {tool_name}.{action}")
-                    results[step_id] = {
-                        "status": "success",
-                        "result": step_result,
-                        "step_id": step_id
-                    }
-                    # 컨텍스트에 실제 결과 저장 (다음 단계에서 사용)
-                    execution_context[f"step_{step_id}"] = step_result
-                    execution_context[f"step_{step_id}_result"] = step_result
-                except Exception as e:
-                    print(f"[AgentRuntime._execute_plan] 도구 실행 오류: {tool_name}.{action} - {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+        steps = {s["step_id"]: s for s in execution_plan.steps}
+        order = {step_id: idx for idx, step_id in enumerate(steps, 1)}
+        # 계획에 없는 단계를 가리키는 의존성은 무시 (기존 동작과 동일)
+        deps = {
+            step_id: [d for d in (s.get("dependencies") or []) if d in steps and d != step_id]
+            for step_id, s in steps.items()
+        }
+        results: Dict[Any, Dict[str, Any]] = {}
+        execution_context: Dict[str, Any] = {}
+        reusable = {
+            step_id for step_id, step_result in (checkpoint or {}).items()
+            if step_id in steps and not self._step_failed(step_result)
+        }
+        # 다시 실행하는 단계의 결과를 받은 단계도 다시 실행
+        changed = True
+        while changed:
+            changed = False
+            for step_id in list(reusable):
+                if any(d not in reusable for d in deps[step_id]):
+                    reusable.discard(step_id)
+                    changed = True
+        for step_id in reusable:
+            step_result = checkpoint[step_id]
+            results[step_id] = step_result
+            execution_context[f"step_{step_id}"] = step_result["result"]
+            execution_context[f"step_{step_id}_result"] = step_result["result"]
+        pending = [step_id for step_id in steps if step_id not in results]
+        if results:
+            print(f"[AgentRuntime._execute_plan] 체크포인트 재사용: 단계 {list(results)} (재실행 {pending})")
+        running: Dict[asyncio.Future, Any] = {}
+        plan_started = time.monotonic()
+        
+        print(f"[AgentRuntime._execute_plan] 총 {len(steps)}개 단계 중 {len(pending)}개 실행 시작")
+        while pending or running:
+            if self.cancel_dependents:
+                self._cancel_blocked_steps(pending, deps, results)
+            ready = [step_id for step_id in pending if all(d in results for d in deps[step_id])]
+            for step_id in ready:
+                pending.remove(step_id)
+                step = steps[step_id]
+                print(f"[AgentRuntime._execute_plan] 단계 {order[step_id]}/{len(steps)}: {step['tool']}.{step['action']} (step_id={step_id})")
+                task = asyncio.ensure_future(
+                    self._aexecute_step(step, deps[step_id], results, execution_context)
+                )
+                running[task] = step_id
+            if not running:
+                # 남은 단계가 있지만 실행 가능한 단계가 없음 → 순환 의존성 (계획 자체의 오류라 재시도 불가)
+                for step_id in pending:
                     results[step_id] = {
                         "status": "error",
-                        "error": str(e),
-                        "step_id": step_id
+                        "error": f"단계 {step_id}의 의존성을 만족할 수 없습니다 (순환 의존성).",
+                        "error_type": "ValueError",
+                        "permanent": True,
+                        "step_id": step_id,
+                        "elapsed_ms": 0.0
                     }
-            else:
-                results[step_id] = {
-                    "status": "error",
-                    "error": f"Tool '{tool_name}' not found",
-                    "step_id": step_id
-                }
+                pending = []
+                break
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                step_id = running.pop(task)
+                step_result = task.result()
+                results[step_id] = step_result
+                if step_result.get("status") == "success":
+                    # 컨텍스트에 실제 결과 저장 (다음 단계에서 사용)
+                    execution_context[f"step_{step_id}"] = step_result["result"]
+                    execution_context[f"step_{step_id}_result"] = step_result["result"]
+                elif self.fail_fast and self._step_failed(step_result):
+                    reason = f"단계 {step_id} 실패로 취소됨 (fail_fast)"
+                    for other, other_id in running.items():
+                        other.cancel()
+                        results[other_id] = {"status": "cancelled", "error": reason, "step_id": other_id, "elapsed_ms": 0.0}
+                    for other_id in pending:
+                        results[other_id] = {"status": "cancelled", "error": reason, "step_id": other_id, "elapsed_ms": 0.0}
+                    running, pending = {}, []
+                    break
+        
+        # 결과를 계획 순서대로 정렬
+        results = {step_id: results[step_id] for step_id in steps if step_id in results}
         
         # 최종 결과 반환
         final_result_id = max([s["step_id"] for s in execution_plan.steps])
@@ -541,21 +744,132 @@ class AgentRuntime:
             "plan_id": execution_plan.plan_id,
             "steps": results,
             "final_result": final_result,
-            "all_results": results
+            "all_results": results,
+            "timing": {
+                "total_ms": round((time.monotonic() - plan_started) * 1000, 1),
+                "steps_ms": {step_id: r.get("elapsed_ms", 0.0) for step_id, r in results.items()},
+            }
         }
     
+    @staticmethod
+    def _step_failed(step_result: Dict[str, Any]) -> bool:
+        """단계 실패 여부 (_evaluate_result 와 같은 기준: 실행 오류 또는 도구 결과 status=error)"""
+        if step_result.get("status") not in ("success", "completed"):
+            return True
+        inner = step_result.get("result")
+        return isinstance(inner, dict) and inner.get("status") == "error"
+    
+    def _cancel_blocked_steps(
+        self,
+        pending: List[Any],
+        deps: Dict[Any, List[Any]],
+        results: Dict[Any, Dict[str, Any]]
+    ) -> None:
+        """실패·취소된 단계에 의존하는 대기 단계를 (전이적으로) cancelled 처리"""
+        changed = True
+        while changed:
+            changed = False
+            for step_id in list(pending):
+                failed_dep = next(
+                    (d for d in deps[step_id] if d in results and self._step_failed(results[d])),
+                    None
+                )
+                if failed_dep is None:
+                    continue
+                print(f"[AgentRuntime._execute_plan] 단계 {step_id} 취소: 의존 단계 {failed_dep} 실패")
+                results[step_id] = {
+                    "status": "cancelled",
+                    "error": f"의존 단계 {failed_dep} 실패로 실행하지 않았습니다.",
+                    "step_id": step_id,
+                    "elapsed_ms": 0.0
+                }
+                pending.remove(step_id)
+                changed = True
+    
+    async def _aexecute_step(
+        self,
+        step: Dict[str, Any],
+        dependencies: List[Any],
+        results: Dict[Any, Dict[str, Any]],
+        execution_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """단계 1개 실행 (의존 단계 결과를 파라미터에 주입, 소요 시간 기록)"""
+        step_id = step["step_id"]
+        tool_name = step["tool"]
+        action = step["action"]
+        # 동시 실행·재시도 시 계획 원본이 바뀌지 않도록 복사본 사용
+        parameters = dict(step.get("parameters") or {})
+        
+        # 의존성 결과를 파라미터에 포함
+        if dependencies:
+            dependency_results = {}
+            for dep_id in dependencies:
+                # results[dep_id]는 {"status": "success", "result": {...}, "step_id": ...} 구조
+                # 실제 결과는 "result" 키에 있음
+                dep_result = results[dep_id]
+                if isinstance(dep_result, dict) and "result" in dep_result:
+                    dep_result = dep_result["result"]
+                dependency_results[dep_id] = dep_result
+                parameters["_dependency_result"] = dep_result
+            parameters["_dependency_results"] = dependency_results
+        
+        started = time.monotonic()
+        if tool_name not in self.tools_registry:
+            return {
+                "status": "error",
+                "error": f"Tool '{tool_name}' not found",
+                "error_type": "KeyError",
+                "step_id": step_id,
+                "elapsed_ms": 0.0
+            }
+        try:
+            print(f"[AgentRuntime._execute_plan] 도구 실행 중: {tool_name}.{action}")
+            step_result = await self.acall_tool(tool_name, action, parameters, execution_context)
+            elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+            print(f"[AgentRuntime._execute_plan] 도구 실행 완료: {tool_name}.{action} ({elapsed_ms}ms)")
+            return {
+                "status": "success",
+                "result": step_result,
+                "step_id": step_id,
+                "elapsed_ms": elapsed_ms
+            }
+        except Exception as e:
+            print(f"[AgentRuntime._execute_plan] 도구 실행 오류: {tool_name}.{action} - {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return {
+                "status": "error",
+                "error": str(e),
+                "error_type": type(e).__name__,
+                "step_id": step_id,
+                "elapsed_ms": round((time.monotonic() - started) * 1000, 1)
+            }
+    
     def _self_correction_loop(
         self,
         execution_plan: ExecutionPlan,
         execution_result: Dict[str, Any],
         memory: ShortTermMemory,
         retry_count: int = 0
+    ) -> Dict[str, Any]:
+        """자기 수정 루프 (동기 진입점)"""
+        return _run_coroutine_sync(
+            self._aself_correction_loop(execution_plan, execution_result, memory, retry_count)
+        )
+    
+    async def _aself_correction_loop(
+        self,
+        execution_plan: ExecutionPlan,
+        execution_result: Dict[str, Any],
+        memory: ShortTermMemory,
+        retry_count: int = 0
     ) -> Dict[str, Any]:
         """
         자기 수정 루프 (Self-Correction Loop)
         
-        결과를 평가하고, 실패 시 재시도
-        PoC 단계에서는 단순 재시도만 수행
+        결과를 평가하고, 실패 시 단계 단위로 재시도
+        - 성공한 단계는 체크포인트로 재사용하고 실패한 단계와 그 의존 단계만 다시 실행
+        - 도구별 RetryPolicy 에 따라 재시도 횟수·백오프·재시도 불가 오류를 판단
         """
         # 결과 평가
         evaluation = self._evaluate_result(execution_result)
@@ -568,21 +882,47 @@ class AgentRuntime:
                 "evaluation": evaluation
             }
         
+        # 실패 단계 분류 (cancelled 는 의존 단계 실패로 실행되지 않은 단계 → 함께 재실행됨)
+        steps = {s["step_id"]: s for s in execution_plan.steps}
+        all_steps = execution_result.get("all_results", {})
+        retryable, permanent = [], []
+        for step_id in evaluation["failed_steps"]:
+            step_result = all_steps.get(step_id)
+            if not isinstance(step_result, dict) or step_result.get("status") == "cancelled":
+                continue
+            policy = self._retry_policy(steps.get(step_id, {}).get("tool", ""))
+            if not self._is_retryable(step_result, policy):
+                permanent.append(step_id)
+            elif retry_count < policy.max_retries:
+                retryable.append(step_id)
+        evaluation["retry_count"] = retry_count
+        
         # 의류 이미지 없음 등 재시도해도 바뀌지 않는 오류는 재시도하지 않고 바로 실패 메시지 반환
         step_error = evaluation.get("step_error_message") or ""
-        if "의류 이미지" in step_error or "image_path" in step_error.lower():
+        if permanent and ("의류 이미지" in step_error or "image_path" in step_error.lower()):
             return {
                 "status": "failed",
                 "message": "의류 이미지를 첨부한 뒤 '입혀줘' 또는 'Try-On 실행해줘'로 다시 시도해 주세요.",
                 "data": execution_result,
                 "evaluation": evaluation
             }
+        if permanent:
+            return {
+                "status": "failed",
+                "message": step_error or "재시도할 수 없는 오류로 작업을 완료하지 못했습니다.",
+                "data": execution_result,
+                "evaluation": evaluation
+            }
         
-        # 실패 시 재시도
-        if retry_count < self.max_retries:
-            # 계획 수정 (간단한 재시도)
-            retry_result = self._execute_plan(execution_plan, memory)
-            return self._self_correction_loop(
+        # 실패 시 재시도 (실패 단계만)
+        if retryable:
+            delay = max(
+                self._retry_policy(steps[step_id]["tool"]).backoff(retry_count) for step_id in retryable
+            )
+            print(f"[AgentRuntime] 단계 {retryable} 재시도 {retry_count + 1}회차 ({delay:.2f}초 후)")
+            await asyncio.sleep(delay)
+            retry_result = await self._aexecute_plan(execution_plan, memory, checkpoint=all_steps)
+            return await self._aself_correction_loop(
                 execution_plan,
                 retry_result,
                 memory,
@@ -596,6 +936,17 @@ class AgentRuntime:
                 "evaluation": evaluation
             }
     
+    @staticmethod
+    def _is_retryable(step_result: Dict[str, Any], policy: RetryPolicy) -> bool:
+        """일시적 오류(재시도 가치 있음)인지 판단: permanent 표시·예외 타입·결과 메시지를 정책과 대조"""
+        if step_result.get("permanent"):
+            return False
+        if step_result.get("error_type") in policy.non_retryable_errors:
+            return False
+        inner = step_result.get("result") if isinstance(step_result.get("result"), dict) else {}
+        message = f"{step_result.get('error') or ''} {inner.get('message') or ''}"
+        return not any(marker in message for marker in policy.non_retryable_messages)
+    
     def _evaluate_result(self, execution_result: Dict[str, Any]) -> Dict[str, Any]:
         """
         결과 평가
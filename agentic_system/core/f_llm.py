@@ -13,17 +13,42 @@ from typing import Dict, List, Optional, Any
 from pydantic import BaseModel
 import json
 from datetime import datetime
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import os
 import sys
+import time
 from pathlib import Path
 import threading
 
-# InternVL2 래퍼 임포트
+# InternVL2 래퍼(torch·transformers)는 모델 로딩 스레드에서 임포트 (서버 기동 지연 방지)
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
-try:
-    from agentic_system.models import InternVL2Wrapper
-except ImportError:
-    InternVL2Wrapper = None
+
+# LLM 기반 계획 생성 사용 여부 (기본: 비활성화 — PoC 단계에서 추론이 느려 규칙 기반 계획 사용)
+FLLM_ENABLE = os.environ.get("FLLM_ENABLE", "").strip().lower() in ("1", "true", "yes")
+# 첫 LLM 요청이 모델 준비를 기다리는 최대 시간 (초), 이후 요청은 준비될 때까지 바로 규칙 기반
+FLLM_READY_TIMEOUT = float(os.environ.get("FLLM_READY_TIMEOUT", "10"))
+# API 기동 시 모델을 미리 로딩할지 여부 (기본: 첫 LLM 요청 또는 readiness 확인 시 로딩, FLLM_ENABLE 일 때만)
+FLLM_PRELOAD = os.environ.get("FLLM_PRELOAD", "").strip().lower() in ("1", "true", "yes")
+# 계획 생성 추론 마이크로 배치 설정 (최대 배치 크기, 첫 요청 후 대기 시간 ms) 및 요청당 응답 제한 시간 (초)
+FLLM_BATCH_SIZE = int(os.environ.get("FLLM_BATCH_SIZE", "8"))
+FLLM_BATCH_WAIT_MS = float(os.environ.get("FLLM_BATCH_WAIT_MS", "20"))
+FLLM_INFERENCE_TIMEOUT = float(os.environ.get("FLLM_INFERENCE_TIMEOUT", "5"))
+# 계획 프롬프트 고정 지시문의 KV 캐시 재사용 ("0" 이면 사용 안 함)
+FLLM_PREFIX_CACHE = os.environ.get("FLLM_PREFIX_CACHE", "1").strip().lower() not in ("0", "false", "no")
+
+# 계획 생성 프롬프트의 고정 지시문 — 모든 요청에서 동일하므로 앞에 두어 프리픽스 KV 캐시로 재사용
+PLANNING_PROMPT_PREFIX = """당신은 패션 AI 가상 피팅 시스템의 작업 지시 전문가 에이전트입니다.
+
+아래 사용자 요청과 추상적 계획을 바탕으로 다음 형식으로 구체적인 실행 계획을 생성해주세요:
+
+1. 각 단계별로 필요한 도구(Tool)를 지정
+2. 각 단계의 파라미터를 명확히 정의
+3. 단계 간 의존성을 명시
+
+JSON 형식으로 반환하거나, 자연어로 단계별 실행 계획을 설명해주세요.
+
+"""
 
 
 class ExecutionPlan(BaseModel):
@@ -44,6 +69,8 @@ class FLLM:
     구체적인 도구 호출 순서와 파라미터를 담은 JSON 형식의 실행 계획으로 변환
     
     InternVL2-8B 모델을 사용하여 멀티모달 입력 처리
+    모델은 start_loading() 으로 백그라운드 스레드에서 로딩하며, 준비 전에는 규칙 기반 계획으로 응답
+    모델 상태: disabled (FLLM_ENABLE 꺼짐) / idle / loading / ready / failed
     """
     
     def __init__(
@@ -56,24 +83,97 @@ class FLLM:
     ):
         self.model_name = model_name
         self.rag_enabled = rag_enabled
-        self.use_llm = use_llm
+        # FLLM_ENABLE 이 꺼져 있으면 모델을 로딩하지 않음 (상태: disabled)
+        self.use_llm = use_llm and FLLM_ENABLE
         self.name = "F.LLM (Agent 2)"
         
-        # InternVL2 모델 초기화
+        # InternVL2 모델은 start_loading() 에서 백그라운드 로딩 (준비 완료 시 llm_model 설정)
         self.llm_model = None
-        if use_llm and InternVL2Wrapper is not None:
-            try:
-                actual_device = device if device else ("cuda" if self._check_cuda() else "cpu")
-                self.llm_model = InternVL2Wrapper(
-                    model_path=model_path,
-                    device=actual_device
-                )
-                print(f"InternVL2-8B 모델이 준비되었습니다. (디바이스: {actual_device})")
-            except Exception as e:
-                print(f"InternVL2 모델 로딩 경고: {str(e)}")
-                print("규칙 기반 모드로 동작합니다.")
-                self.llm_model = None
-                self.use_llm = False
+        self.inference_queue = None  # 모델 준비 후 BatchInferenceQueue
+        self.model_path = model_path
+        self.device = device
+        self.model_state = "idle" if self.use_llm else "disabled"
+        self.model_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._model_lock = threading.Lock()
+        self._model_settled = threading.Event()  # ready 또는 failed 가 되면 set
+        self._ready_waited = False
+        if not self.use_llm:
+            self._model_settled.set()
+    
+    def start_loading(self) -> None:
+        """모델 로딩을 백그라운드 스레드에서 시작 (이미 시작했으면 무시)"""
+        with self._model_lock:
+            if self.model_state != "idle":
+                return
+            self.model_state = "loading"
+        threading.Thread(target=self._load_model, name="fllm-model-loader", daemon=True).start()
+    
+    def _load_model(self) -> None:
+        started = time.monotonic()
+        try:
+            from agentic_system.models.internvl2_wrapper import InternVL2Wrapper
+            from agentic_system.models.batch_inference import BatchInferenceQueue
+            actual_device = self.device if self.device else ("cuda" if self._check_cuda() else "cpu")
+            llm_model = InternVL2Wrapper(model_path=self.model_path, device=actual_device)
+            if not Path(llm_model.model_path).exists():
+                raise FileNotFoundError(f"InternVL2 모델 경로가 존재하지 않습니다: {llm_model.model_path}")
+            print(f"[F.LLM] InternVL2 모델 백그라운드 로딩 시작: {llm_model.model_path} (디바이스: {actual_device})")
+            llm_model.load_model()
+            if FLLM_PREFIX_CACHE:
+                try:
+                    llm_model.warm_prefix(PLANNING_PROMPT_PREFIX)
+                except Exception as e:
+                    # 프리픽스 캐시 없이도 동작 (요청 시 다시 시도)
+                    print(f"[F.LLM] 계획 프롬프트 프리픽스 KV 미리 계산 실패: {e}")
+        except Exception as e:
+            self.model_error = str(e)
+            self.model_state = "failed"
+            self.use_llm = False
+            print(f"[F.LLM] InternVL2 모델 로딩 실패, 규칙 기반 모드로 동작합니다: {e}")
+        else:
+            self.llm_model = llm_model
+            self.inference_queue = BatchInferenceQueue(
+                llm_model, max_batch_size=FLLM_BATCH_SIZE, max_wait=FLLM_BATCH_WAIT_MS / 1000
+            )
+            self.model_state = "ready"
+            print(f"[F.LLM] InternVL2 모델 준비 완료 ({time.monotonic() - started:.1f}초)")
+        finally:
+            self.load_seconds = round(time.monotonic() - started, 2)
+            self._model_settled.set()
+    
+    def wait_until_ready(self, timeout: Optional[float] = FLLM_READY_TIMEOUT) -> bool:
+        """
+        모델 준비 대기 (준비되면 True)
+        
+        로딩 중이면 첫 호출만 timeout 까지 기다리고, 이후 호출은 기다리지 않음
+        (로딩이 길어져도 요청마다 timeout 만큼 지연되지 않도록)
+        """
+        if self.model_state == "idle":
+            self.start_loading()
+        if not self._model_settled.is_set() and not self._ready_waited:
+            self._ready_waited = True
+            self._model_settled.wait(timeout)
+        return self.model_state == "ready"
+    
+    def model_status(self) -> Dict[str, Any]:
+        """모델 로딩 상태 (readiness 엔드포인트용)"""
+        return {
+            "model": self.model_name,
+            "state": self.model_state,
+            "ready": self.model_state == "ready",
+            "device": self.llm_model.device if self.llm_model is not None else self.device,
+            "load_seconds": self.load_seconds,
+            "error": self.model_error,
+            "batching": self.inference_queue.stats() if self.inference_queue is not None else None,
+            "feature_cache": self.llm_model.feature_cache.stats() if self.llm_model is not None else None,
+            "prefix_cache": self.llm_model.prefix_stats() if self.llm_model is not None else None,
+        }
+    
+    def close(self) -> None:
+        """배치 추론 큐 종료 (대기 중인 요청은 실패 처리)"""
+        if self.inference_queue is not None:
+            self.inference_queue.close()
         
     def _check_cuda(self) -> bool:
         """CUDA 사용 가능 여부 확인"""
@@ -106,18 +206,15 @@ class FLLM:
         """
         print(f"[F.LLM] 실행 계획 생성 시작: plan_type={abstract_plan.get('plan_type')}, use_llm={self.use_llm}, has_llm_model={self.llm_model is not None}, has_user_text={user_text is not None}")
         
-        # LLM을 사용한 계획 생성 (PoC 단계에서는 비활성화 - 성능 문제로 인해)
-        # 향후 Pilot 단계에서 활성화 예정
-        use_llm_for_now = False  # LLM 추론이 너무 느려서 임시 비활성화
-        
-        if use_llm_for_now and self.use_llm and self.llm_model is not None and user_text:
+        # LLM을 사용한 계획 생성 (FLLM_ENABLE=1 일 때만, 기본은 성능 문제로 규칙 기반)
+        if self.use_llm and user_text:
             print("[F.LLM] LLM 기반 계획 생성 시도...")
             enhanced_plan = self._generate_plan_with_llm(
                 abstract_plan, user_text, image_path, context, rag_context
             )
             print("[F.LLM] LLM 기반 계획 생성 완료")
         else:
-            print("[F.LLM] 규칙 기반 계획 생성 (PoC 단계)")
+            print("[F.LLM] 규칙 기반 계획 생성")
             # 규칙 기반 계획 생성 (Fallback)
             enhanced_plan = self._enhance_with_rag(abstract_plan, rag_context) if self.rag_enabled and rag_context else abstract_plan
         
@@ -156,65 +253,37 @@ class FLLM:
         InternVL2-8B 모델을 사용하여 사용자 입력과 이미지를 분석하고
         구체적인 실행 계획을 생성
         """
-        if self.llm_model is None:
+        # 백그라운드 로딩이 끝나지 않았으면 (첫 요청만 제한 시간까지 대기) 규칙 기반으로
+        if not self.wait_until_ready():
+            print(f"[F.LLM] InternVL2 모델 준비 전 (상태: {self.model_state}). 규칙 기반 모드로 전환합니다.")
             return abstract_plan
         
-        # LLM 모델이 로드되지 않았으면 로드
-        if self.llm_model.model is None:
-            # 모델 경로 존재 여부 확인
-            from pathlib import Path
-            model_path = Path(self.llm_model.model_path)
-            if not model_path.exists():
-                print(f"[F.LLM] WARNING: InternVL2 모델 경로가 존재하지 않습니다: {model_path}")
-                print("[F.LLM] 규칙 기반 모드로 전환합니다.")
-                return abstract_plan
-            
-            try:
-                print(f"[F.LLM] InternVL2 모델 로딩 시도 중: {model_path}")
-                self.llm_model.load_model()
-            except Exception as e:
-                print(f"[F.LLM] ERROR: LLM 모델 로딩 실패: {str(e)}")
-                print("[F.LLM] 규칙 기반 모드로 전환합니다.")
-                return abstract_plan
+        # 모델 준비 후에만 임포트
+        from agentic_system.models.cancellation import GenerationCancelled
         
         # 프롬프트 구성
         prompt = self._build_planning_prompt(abstract_plan, user_text, context, rag_context)
         
         try:
-            # LLM 추론 (타임아웃 설정)
-            # threading은 이미 임포트됨
-            
-            response = None
-            error_occurred = threading.Event()
-            
-            def llm_inference():
-                nonlocal response
-                try:
-                    response = self.llm_model.generate_text(
-                        prompt=prompt,
-                        image_path=image_path,
-                        max_new_tokens=512
-                    )
-                except Exception as e:
-                    print(f"[F.LLM] ERROR: LLM 추론 오류: {str(e)}")
-                    error_occurred.set()
-            
-            # 별도 스레드에서 추론 실행
-            print("[F.LLM] LLM 추론 시작 (별도 스레드, 타임아웃: 5초)...")
-            inference_thread = threading.Thread(target=llm_inference)
-            inference_thread.daemon = True
-            inference_thread.start()
-            inference_thread.join(timeout=5)  # 5초 타임아웃 (더 짧게 설정)
-            
-            if inference_thread.is_alive():
-                print("[F.LLM] WARNING: LLM 추론 타임아웃 (5초 초과). 규칙 기반 모드로 전환합니다.")
-                return abstract_plan
-            
-            if error_occurred.is_set():
-                print("[F.LLM] WARNING: LLM 추론 오류 발생. 규칙 기반 모드로 전환합니다.")
+            # 배치 추론 큐에 등록 → 동시 요청과 한 forward 로 묶여 실행
+            # timeout: 디코딩 스텝마다 확인되어 초과 시 다음 토큰에서 생성 중단
+            future = self.inference_queue.submit(
+                prompt,
+                image_path=image_path,
+                generation_config={"max_new_tokens": 512, "do_sample": True, "temperature": 0.7},
+                timeout=FLLM_INFERENCE_TIMEOUT,
+                prefix=PLANNING_PROMPT_PREFIX if FLLM_PREFIX_CACHE else None
+            )
+            try:
+                # 생성 중단 후 결과 전달까지의 여유 1초
+                response = future.result(timeout=FLLM_INFERENCE_TIMEOUT + 1.0)
+            except (FutureTimeoutError, GenerationCancelled):
+                # 대기 중이면 배치에서 제외, 실행 중이면 취소 토큰으로 생성 중단
+                future.cancel()
+                print(f"[F.LLM] WARNING: LLM 추론 타임아웃 ({FLLM_INFERENCE_TIMEOUT:g}초 초과). 규칙 기반 모드로 전환합니다.")
                 return abstract_plan
             
-            if response is None:
+            if not response:
                 print("[F.LLM] WARNING: LLM 응답이 없습니다. 규칙 기반 모드로 전환합니다.")
                 return abstract_plan
             
@@ -235,23 +304,13 @@ class FLLM:
         context: Optional[Dict[str, Any]],
         rag_context: Optional[Dict[str, Any]]
     ) -> str:
-        """계획 생성을 위한 프롬프트 구성"""
-        prompt = f"""당신은 패션 AI 가상 피팅 시스템의 작업 지시 전문가 에이전트입니다.
-
-사용자 요청: {user_text}
+        """계획 생성을 위한 프롬프트 구성 (고정 지시문 PLANNING_PROMPT_PREFIX + 요청별 내용)"""
+        prompt = PLANNING_PROMPT_PREFIX + f"""사용자 요청: {user_text}
 
 추상적 계획:
 - 목표: {abstract_plan.get('goal', '')}
 - 유형: {abstract_plan.get('plan_type', '')}
-- 단계: {', '.join(abstract_plan.get('steps', []))}
-
-다음 형식으로 구체적인 실행 계획을 생성해주세요:
-
-1. 각 단계별로 필요한 도구(Tool)를 지정
-2. 각 단계의 파라미터를 명확히 정의
-3. 단계 간 의존성을 명시
-
-JSON 형식으로 반환하거나, 자연어로 단계별 실행 계획을 설명해주세요."""
+- 단계: {', '.join(abstract_plan.get('steps', []))}"""
         
         if rag_context:
             prompt += f"\n\n참고 정보: {rag_context.get('rag_suggestions', [])}"
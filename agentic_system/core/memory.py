@@ -4,9 +4,21 @@ Memory Management Component
 PoC 단계에서는 단기 메모리(Session-based)만 사용
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable
+from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
-from collections import deque
+from collections import deque, OrderedDict
+from pathlib import Path
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+_DEFAULT_SESSION_DB = Path(__file__).resolve().parent.parent / "data" / "sessions.db"
+_DEFAULT_LONG_TERM_DB = Path(__file__).resolve().parent.parent / "data" / "long_term.db"
 
 
 class Memory:
@@ -28,6 +40,41 @@ class Memory:
         self.storage.clear()
 
 
+class ConversationTurn:
+    """
+    대화 기록 1건 (__slots__ 로 인스턴스 dict 없이 보관)
+
+    - timestamp: epoch 초 (float) — ISO 문자열 변환은 to_dict() 에서만
+    - metadata: 키는 sys.intern 으로 공유, 비어 있으면 None (빈 dict 생성 생략)
+    """
+
+    __slots__ = ("timestamp", "user_input", "agent_response", "metadata")
+
+    def __init__(
+        self,
+        user_input: str,
+        agent_response: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[float] = None
+    ):
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.user_input = user_input
+        self.agent_response = agent_response
+        self.metadata = {sys.intern(str(k)): v for k, v in metadata.items()} if metadata else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """API 응답용 dict (기존 대화 기록 형식)"""
+        return {
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+            "user_input": self.user_input,
+            "agent_response": self.agent_response,
+            "metadata": dict(self.metadata) if self.metadata else {}
+        }
+
+    def __repr__(self) -> str:
+        return f"ConversationTurn(timestamp={self.timestamp!r}, user_input={self.user_input!r})"
+
+
 class ShortTermMemory(Memory):
     """
     단기 메모리 (Session-based)
@@ -41,6 +88,12 @@ class ShortTermMemory(Memory):
         self.max_size = max_size
         self.conversation_history: deque = deque(maxlen=max_size)
         self.context: Dict[str, Any] = {}
+        # 변경 알림 (공유 백엔드가 쓰기 예약에 사용)
+        self._on_change: Optional[Callable[["ShortTermMemory"], None]] = None
+    
+    def _changed(self):
+        if self._on_change is not None:
+            self._on_change(self)
     
     def add_conversation(
         self, 
@@ -49,21 +102,17 @@ class ShortTermMemory(Memory):
         metadata: Optional[Dict] = None
     ):
         """대화 기록 추가"""
-        conversation = {
-            "timestamp": datetime.now().isoformat(),
-            "user_input": user_input,
-            "agent_response": agent_response,
-            "metadata": metadata or {}
-        }
-        self.conversation_history.append(conversation)
+        self.conversation_history.append(ConversationTurn(user_input, agent_response, metadata))
+        self._changed()
     
-    def get_conversation_history(self) -> List[Dict]:
-        """대화 기록 조회"""
+    def get_conversation_history(self) -> List[ConversationTurn]:
+        """대화 기록 조회 (dict 변환은 API 응답 시 ConversationTurn.to_dict())"""
         return list(self.conversation_history)
     
     def update_context(self, key: str, value: Any):
-        """컨пас 업데이트"""
+        """컨텍스트 업데이트"""
         self.context[key] = value
+        self._changed()
     
     def get_context(self, key: Optional[str] = None) -> Any:
         """컨텍스트 조회"""
@@ -74,25 +123,129 @@ class ShortTermMemory(Memory):
     def clear_context(self):
         """컨텍스트 초기화"""
         self.context.clear()
+        self._changed()
+
+
+class LongTermStore:
+    """
+    장기 메모리 영구 저장소 (SQLite, user_id 기준)
+
+    - preferences: (user_id, key) 기본 키 → 사용자별 선호도 조회는 인덱스 범위 검색
+    - history: 추가만 하는(append-only) 이벤트 로그, (user_id, event_time) 인덱스
+      사용자별 compact_every 회 추가마다 최근 history_limit 건만 남기고 압축(compaction)
+
+    Args:
+        db_path: SQLite 파일 경로
+        history_limit: 사용자별로 보관할 최대 이벤트 수
+        compact_every: 사용자별 이벤트 추가 N회마다 압축
+    """
+
+    def __init__(self, db_path: Optional[str] = None, history_limit: int = 1000, compact_every: int = 100):
+        self.db_path = Path(db_path) if db_path else _DEFAULT_LONG_TERM_DB
+        self.history_limit = history_limit
+        self.compact_every = compact_every
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS preferences ("
+            "user_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (user_id, key))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, "
+            "event_time REAL NOT NULL, event TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_history_user_time ON history (user_id, event_time)")
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._appends: Dict[str, int] = {}
+
+    def load_preferences(self, user_id: str) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, value FROM preferences WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def save_preference(self, user_id: str, key: str, value: Any) -> None:
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO preferences (user_id, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                    (user_id, key, json.dumps(value, ensure_ascii=False, default=str), time.time())
+                )
+
+    def append(self, user_id: str, event: Dict[str, Any], event_time: Optional[float] = None) -> None:
+        """이벤트 추가 (기존 행은 수정하지 않음)"""
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT INTO history (user_id, event_time, event) VALUES (?, ?, ?)",
+                    (user_id, event_time or time.time(),
+                     json.dumps(event, ensure_ascii=False, separators=(",", ":"), default=str))
+                )
+            count = self._appends.get(user_id, 0) + 1
+            self._appends[user_id] = count
+        if count % self.compact_every == 0:
+            self.compact(user_id)
+
+    def recent(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """최근 이벤트 limit 건 (오래된 것부터)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT event FROM history WHERE user_id = ? ORDER BY event_time DESC, id DESC LIMIT ?",
+                (user_id, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def compact(self, user_id: Optional[str] = None) -> int:
+        """사용자별 최근 history_limit 건만 남기고 삭제 (user_id 생략 시 전체 사용자)"""
+        with self._lock:
+            if user_id is None:
+                user_ids = [r[0] for r in self._db.execute("SELECT DISTINCT user_id FROM history").fetchall()]
+            else:
+                user_ids = [user_id]
+            removed = 0
+            with self._db:
+                for uid in user_ids:
+                    removed += self._db.execute(
+                        "DELETE FROM history WHERE user_id = ? AND id NOT IN ("
+                        "SELECT id FROM history WHERE user_id = ? ORDER BY event_time DESC, id DESC LIMIT ?)",
+                        (uid, uid, self.history_limit)
+                    ).rowcount
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
 
 
 class LongTermMemory(Memory):
     """
     장기 메모리
     
-    Pilot 단계에서 구현 예정
     사용자의 과거 대화 및 선호도 기억
+    - preferences: 메모리 dict (읽기는 DB 조회 없음), 저장 시 LongTermStore 에도 기록
+    - history: 최근 이벤트 recent_size 건만 메모리에 유지, 전체는 LongTermStore 에 추가 기록
+    store 가 없으면 프로세스 메모리에만 보관
     """
     
-    def __init__(self, user_id: str):
+    def __init__(self, user_id: str, store: Optional[LongTermStore] = None, recent_size: int = 50):
         super().__init__()
         self.user_id = user_id
-        self.preferences: Dict[str, Any] = {}
-        self.history: List[Dict] = []
+        self.store = store
+        self.loaded_at = time.monotonic()
+        self.preferences: Dict[str, Any] = store.load_preferences(user_id) if store else {}
+        self.history: deque = deque(store.recent(user_id, recent_size) if store else (), maxlen=recent_size)
     
     def save_preference(self, key: str, value: Any):
         """선호도 저장"""
         self.preferences[key] = value
+        if self.store is not None:
+            self.store.save_preference(self.user_id, key, value)
     
     def get_preference(self, key: str) -> Optional[Any]:
         """선호도 조회"""
@@ -100,36 +253,474 @@ class LongTermMemory(Memory):
     
     def add_to_history(self, event: Dict):
         """히스토리에 이벤트 추가"""
-        self.history.append({
-            "timestamp": datetime.now().isoformat(),
+        now = datetime.now()
+        entry = {
+            "timestamp": now.isoformat(),
             **event
-        })
+        }
+        self.history.append(entry)
+        if self.store is not None:
+            self.store.append(self.user_id, entry, now.timestamp())
     
-    # Pilot 단계에서 구현 예정
-    pass
+    def get_history(self, limit: Optional[int] = None) -> List[Dict]:
+        """히스토리 조회 (메모리에 없는 오래된 이벤트는 저장소에서)"""
+        if limit is None or limit <= len(self.history) or self.store is None:
+            items = list(self.history)
+            return items[-limit:] if limit else items
+        return self.store.recent(self.user_id, limit)
+
+
+class SessionBackend(ABC):
+    """
+    세션 저장소 인터페이스 (MemoryManager 백엔드)
+
+    - SessionStore: 프로세스 내 메모리 (단일 워커)
+    - SQLiteSessionStore: SQLite(WAL) 파일 공유 (여러 uvicorn 워커)
+
+    SQLiteSessionStore 의 조회·삭제는 DB 를 읽고 쓰는 블로킹 호출이므로
+    async 핸들러에서는 asyncio.to_thread 등으로 스레드 풀에서 호출
+    """
+
+    @abstractmethod
+    def get_or_create(self, session_id: str) -> "ShortTermMemory":
+        ...
+
+    @abstractmethod
+    def remove(self, session_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def __contains__(self, session_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """유휴 TTL 이 지난 세션 제거 후 제거 수 반환"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class SessionStore(SessionBackend):
+    """
+    세션별 단기 메모리 저장소 (LRU + 유휴 TTL)
+
+    - max_sessions 초과 시 가장 오래 사용되지 않은 세션부터 제거
+    - idle_ttl 초 동안 접근이 없는 세션은 sweep() 에서 제거
+    OrderedDict 는 접근 순서를 유지하므로 만료 검사는 가장 오래된 쪽부터 만료되지 않은 세션을 만날 때까지만 수행
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 1800.0):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, ShortTermMemory]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+        self.cleared = 0
+        self.peak = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def get_or_create(self, session_id: str) -> ShortTermMemory:
+        now = time.monotonic()
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                memory = ShortTermMemory(session_id)
+                self._sessions[session_id] = memory
+                self.created += 1
+                while len(self._sessions) > self.max_sessions:
+                    old_id, _ = self._sessions.popitem(last=False)
+                    self._last_access.pop(old_id, None)
+                    self.evicted += 1
+                self.peak = max(self.peak, len(self._sessions))
+            else:
+                self._sessions.move_to_end(session_id)
+            self._last_access[session_id] = now
+            return memory
+
+    def remove(self, session_id: str) -> bool:
+        with self._lock:
+            self._last_access.pop(session_id, None)
+            if self._sessions.pop(session_id, None) is None:
+                return False
+            self.cleared += 1
+            return True
+
+    def sweep(self) -> int:
+        """유휴 TTL 이 지난 세션 제거 후 제거 수 반환"""
+        deadline = time.monotonic() - self.idle_ttl
+        removed = 0
+        with self._lock:
+            while self._sessions:
+                session_id = next(iter(self._sessions))
+                if self._last_access.get(session_id, 0.0) > deadline:
+                    break
+                del self._sessions[session_id]
+                self._last_access.pop(session_id, None)
+                removed += 1
+            self.expired += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            live = len(self._sessions)
+        return {
+            "backend": "memory",
+            "live_sessions": live,
+            "max_sessions": self.max_sessions,
+            "idle_ttl": self.idle_ttl,
+            "created": self.created,
+            "evicted_lru": self.evicted,
+            "expired_ttl": self.expired,
+            "cleared": self.cleared,
+            "peak": self.peak,
+        }
+
+
+def _encode_memory(memory: ShortTermMemory) -> bytes:
+    """
+    세션 직렬화 (키 이름 없는 JSON 배열 + 512바이트 이상이면 zlib 압축)
+
+    형식: 1바이트 표시(b"j" 원본 / b"z" 압축) + JSON [[timestamp, user_input, agent_response, metadata], ...], context
+    timestamp 는 epoch 초 (이전 형식의 ISO 문자열도 복원 가능)
+    """
+    history = [
+        [t.timestamp, t.user_input, t.agent_response, t.metadata]
+        for t in list(memory.conversation_history)
+    ]
+    raw = json.dumps([history, dict(memory.context)], ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    if len(raw) >= 512:
+        return b"z" + zlib.compress(raw)
+    return b"j" + raw
+
+
+def _decode_memory(session_id: str, data: bytes) -> ShortTermMemory:
+    raw = zlib.decompress(data[1:]) if data[:1] == b"z" else data[1:]
+    history, context = json.loads(raw.decode("utf-8"))
+    memory = ShortTermMemory(session_id)
+    for timestamp, user_input, agent_response, metadata in history:
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp).timestamp()
+        memory.conversation_history.append(
+            ConversationTurn(user_input, agent_response, metadata, timestamp)
+        )
+    memory.context.update(context)
+    return memory
+
+
+class SQLiteSessionStore(SessionBackend):
+    """
+    SQLite(WAL) 공유 세션 저장소 — 여러 워커가 같은 DB 파일을 사용 (sticky session 불필요)
+
+    - 조회: 매 요청 DB에서 읽어 다른 워커의 기록도 반영 (아직 기록 전인 자기 변경분이 있으면 그것 사용)
+    - 쓰기: 변경된 세션을 모아 flush_interval 마다 한 트랜잭션으로 기록 (배치 쓰기)
+    - 같은 세션을 여러 워커가 동시에 바꾸면 마지막 기록이 남음
+
+    Args:
+        db_path: SQLite 파일 경로
+        max_sessions: 최대 세션 수 (sweep 시 오래된 세션부터 제거)
+        idle_ttl: 세션 유휴 만료 시간 (초)
+        flush_interval: 배치 쓰기 주기 (초)
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_sessions: int = 1000,
+        idle_ttl: float = 1800.0,
+        flush_interval: float = 0.2
+    ):
+        self.db_path = Path(db_path) if db_path else _DEFAULT_SESSION_DB
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.flush_interval = flush_interval
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at)")
+        self._db.commit()
+        self._db_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._dirty: Dict[str, ShortTermMemory] = {}   # 기록 대기 중인 변경 세션
+        self._touched: Dict[str, float] = {}           # 접근 시각만 갱신할 세션
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.cleared = 0
+        self.batches = 0
+        self.rows_written = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="session-flusher", daemon=True)
+        self._flusher.start()
+
+    def _attach(self, memory: ShortTermMemory) -> ShortTermMemory:
+        memory._on_change = self._mark_dirty
+        return memory
+
+    def _mark_dirty(self, memory: ShortTermMemory) -> None:
+        with self._lock:
+            self._dirty[memory.session_id] = memory
+            self._touched.pop(memory.session_id, None)
+        self._wake.set()
+
+    def get_or_create(self, session_id: str) -> ShortTermMemory:
+        with self._lock:
+            memory = self._dirty.get(session_id)
+            if memory is None:
+                self._touched[session_id] = time.time()
+        if memory is not None:
+            return memory
+        with self._db_lock:
+            row = self._db.execute("SELECT data FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is not None:
+            try:
+                return self._attach(_decode_memory(session_id, row[0]))
+            except (ValueError, zlib.error) as e:
+                print(f"[MemoryManager] 세션 {session_id} 복원 실패, 새로 시작: {e}")
+        self.created += 1
+        memory = self._attach(ShortTermMemory(session_id))
+        self._mark_dirty(memory)
+        return memory
+
+    def remove(self, session_id: str) -> bool:
+        with self._lock:
+            had_pending = self._dirty.pop(session_id, None) is not None
+            self._touched.pop(session_id, None)
+        with self._db_lock:
+            deleted = self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount
+            self._db.commit()
+        if deleted or had_pending:
+            self.cleared += 1
+            return True
+        return False
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id in self._dirty:
+                return True
+        with self._db_lock:
+            return self._db.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def _flush_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            # 짧게 모아서 한 번에 기록
+            self._stop.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"[MemoryManager] 세션 기록 실패: {e}")
+
+    def flush(self) -> int:
+        """기록 대기 중인 변경을 한 트랜잭션으로 기록"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            touched, self._touched = self._touched, {}
+        if not dirty and not touched:
+            return 0
+        now = time.time()
+        rows = [(sid, _encode_memory(m), now) for sid, m in dirty.items()]
+        with self._db_lock:
+            with self._db:
+                if rows:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?)", rows
+                    )
+                if touched:
+                    self._db.executemany(
+                        "UPDATE sessions SET updated_at = ? WHERE session_id = ?",
+                        [(t, sid) for sid, t in touched.items()]
+                    )
+        self.batches += 1
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def sweep(self) -> int:
+        self.flush()
+        with self._db_lock:
+            with self._db:
+                expired = self._db.execute(
+                    "DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.idle_ttl,)
+                ).rowcount
+                evicted = self._db.execute(
+                    "DELETE FROM sessions WHERE session_id IN ("
+                    "SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_sessions,)
+                ).rowcount
+        self.expired += expired
+        self.evicted += evicted
+        return expired + evicted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._dirty)
+        with self._db_lock:
+            live = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "db_path": str(self.db_path),
+            "live_sessions": live,
+            "pending_writes": pending,
+            "max_sessions": self.max_sessions,
+            "idle_ttl": self.idle_ttl,
+            "created": self.created,
+            "evicted_lru": self.evicted,
+            "expired_ttl": self.expired,
+            "cleared": self.cleared,
+            "write_batches": self.batches,
+            "rows_written": self.rows_written,
+        }
+
+    def close(self) -> None:
+        """남은 변경 기록 후 연결 종료"""
+        self._stop.set()
+        self._wake.set()
+        self._flusher.join(timeout=2)
+        try:
+            self.flush()
+        finally:
+            with self._db_lock:
+                self._db.close()
+
+
+def create_session_backend(
+    backend: Optional[str] = None,
+    max_sessions: int = 1000,
+    idle_ttl: float = 1800.0
+) -> SessionBackend:
+    """
+    환경 변수로 세션 백엔드 선택
+    
+    MEMORY_BACKEND: "memory"(기본, 단일 프로세스) 또는 "sqlite"(워커 간 공유)
+    MEMORY_DB_PATH: SQLite 파일 경로 (기본: agentic_system/data/sessions.db)
+    """
+    backend = (backend or os.environ.get("MEMORY_BACKEND", "memory")).strip().lower()
+    if backend == "sqlite":
+        try:
+            return SQLiteSessionStore(
+                os.environ.get("MEMORY_DB_PATH") or None,
+                max_sessions=max_sessions,
+                idle_ttl=idle_ttl
+            )
+        except sqlite3.Error as e:
+            print(f"[MemoryManager] SQLite 세션 저장소 사용 불가, 프로세스 메모리 사용: {e}")
+    return SessionStore(max_sessions=max_sessions, idle_ttl=idle_ttl)
 
 
 class MemoryManager:
-    """메모리 관리자"""
+    """
+    메모리 관리자
     
-    def __init__(self):
-        self.short_term_memories: Dict[str, ShortTermMemory] = {}
-        self.long_term_memories: Dict[str, LongTermMemory] = {}
+    Args:
+        backend: 세션 저장소 (생략 시 MEMORY_BACKEND 환경 변수에 따라 생성)
+        long_term_store: 장기 메모리 저장소 (생략 시 LONG_TERM_DB_PATH 또는 data/long_term.db)
+        long_term_cache_size: 메모리에 유지할 사용자 장기 메모리 수 (LRU)
+        long_term_ttl: 캐시된 장기 메모리를 저장소에서 다시 읽는 주기 (초, 다른 워커 변경 반영)
+        max_sessions: 동시에 유지할 최대 세션 수 (초과 시 LRU 제거)
+        idle_ttl: 세션 유휴 만료 시간 (초)
+        sweep_interval: 만료 세션 정리 주기 (초, 0 이하이면 백그라운드 정리 안 함)
+    """
+    
+    def __init__(
+        self,
+        backend: Optional[SessionBackend] = None,
+        max_sessions: int = 1000,
+        idle_ttl: float = 1800.0,
+        sweep_interval: float = 60.0,
+        long_term_store: Optional[LongTermStore] = None,
+        long_term_cache_size: int = 256,
+        long_term_ttl: float = 60.0
+    ):
+        if backend is None:
+            backend = create_session_backend(max_sessions=max_sessions, idle_ttl=idle_ttl)
+        self.short_term_memories: SessionBackend = backend
+        if long_term_store is None:
+            try:
+                long_term_store = LongTermStore(os.environ.get("LONG_TERM_DB_PATH") or None)
+            except sqlite3.Error as e:
+                print(f"[MemoryManager] 장기 메모리 저장소 사용 불가, 프로세스 메모리 사용: {e}")
+        self.long_term_store = long_term_store
+        self.long_term_cache_size = long_term_cache_size
+        self.long_term_ttl = long_term_ttl
+        # 사용자별 장기 메모리 핫 캐시 (LRU)
+        self.long_term_memories: "OrderedDict[str, LongTermMemory]" = OrderedDict()
+        self._long_term_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        if sweep_interval > 0:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, args=(sweep_interval,), name="session-sweeper", daemon=True
+            )
+            self._sweeper.start()
+    
+    def _sweep_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                removed = self.short_term_memories.sweep()
+            except Exception as e:
+                print(f"[MemoryManager] 세션 정리 오류: {e}")
+                continue
+            if removed:
+                print(f"[MemoryManager] 유휴 세션 {removed}개 정리")
     
     def get_short_term_memory(self, session_id: str) -> ShortTermMemory:
         """단기 메모리 조회 또는 생성"""
-        if session_id not in self.short_term_memories:
-            self.short_term_memories[session_id] = ShortTermMemory(session_id)
-        return self.short_term_memories[session_id]
+        return self.short_term_memories.get_or_create(session_id)
     
     def get_long_term_memory(self, user_id: str) -> LongTermMemory:
-        """장기 메모리 조회 또는 생성"""
-        if user_id not in self.long_term_memories:
-            self.long_term_memories[user_id] = LongTermMemory(user_id)
-        return self.long_term_memories[user_id]
+        """장기 메모리 조회 또는 생성 (핫 캐시 → 저장소)"""
+        with self._long_term_lock:
+            memory = self.long_term_memories.get(user_id)
+            if memory is not None and (
+                self.long_term_store is None
+                or time.monotonic() - memory.loaded_at < self.long_term_ttl
+            ):
+                self.long_term_memories.move_to_end(user_id)
+                return memory
+        memory = LongTermMemory(user_id, store=self.long_term_store)
+        with self._long_term_lock:
+            self.long_term_memories[user_id] = memory
+            self.long_term_memories.move_to_end(user_id)
+            while len(self.long_term_memories) > self.long_term_cache_size:
+                self.long_term_memories.popitem(last=False)
+        return memory
     
     def clear_session(self, session_id: str):
         """세션 메모리 삭제"""
-        if session_id in self.short_term_memories:
-            del self.short_term_memories[session_id]
+        self.short_term_memories.remove(session_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        """세션 저장소 지표 (활성 세션 수, LRU 제거·TTL 만료 수 등)"""
+        return self.short_term_memories.stats()
+    
+    def close(self):
+        """백그라운드 정리 스레드 종료 및 세션 저장소 닫기 (대기 중인 기록 반영)"""
+        self._stop.set()
+        self.short_term_memories.close()
+        if self.long_term_store is not None:
+            self.long_term_store.close()
 
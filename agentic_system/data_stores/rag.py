@@ -6,8 +6,11 @@ RAG (Retrieval-Augmented Generation) Store
 - Mock: 규칙/키워드 기반 (MockRAG)
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import json
+import threading
+import time
 
 try:
     from .rag_external import ExternalRAG
@@ -129,18 +132,132 @@ class RAGStore:
     - external: 웹 검색 (DuckDuckGo 또는 Serper API)
     - internal: 로컬 doc/ 및 data/local_rag_docs/ 문서 검색
     - mock: 규칙 기반 패션 지식 (기존 MockRAG)
+    
+    parallel=True 이면 internal·external 을 소스별 스레드 풀에서 동시에 조회하고
+    (느린 외부 검색이 내부 조회 스레드를 점유하지 않도록 풀을 분리), mock 은 호출 스레드에서 바로 실행.
+    소스별 제한 시간(source_timeouts)은 작업이 실제로 시작된 시각부터 계산하며,
+    전체 지연 예산(latency_budget) 안에 끝난 결과만 합침. 시간 초과된 소스는 응답의 rag_timed_out 에 기록.
     """
     
-    def __init__(self, vector_db_type: str = "chroma", use_external: bool = True, use_local: bool = True):
+    DEFAULT_SOURCE_TIMEOUTS = {"internal": 2.0, "external": 4.0, "mock": 1.0}
+    
+    def __init__(
+        self,
+        vector_db_type: str = "chroma",
+        use_external: bool = True,
+        use_local: bool = True,
+        parallel: bool = True,
+        source_timeouts: Optional[Dict[str, float]] = None,
+        latency_budget: float = 4.0,
+        max_workers: int = 8
+    ):
         self.vector_db_type = vector_db_type
         self.mock_rag = MockRAG()
         self.external_rag = ExternalRAG(max_results=5) if use_external and ExternalRAG else None
         self.local_rag = LocalRAG() if use_local and LocalRAG else None
+        self.parallel = parallel
+        self.source_timeouts = {**self.DEFAULT_SOURCE_TIMEOUTS, **(source_timeouts or {})}
+        self.latency_budget = latency_budget
+        # 시간 초과된 조회도 스레드는 끝까지 실행되므로 풀 크기로 동시 실행 수를 제한 (소스별 풀)
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        if parallel:
+            if self.local_rag:
+                self._executors["internal"] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-internal")
+            if self.external_rag:
+                self._executors["external"] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-external")
     
     def retrieve(self, query: str, top_k: int = 5) -> Dict[str, Any]:
         """지식 검색 (Mock 기준, 하위 호환)"""
         return self.mock_rag.retrieve(query)
     
+    def _fetch_internal(self, query: str) -> List[str]:
+        ctx = self.local_rag.get_context(query, top_k=5)
+        return ctx.get("suggestions", [])
+    
+    def _fetch_external(self, query: str) -> List[str]:
+        ctx = self.external_rag.get_context(query, max_results=5)
+        return ctx.get("suggestions", [])
+    
+    def _fetch_mock(self, plan_type: str, user_input: str) -> Dict[str, Any]:
+        return self.mock_rag.get_rag_context(plan_type, user_input)
+    
+    def _source_tasks(self, plan_type: str, user_input: str, query: str) -> Dict[str, Callable[[], Any]]:
+        """조회할 소스 이름 → 호출 함수"""
+        tasks: Dict[str, Callable[[], Any]] = {}
+        if self.local_rag:
+            tasks["internal"] = lambda: self._fetch_internal(query)
+        if self.external_rag:
+            tasks["external"] = lambda: self._fetch_external(query)
+        tasks["mock"] = lambda: self._fetch_mock(plan_type, user_input)
+        return tasks
+    
+    @staticmethod
+    def _timed(task: Callable[[], Any]) -> Tuple[Any, float]:
+        """소스 조회 실행 후 (결과, 소요 ms) 반환"""
+        started = time.monotonic()
+        result = task()
+        return result, round((time.monotonic() - started) * 1000, 1)
+    
+    def _run_sequential(self, tasks: Dict[str, Callable[[], Any]]) -> Tuple[Dict[str, Any], List[str], Dict[str, float]]:
+        results: Dict[str, Any] = {}
+        latency_ms: Dict[str, float] = {}
+        for name, task in tasks.items():
+            try:
+                results[name], latency_ms[name] = self._timed(task)
+            except Exception as e:
+                print(f"[RAGStore] {name} RAG 오류: {e}")
+        return results, [], latency_ms
+    
+    @staticmethod
+    def _timed_started(task: Callable[[], Any], started: List[float], started_event: threading.Event) -> Tuple[Any, float]:
+        """풀에서 실행될 때 시작 시각을 기록한 뒤 _timed 실행"""
+        started.append(time.monotonic())
+        started_event.set()
+        return RAGStore._timed(task)
+    
+    def _run_parallel(self, tasks: Dict[str, Callable[[], Any]]) -> Tuple[Dict[str, Any], List[str], Dict[str, float]]:
+        """
+        internal/external 은 소스별 풀에 제출, mock 등 나머지는 호출 스레드에서 실행.
+        소스별 마감 시각 = 작업 시작 시각 + 소스 제한 시간 (전체 예산 마감을 넘지 않음)
+        """
+        submitted = time.monotonic()
+        budget_deadline = submitted + self.latency_budget
+        runs: Dict[str, Tuple[Any, List[float], threading.Event]] = {}
+        for name, task in tasks.items():
+            executor = self._executors.get(name)
+            if executor is None:
+                continue
+            started: List[float] = []
+            started_event = threading.Event()
+            runs[name] = (executor.submit(self._timed_started, task, started, started_event), started, started_event)
+        
+        results: Dict[str, Any] = {}
+        timed_out: List[str] = []
+        latency_ms: Dict[str, float] = {}
+        # 프로세스 내 조회(mock)는 풀 대기 없이 바로 실행
+        for name, task in tasks.items():
+            if name in runs:
+                continue
+            try:
+                results[name], latency_ms[name] = self._timed(task)
+            except Exception as e:
+                print(f"[RAGStore] {name} RAG 오류: {e}")
+        
+        for name, (future, started, started_event) in runs.items():
+            try:
+                # 풀에서 시작되기를 전체 예산 안에서 기다린 뒤, 시작 시각부터 소스 제한 시간 적용
+                if not started_event.wait(timeout=max(0.0, budget_deadline - time.monotonic())):
+                    raise FutureTimeoutError()
+                deadline = min(started[0] + self.source_timeouts.get(name, self.latency_budget), budget_deadline)
+                results[name], latency_ms[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                future.cancel()
+                timed_out.append(name)
+                print(f"[RAGStore] {name} RAG 시간 초과 ({time.monotonic() - submitted:.1f}초) — 결과 제외")
+            except Exception as e:
+                print(f"[RAGStore] {name} RAG 오류: {e}")
+        return results, timed_out, latency_ms
+    
     def get_context(self, plan_type: str, user_input: str) -> Dict[str, Any]:
         """
         외부 + 내부 RAG를 모두 조회해 하나의 RAG 컨텍스트로 합침.
@@ -150,38 +267,19 @@ class RAGStore:
             return self.mock_rag.get_rag_context(plan_type, user_input)
         
         query = user_input.strip()
-        all_suggestions: List[Any] = []
-        internal_suggestions: List[str] = []
-        external_suggestions: List[str] = []
+        tasks = self._source_tasks(plan_type, user_input, query)
+        if self.parallel:
+            results, timed_out, latency_ms = self._run_parallel(tasks)
+        else:
+            results, timed_out, latency_ms = self._run_sequential(tasks)
         
         # 1) 내부(로컬) RAG
-        if self.local_rag:
-            try:
-                ctx = self.local_rag.get_context(query, top_k=5)
-                internal_suggestions = ctx.get("suggestions", [])
-                for s in internal_suggestions:
-                    all_suggestions.append({"source": "internal", "text": s[:500]})
-            except Exception as e:
-                print(f"[RAGStore] 내부 RAG 오류: {e}")
-        
+        internal_suggestions: List[str] = results.get("internal") or []
         # 2) 외부(인터넷) RAG
-        if self.external_rag:
-            try:
-                ctx = self.external_rag.get_context(query, max_results=5)
-                external_suggestions = ctx.get("suggestions", [])
-                for s in external_suggestions:
-                    all_suggestions.append({"source": "external", "text": s[:500]})
-            except Exception as e:
-                print(f"[RAGStore] 외부 RAG 오류: {e}")
-        
+        external_suggestions: List[str] = results.get("external") or []
         # 3) Mock RAG (패션 키워드 보강)
-        mock_ctx = self.mock_rag.get_rag_context(plan_type, user_input)
+        mock_ctx = results.get("mock") or {"rag_suggestions": [], "confidence": 0.0}
         mock_suggestions = mock_ctx.get("rag_suggestions", [])
-        for s in mock_suggestions:
-            if isinstance(s, dict):
-                all_suggestions.append({"source": "mock", "text": str(s.get("value", s))[:300]})
-            else:
-                all_suggestions.append({"source": "mock", "text": str(s)[:300]})
         
         # F.LLM / Agent 2 에서 쓰는 형식 (문자열 목록)
         mock_str = [str(s.get("value", s))[:300] if isinstance(s, dict) else str(s)[:300] for s in mock_suggestions]
@@ -192,5 +290,6 @@ class RAGStore:
             "rag_external": external_suggestions[:5],
             "rag_mock": mock_ctx,
             "confidence": mock_ctx.get("confidence", 0.0),
+            "rag_timed_out": timed_out,
+            "rag_latency_ms": latency_ms,
         }
-
@@ -0,0 +1,169 @@
+"""
+RAG 질의 결과 캐시 — TTL + LRU (+ 선택적 SQLite 영구 저장)
+
+- 메모리: 정규화된 질의 키 → (만료 시각, 결과), 최대 개수 초과 시 가장 오래 안 쓴 항목부터 제거
+- SQLite(선택): 재시작 후에도 유효한 결과 재사용
+- 동일 키 동시 조회는 한 번만 실행하고 나머지는 결과를 기다림 (single-flight)
+"""
+
+from typing import Any, Callable, Dict, Optional
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """캐시 키용 질의 정규화 (NFKC, 소문자, 공백 정리)"""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFKC", query or "").lower()).strip()
+
+
+class QueryCache:
+    """
+    TTL + LRU 질의 결과 캐시
+
+    Args:
+        ttl: 결과 유효 시간 (초)
+        max_size: 메모리에 보관할 최대 항목 수
+        db_path: SQLite 파일 경로 (None이면 메모리 캐시만 사용)
+    """
+
+    def __init__(self, ttl: float = 600.0, max_size: int = 256, db_path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str) -> None:
+        try:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS query_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            db.execute("DELETE FROM query_cache WHERE expires_at < ?", (time.time(),))
+            db.commit()
+            self._db = db
+        except sqlite3.Error as e:
+            print(f"[QueryCache] SQLite 캐시 비활성화 ({db_path}): {e}")
+            self._db = None
+
+    def get(self, key: str) -> Optional[Any]:
+        """유효한 캐시 결과 반환 (없거나 만료되면 None)"""
+        now = time.time()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > now:
+                    self._items.move_to_end(key)
+                    return value
+                del self._items[key]
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM query_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"[QueryCache] SQLite 조회 실패: {e}")
+            return None
+        if row is None or row[1] <= now:
+            return None
+        value = json.loads(row[0])
+        self._remember(key, value, row[1])
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at),
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"[QueryCache] SQLite 저장 실패: {e}")
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._items[key] = (expires_at, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        should_cache: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """
+        캐시 조회 후 없으면 compute() 실행
+
+        같은 키로 이미 실행 중인 조회가 있으면 새로 실행하지 않고 그 결과를 기다림
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = Future()
+                self._inflight[key] = flight
+        if not leader:
+            self.coalesced += 1
+            return flight.result()
+        try:
+            # 선행 조회가 방금 끝나 캐시에 들어갔을 수 있음
+            value = self.get(key)
+            if value is None:
+                self.misses += 1
+                value = compute()
+                if should_cache(value):
+                    self.set(key, value)
+            else:
+                self.hits += 1
+            flight.set_result(value)
+            return value
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._items)
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "persistent": self._db is not None,
+        }
@@ -0,0 +1,205 @@
+"""
+내부 RAG 컬럼형 청크 저장소 — 메모리 매핑 UTF-8 블롭 + 오프셋/출처 배열
+
+청크마다 dict/str 객체를 두지 않고, 모든 청크 텍스트를 하나의 UTF-8 블롭에 이어 붙이고
+offsets(uint64) · source_ids(uint32) 배열로 위치를 찾음.
+저장소 파일은 읽기 전용으로 매핑되므로 같은 파일을 여는 uvicorn 워커들이 페이지 캐시를 공유.
+
+저장소 파일 형식 (네이티브 바이트 순서, 섹션은 8바이트 정렬):
+    magic(4) | byteorder(4) | n_chunks, sources_len, text_len, lower_len (uint64 x4)
+    | offsets (uint64 x n+1) | lower_offsets (uint64 x n+1) | source_ids (uint32 x n)
+    | sources JSON | 원문 텍스트 | 소문자 텍스트
+"""
+
+from typing import Dict, List, Any, Optional
+from array import array
+from pathlib import Path
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+
+_MAGIC = b"LRC1"
+_BYTEORDER = b"LE\0\0" if sys.byteorder == "little" else b"BE\0\0"
+_HEADER = struct.Struct("=QQQQ")
+_HEADER_SIZE = 8 + _HEADER.size
+
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class ChunkStore:
+    """
+    읽기 전용 컬럼형 청크 저장소
+
+    매핑된 영역 위의 memoryview(cast)로 배열에 접근하므로 청크 수와 무관하게
+    프로세스별 파이썬 객체가 생기지 않음. add()로 추가한 청크는 프로세스 로컬 꼬리 영역에 보관.
+    """
+
+    def __init__(self, buf: Any, path: Optional[Path] = None):
+        self.path = path
+        self._buf = buf
+        self._view = view = memoryview(buf)
+        n, sources_len, text_len, lower_len = _HEADER.unpack_from(buf, 8)
+        pos = _HEADER_SIZE
+        self._offsets = view[pos:pos + 8 * (n + 1)].cast("Q")
+        pos += 8 * (n + 1)
+        self._lower_offsets = view[pos:pos + 8 * (n + 1)].cast("Q")
+        pos += 8 * (n + 1)
+        self._source_ids = view[pos:pos + 4 * n].cast("I")
+        pos = _align8(pos + 4 * n)
+        self._sources: List[str] = json.loads(bytes(view[pos:pos + sources_len]).decode("utf-8"))
+        pos = _align8(pos + sources_len)
+        self._text = view[pos:pos + text_len]
+        pos += text_len
+        self._lower = view[pos:pos + lower_len]
+        self._base_len = n
+        # add_document 등 런타임 추가분 (매핑 영역은 읽기 전용)
+        self._tail: List[Dict[str, str]] = []
+
+    @classmethod
+    def open(cls, path: Path) -> Optional["ChunkStore"]:
+        """저장소 파일을 읽기 전용으로 매핑 (형식이 다르면 None)"""
+        try:
+            with open(path, "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if buf[:4] != _MAGIC or buf[4:8] != _BYTEORDER:
+            buf.close()
+            return None
+        return cls(buf, path)
+
+    def __len__(self) -> int:
+        return self._base_len + len(self._tail)
+
+    def text(self, chunk_id: int) -> str:
+        if chunk_id >= self._base_len:
+            return self._tail[chunk_id - self._base_len]["text"]
+        return str(self._text[self._offsets[chunk_id]:self._offsets[chunk_id + 1]], "utf-8")
+
+    def lower(self, chunk_id: int) -> str:
+        if chunk_id >= self._base_len:
+            return self._tail[chunk_id - self._base_len]["lower"]
+        return str(self._lower[self._lower_offsets[chunk_id]:self._lower_offsets[chunk_id + 1]], "utf-8")
+
+    def source(self, chunk_id: int) -> str:
+        if chunk_id >= self._base_len:
+            return self._tail[chunk_id - self._base_len]["source"]
+        return self._sources[self._source_ids[chunk_id]]
+
+    def chunk(self, chunk_id: int) -> Dict[str, Any]:
+        """검색 결과용 청크 dict (요청 시에만 생성)"""
+        return {
+            "text": self.text(chunk_id),
+            "source": self.source(chunk_id),
+            "chunk_id": chunk_id,
+        }
+
+    def add(self, text: str, source: str) -> int:
+        """프로세스 로컬 청크 추가 후 chunk_id 반환"""
+        self._tail.append({"text": text, "lower": text.lower(), "source": source})
+        return len(self) - 1
+
+    def close(self) -> None:
+        """매핑 해제 (이후 접근 불가)"""
+        for view in (self._offsets, self._lower_offsets, self._source_ids, self._text, self._lower, self._view):
+            view.release()
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+
+
+class ChunkStoreBuilder:
+    """
+    청크를 순서대로 받아 저장소 파일(또는 메모리 버퍼)을 만듦
+
+    path가 있으면 텍스트를 임시 파일로 흘려 쓰고 finish()에서 합쳐 원자적으로 교체,
+    없으면 메모리에서 조립 (디스크 색인 비활성화 시)
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self._offsets = array("Q", [0])
+        self._lower_offsets = array("Q", [0])
+        self._source_ids = array("I")
+        self._sources: List[str] = []
+        self._source_index: Dict[str, int] = {}
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._text_tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.text.tmp")
+            self._lower_tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.lower.tmp")
+            self._text_out = open(self._text_tmp, "wb")
+            self._lower_out = open(self._lower_tmp, "wb")
+        else:
+            self._text_out = None
+            self._lower_out = None
+            self._text_buf = bytearray()
+            self._lower_buf = bytearray()
+
+    def add(self, text_bytes: bytes, lower_bytes: bytes, source: str) -> None:
+        sid = self._source_index.get(source)
+        if sid is None:
+            sid = len(self._sources)
+            self._sources.append(source)
+            self._source_index[source] = sid
+        if self._text_out is not None:
+            self._text_out.write(text_bytes)
+            self._lower_out.write(lower_bytes)
+        else:
+            self._text_buf += text_bytes
+            self._lower_buf += lower_bytes
+        self._offsets.append(self._offsets[-1] + len(text_bytes))
+        self._lower_offsets.append(self._lower_offsets[-1] + len(lower_bytes))
+        self._source_ids.append(sid)
+
+    def _header_bytes(self) -> bytes:
+        n = len(self._source_ids)
+        sources_b = json.dumps(self._sources, ensure_ascii=False).encode("utf-8")
+        out = bytearray(_MAGIC + _BYTEORDER)
+        out += _HEADER.pack(n, len(sources_b), self._offsets[-1], self._lower_offsets[-1])
+        out += self._offsets.tobytes()
+        out += self._lower_offsets.tobytes()
+        out += self._source_ids.tobytes()
+        out += b"\0" * (_align8(len(out)) - len(out))
+        out += sources_b
+        out += b"\0" * (_align8(len(out)) - len(out))
+        return bytes(out)
+
+    def finish(self) -> ChunkStore:
+        header = self._header_bytes()
+        if self.path is None:
+            return ChunkStore(header + bytes(self._text_buf) + bytes(self._lower_buf))
+        self._text_out.close()
+        self._lower_out.close()
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as out:
+                out.write(header)
+                for part in (self._text_tmp, self._lower_tmp):
+                    with open(part, "rb") as f:
+                        shutil.copyfileobj(f, out, 1 << 20)
+            os.replace(tmp_path, self.path)
+        finally:
+            for part in (self._text_tmp, self._lower_tmp):
+                try:
+                    part.unlink()
+                except OSError:
+                    pass
+        store = ChunkStore.open(self.path)
+        if store is None:
+            raise OSError(f"청크 저장소를 열 수 없습니다: {self.path}")
+        return store
+
+    def abort(self) -> None:
+        """작성 중단 (임시 파일 삭제)"""
+        if self.path is None:
+            return
+        for out, part in ((self._text_out, self._text_tmp), (self._lower_out, self._lower_tmp)):
+            out.close()
+            try:
+                part.unlink()
+            except OSError:
+                pass
@@ -3,11 +3,14 @@
 
 API 키 없이 사용 가능: duckduckgo-search (pip install duckduckgo-search)
 선택: SERPER_API_KEY 있으면 Serper(Google) 검색 사용
+선택: EXTERNAL_RAG_CACHE_DB 경로를 지정하면 검색 결과 캐시를 SQLite에 저장 (재시작 후 재사용)
 """
 
 from typing import Dict, List, Any, Optional
 import os
 
+from .rag_cache import QueryCache, normalize_query
+
 # duckduckgo-search (선택, pip install duckduckgo-search)
 try:
     from duckduckgo_search import DDGS
@@ -19,27 +22,48 @@ except ImportError:
 class ExternalRAG:
     """
     외부(인터넷) RAG: 웹 검색으로 사용자 질의와 관련된 정보 조회
+
+    같은 질문(정규화 기준)은 cache_ttl 동안 캐시된 결과를 재사용하고,
+    동시에 들어온 동일 질의는 HTTP 호출 한 번으로 합침
     """
-    def __init__(self, max_results: int = 5):
+    def __init__(
+        self,
+        max_results: int = 5,
+        cache_ttl: float = 600.0,
+        cache_size: int = 256,
+        cache_db: Optional[str] = None,
+    ):
         self.max_results = max_results
         self._serper_key = (os.environ.get("SERPER_API_KEY") or "").strip()
+        db_path = cache_db or (os.environ.get("EXTERNAL_RAG_CACHE_DB") or "").strip() or None
+        self.cache = QueryCache(ttl=cache_ttl, max_size=cache_size, db_path=db_path) if cache_ttl > 0 else None
 
     def search(self, query: str, max_results: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        쿼리로 웹 검색 후 스니펫·제목·URL 목록 반환
+        쿼리로 웹 검색 후 스니펫·제목·URL 목록 반환 (캐시 우선)
         """
         k = max_results or self.max_results
+        if not query or self.cache is None:
+            return self._search_web(query, k)
+        key = f"{k}:{normalize_query(query)}"
+        # 빈 결과(검색 실패 포함)는 캐시하지 않음
+        return list(self.cache.get_or_compute(key, lambda: self._search_web(query, k)))
+
+    def _search_web(self, query: str, k: int) -> List[Dict[str, Any]]:
+        """Serper → DuckDuckGo 순서로 실제 웹 검색"""
         results: List[Dict[str, Any]] = []
 
         # 1) Serper API (Google 검색, API 키 필요)
         if self._serper_key and query:
             try:
-                import requests
-                r = requests.post(
+                from ..utils.http_client import get_http_client
+                r = get_http_client().post(
                     "https://google.serper.dev/search",
                     headers={"X-API-KEY": self._serper_key, "Content-Type": "application/json"},
                     json={"q": query, "num": k},
                     timeout=8,
+                    retries=1,
+                    idempotent=True,  # 검색 조회 — 다시 보내도 안전
                 )
                 if r.status_code == 200:
                     data = r.json()
@@ -0,0 +1,136 @@
+"""
+내부 RAG 역색인 — BM25 기반 청크 검색
+
+용어(term) → 포스팅 리스트(청크 id, 빈도) 역색인을 유지하고,
+질의 용어의 포스팅만 조회해 BM25 점수를 계산 (코퍼스 크기가 아닌 매칭 청크 수에 비례)
+"""
+
+from typing import Dict, List, Tuple, Iterable, Sequence
+from bisect import bisect_left
+import math
+import re
+
+_TOKEN_RE = re.compile(r"\w+")
+_MIN_TOKEN_LEN = 2
+# 한국어 조사/어미 대응: 질의어로 시작하는 용어까지 확장 (예: "후드티" → "후드티를")
+_MAX_PREFIX_EXPANSION = 32
+
+
+def tokenize(text: str) -> List[str]:
+    """소문자화 후 단어 단위 토큰화 (2자 미만 제외)"""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) >= _MIN_TOKEN_LEN]
+
+
+class InvertedIndex:
+    """
+    BM25 역색인
+
+    - postings: term → [(chunk_id, tf), ...]
+    - doc_len: 청크별 토큰 수 (길이 정규화용)
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_len: List[int] = []
+        self._total_len = 0
+        self._vocab: List[str] = []  # 접두어 확장용 정렬된 용어 목록 (지연 생성)
+        self._vocab_dirty = False
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def add(self, chunk_id: int, tokens: Iterable[str]) -> None:
+        """청크 한 건 색인 (chunk_id는 0부터 연속 증가해야 함)"""
+        tf: Dict[str, int] = {}
+        n = 0
+        for t in tokens:
+            tf[t] = tf.get(t, 0) + 1
+            n += 1
+        while len(self.doc_len) <= chunk_id:
+            self.doc_len.append(0)
+        self.doc_len[chunk_id] = n
+        self._total_len += n
+        for term, freq in tf.items():
+            plist = self.postings.get(term)
+            if plist is None:
+                self.postings[term] = [(chunk_id, freq)]
+                self._vocab_dirty = True
+            else:
+                plist.append((chunk_id, freq))
+
+    def add_postings(
+        self,
+        postings: Iterable[Tuple[str, Sequence[int]]],
+        doc_len: Sequence[int],
+        id_map: Sequence[int],
+    ) -> None:
+        """
+        디스크 세그먼트의 포스팅 병합 (토큰화 생략)
+
+        postings: (term, [local_id, tf, local_id, tf, ...]) 쌍
+        id_map: local_id → 전역 chunk_id (-1이면 제외)
+        """
+        for local_id, chunk_id in enumerate(id_map):
+            if chunk_id < 0:
+                continue
+            while len(self.doc_len) <= chunk_id:
+                self.doc_len.append(0)
+            self.doc_len[chunk_id] = doc_len[local_id]
+            self._total_len += doc_len[local_id]
+        for term, flat in postings:
+            entries = [
+                (id_map[flat[i]], flat[i + 1])
+                for i in range(0, len(flat), 2)
+                if id_map[flat[i]] >= 0
+            ]
+            if not entries:
+                continue
+            plist = self.postings.get(term)
+            if plist is None:
+                self.postings[term] = entries
+                self._vocab_dirty = True
+            else:
+                plist.extend(entries)
+
+    def _expand(self, term: str) -> List[str]:
+        """질의어와 일치하거나 질의어로 시작하는 색인 용어 목록"""
+        if self._vocab_dirty or (not self._vocab and self.postings):
+            self._vocab = sorted(self.postings)
+            self._vocab_dirty = False
+        terms = []
+        i = bisect_left(self._vocab, term)
+        while i < len(self._vocab) and len(terms) < _MAX_PREFIX_EXPANSION:
+            cand = self._vocab[i]
+            if not cand.startswith(term):
+                break
+            terms.append(cand)
+            i += 1
+        return terms
+
+    def score(self, query_terms: Iterable[str]) -> Dict[int, float]:
+        """
+        질의 용어별 BM25 점수 합산
+
+        접두어 확장된 용어들 중 청크마다 가장 높은 점수 하나만 반영
+        """
+        n_docs = len(self.doc_len)
+        if not n_docs:
+            return {}
+        avgdl = (self._total_len / n_docs) or 1.0
+        scores: Dict[int, float] = {}
+        for q in set(query_terms):
+            best: Dict[int, float] = {}
+            for term in self._expand(q):
+                plist = self.postings[term]
+                df = len(plist)
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                for chunk_id, tf in plist:
+                    norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[chunk_id] / avgdl)
+                    s = idf * tf * (self.k1 + 1.0) / (tf + norm)
+                    if s > best.get(chunk_id, 0.0):
+                        best[chunk_id] = s
+            for chunk_id, s in best.items():
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + s
+        return scores
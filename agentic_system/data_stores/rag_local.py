@@ -1,19 +1,26 @@
 """
 내부 RAG — 임시 로컬 문서 기반 검색
 
-지정 디렉터리의 .txt, .md 파일을 로드해 청크 단위로 보관하고,
-사용자 질의와 키워드/문자열 매칭으로 관련 문단 검색
+지정 디렉터리의 .txt, .md 파일을 로드해 청크 단위로 (메모리 매핑 컬럼형 저장소에) 보관하고,
+역색인(BM25)으로 사용자 질의와 관련된 문단 검색
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
-import re
+import hashlib
+import heapq
+
+from .rag_chunk_store import ChunkStore, ChunkStoreBuilder
+from .rag_index import InvertedIndex, tokenize
+from .rag_segment import SegmentStore, is_prunable
 
 # 기본 로컬 문서 디렉터리 (프로젝트 내)
 _AGENTIC_ROOT = Path(__file__).resolve().parent.parent
 _DEFAULT_DOCS_DIR = _AGENTIC_ROOT.parent / "doc"  # 프로젝트 루트 doc
 _LOCAL_RAG_DIR = _AGENTIC_ROOT / "data" / "local_rag_docs"  # agentic_system/data/local_rag_docs
 _RAG_FASHION_1GB_DIR = _AGENTIC_ROOT / "data" / "rag_fashion_1gb"  # 패션 RAG 1GB 수집 폴더
+_INDEX_DIR = _AGENTIC_ROOT / "data" / "local_rag_index"  # 청크·색인 세그먼트, 청크 저장소 (자동 생성)
+_MAX_STORE_REBUILDS = 1  # 청크 저장소 불일치 시 디스크 재생성 횟수 (초과 시 메모리 저장소 사용)
 
 
 def _chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
@@ -43,16 +50,26 @@ class LocalRAG:
     """
     내부(임시 로컬) RAG: 로컬 디렉터리의 문서를 로드해 검색
     """
-    def __init__(self, docs_dir: Optional[Path] = None, chunk_size: int = 500):
+    def __init__(
+        self,
+        docs_dir: Optional[Path] = None,
+        chunk_size: int = 500,
+        index_dir: Optional[Path] = None,
+        persist_index: bool = True,
+    ):
         self.docs_dir = Path(docs_dir) if docs_dir else _LOCAL_RAG_DIR
         self.chunk_size = chunk_size
-        self._chunks: List[Dict[str, Any]] = []  # { "text", "source", "chunk_id" }
+        # 디스크 세그먼트: 변경되지 않은 파일은 재청크화 없이 매핑해 로드
+        self._index_dir = Path(index_dir) if index_dir else _INDEX_DIR
+        self._segments = SegmentStore(self._index_dir) if persist_index else None
+        # 청크 본문: 메모리 매핑된 컬럼형 저장소 (워커 간 페이지 공유)
+        self._store: Optional[ChunkStore] = None
+        self._index = InvertedIndex()
         self._load_documents()
 
-    def _load_documents(self) -> None:
-        """docs_dir, rag_fashion_1gb, 프로젝트 doc 폴더에서 .txt, .md 로드 후 청크화"""
-        self._chunks = []
-        seen = set()
+    def _scan_files(self) -> List[Tuple[Path, str]]:
+        """docs_dir, rag_fashion_1gb, 프로젝트 doc 폴더의 (.txt/.md 경로, 출처 이름) 목록"""
+        files = []
         for base_dir in (self.docs_dir, _RAG_FASHION_1GB_DIR, _DEFAULT_DOCS_DIR):
             if not base_dir.exists():
                 continue
@@ -61,60 +78,150 @@ class LocalRAG:
                     continue
                 if path.suffix.lower() not in (".txt", ".md"):
                     continue
+                try:
+                    source = str(path.relative_to(base_dir))
+                except ValueError:
+                    source = path.name
+                files.append((path, source))
+        return files
+
+    def _store_path(self, files: List[Tuple[Path, str]]) -> Path:
+        """파일 목록·mtime·크기로 결정되는 청크 저장소 경로 (같은 코퍼스면 워커끼리 같은 파일)"""
+        h = hashlib.sha1(f"v1:{self.chunk_size}".encode("utf-8"))
+        for path, source in files:
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            h.update(f"\0{path.resolve()}\0{source}\0{st.st_mtime_ns}\0{st.st_size}".encode("utf-8"))
+        return self._index_dir / f"chunks-{h.hexdigest()[:16]}.bin"
+
+    def _load_documents(self, rebuilds: int = 0) -> None:
+        """
+        docs_dir, rag_fashion_1gb, 프로젝트 doc 폴더에서 .txt, .md 로드 후 청크화·색인
+
+        rebuilds: 청크 저장소 불일치로 다시 로드한 횟수 (_MAX_STORE_REBUILDS 초과 시 메모리 저장소)
+        """
+        files = self._scan_files()
+        in_memory = self._segments is None or rebuilds > _MAX_STORE_REBUILDS
+        store_path = self._store_path(files) if not in_memory else None
+        store = ChunkStore.open(store_path) if store_path is not None and store_path.exists() else None
+        # 저장소가 이미 있으면 (다른 워커가 만들었거나 이전 실행) 본문은 복사하지 않고 색인만 구성
+        builder = ChunkStoreBuilder(store_path) if store is None else None
+        self._index = InvertedIndex()
+        seen = set()
+        n_chunks = 0
+        reused = 0
+        try:
+            for path, source in files:
+                segment = self._segments.load(path, self.chunk_size) if self._segments is not None else None
+                if segment is not None:
+                    id_map = []
+                    for i in range(len(segment)):
+                        key = (source, i)
+                        if key in seen:
+                            id_map.append(-1)
+                            continue
+                        seen.add(key)
+                        if builder is not None:
+                            raw = segment.raw(i)
+                            builder.add(raw, raw.decode("utf-8").lower().encode("utf-8"), source)
+                        id_map.append(n_chunks)
+                        n_chunks += 1
+                    self._index.add_postings(segment.iter_postings(), segment.doc_len, id_map)
+                    segment.close()
+                    reused += 1
+                    continue
                 try:
                     text = path.read_text(encoding="utf-8", errors="ignore")
                 except Exception as e:
                     print(f"[LocalRAG] 파일 읽기 실패 {path}: {e}")
                     continue
-                try:
-                    source = str(path.relative_to(base_dir))
-                except ValueError:
-                    source = path.name
-                for i, chunk in enumerate(_chunk_text(text, self.chunk_size)):
+                chunks = _chunk_text(text, self.chunk_size)
+                token_lists = [tokenize(c) for c in chunks]
+                if self._segments is not None:
+                    try:
+                        self._segments.save(path, source, self.chunk_size, chunks, token_lists)
+                    except OSError as e:
+                        print(f"[LocalRAG] 세그먼트 저장 실패 {path}: {e}")
+                for i, chunk in enumerate(chunks):
                     key = (source, i)
                     if key in seen:
                         continue
                     seen.add(key)
-                    self._chunks.append({
-                        "text": chunk,
-                        "source": source,
-                        "chunk_id": len(self._chunks),
-                    })
-        print(f"[LocalRAG] 로드된 청크 수: {len(self._chunks)} (디렉터리: {self.docs_dir}, {_RAG_FASHION_1GB_DIR}, {_DEFAULT_DOCS_DIR})")
+                    if builder is not None:
+                        builder.add(chunk.encode("utf-8"), chunk.lower().encode("utf-8"), source)
+                    self._index.add(n_chunks, token_lists[i])
+                    n_chunks += 1
+            if builder is not None:
+                store = builder.finish()
+        except BaseException:
+            if builder is not None:
+                builder.abort()
+            raise
+        stored = len(store)
+        if stored != n_chunks:
+            # 저장소 생성 이후 파일 읽기 결과가 달라진 경우: 저장소를 버리고 다시 만듦
+            # (다른 워커가 계속 다른 저장소를 만들면 한 번만 재시도 후 메모리 저장소로 대체)
+            store.close()
+            try:
+                store_path.unlink()
+            except OSError:
+                pass
+            if rebuilds < _MAX_STORE_REBUILDS:
+                print(f"[LocalRAG] 청크 저장소 불일치 ({stored} != {n_chunks}), 재생성합니다.")
+            else:
+                print(f"[LocalRAG] 경고: 청크 저장소 재생성 후에도 불일치 ({stored} != {n_chunks}), 메모리 저장소를 사용합니다.")
+            return self._load_documents(rebuilds + 1)
+        if self._store is not None:
+            self._store.close()
+        self._store = store
+        if self._segments is not None:
+            self._segments.prune([p for p, _ in files])
+            if store_path is not None:
+                self._prune_stores(store_path)
+        print(f"[LocalRAG] 로드된 청크 수: {n_chunks} (파일 {len(files)}개 중 {reused}개 세그먼트 재사용, 디렉터리: {self.docs_dir}, {_RAG_FASHION_1GB_DIR}, {_DEFAULT_DOCS_DIR})")
+
+    def _prune_stores(self, keep: Path) -> None:
+        """
+        현재 코퍼스와 맞지 않는 이전 청크 저장소 삭제
+
+        다른 워커가 아직 이전 코퍼스로 매핑 중이거나 열려는 중일 수 있으므로
+        유예 시간(LOCAL_RAG_PRUNE_GRACE_SEC)이 지난 파일만 삭제
+        """
+        for old in self._index_dir.glob("chunks-*.bin"):
+            if old.name == keep.name or not is_prunable(old):
+                continue
+            try:
+                old.unlink()
+            except OSError:
+                pass
 
     def add_document(self, text: str, source: str = "user") -> None:
-        """문서 한 건 추가 (임시 로컬 확장용)"""
-        for i, chunk in enumerate(_chunk_text(text, self.chunk_size)):
-            self._chunks.append({
-                "text": chunk,
-                "source": source,
-                "chunk_id": len(self._chunks),
-            })
+        """문서 한 건 추가 (임시 로컬 확장용, 디스크 세그먼트에는 저장하지 않음)"""
+        for chunk in _chunk_text(text, self.chunk_size):
+            chunk_id = self._store.add(chunk, source)
+            self._index.add(chunk_id, tokenize(self._store.lower(chunk_id)))
 
     def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """
-        키워드/문자열 매칭으로 관련 청크 반환
+        역색인 BM25 점수로 관련 청크 반환
+
+        질의 용어의 포스팅에 등장하는 청크만 점수를 계산하고,
+        질의 전체 문자열이 그대로 포함된 청크에는 구문 일치 보너스를 더함
         """
-        if not query or not self._chunks:
+        if not query or not self._store:
             return []
         q_lower = query.lower()
-        q_words = set(re.findall(r"\w+", q_lower))
-        scored = []
-        for c in self._chunks:
-            text = c["text"]
-            t_lower = text.lower()
-            score = 0.0
-            if q_lower in t_lower:
-                score += 2.0
-            for w in q_words:
-                if len(w) < 2:
-                    continue
-                if w in t_lower:
-                    score += 1.0
-            if score > 0:
-                scored.append((score, c))
-        scored.sort(key=lambda x: -x[0])
-        return [c for _, c in scored[:top_k]]
+        scores = self._index.score(tokenize(q_lower))
+        if not scores:
+            return []
+        bonus = max(scores.values())
+        for chunk_id in scores:
+            if q_lower in self._store.lower(chunk_id):
+                scores[chunk_id] += bonus
+        ranked = heapq.nlargest(top_k, scores.items(), key=lambda x: x[1])
+        return [self._store.chunk(chunk_id) for chunk_id, _ in ranked]
 
     def get_context(self, query: str, top_k: int = 5) -> Dict[str, Any]:
         """
@@ -131,5 +238,5 @@ class LocalRAG:
         }
 
     def reload(self) -> None:
-        """문서 디렉터리 다시 로드"""
+        """문서 디렉터리 다시 로드 (변경된 파일만 재청크화)"""
         self._load_documents()
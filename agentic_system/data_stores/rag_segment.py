@@ -0,0 +1,226 @@
+"""
+내부 RAG 디스크 세그먼트 — 파일 단위 청크·색인 영구 저장
+
+원본 문서 1개당 세그먼트 파일 1개를 만들고 (경로, mtime, 크기)로 유효성을 판단.
+변경되지 않은 파일은 다시 읽고 청크화하지 않고 세그먼트를 메모리 매핑해 사용.
+
+세그먼트 파일 형식 (little-endian):
+    magic(4) | meta_len, terms_len, n_terms, n_chunks (uint32 x4)
+    | meta JSON | 용어 (UTF-8, NUL 구분) | term_offsets (uint32 x n_terms+1)
+    | pairs (uint32 x term_offsets[-1], local_id·tf 교대) | offsets (uint64 x n+1)
+    | doc_len (uint32 x n) | UTF-8 텍스트
+
+포스팅은 JSON 파싱 없이 배열 복사 한 번으로 읽음. 병합된 역색인(전역 chunk_id, 접두어 어휘)은
+프로세스마다 구성하며, 워커 간에 공유되는 것은 매핑된 본문뿐.
+
+정리(prune)는 PRUNE_GRACE_SEC보다 오래된 파일만 삭제 (다른 워커가 매핑 중이거나 곧 열 파일 보호)
+"""
+
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+from array import array
+from pathlib import Path
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+_MAGIC = b"LRS2"
+_HEADER = struct.Struct("<IIII")
+_FORMAT_VERSION = 2
+# 현재 코퍼스에 없는 세그먼트·청크 저장소도 이 시간(초) 동안은 삭제하지 않음
+PRUNE_GRACE_SEC = float(os.environ.get("LOCAL_RAG_PRUNE_GRACE_SEC", "3600"))
+
+
+def _native_array(typecode: str, data) -> array:
+    """디스크(little-endian) 바이트를 현재 플랫폼 바이트 순서의 array로 변환"""
+    arr = array(typecode)
+    arr.frombytes(data)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+def _le_bytes(arr: array) -> bytes:
+    if sys.byteorder != "little":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def is_prunable(path: Path, grace_sec: float = PRUNE_GRACE_SEC) -> bool:
+    """mtime 기준으로 유예 시간이 지난 파일인지 (stat 실패 시 False)"""
+    try:
+        return time.time() - path.stat().st_mtime >= grace_sec
+    except OSError:
+        return False
+
+
+class Segment:
+    """
+    원본 파일 1개의 청크·색인 (메모리 매핑된 세그먼트 파일)
+
+    - text(i): i번째 청크 텍스트 (매핑된 UTF-8 영역에서 디코딩)
+    - iter_postings(): (term, [local_id, tf, local_id, tf, ...]) (평탄화, 복사 없는 뷰)
+    - doc_len: 청크별 토큰 수
+    """
+
+    def __init__(self, meta: Dict[str, Any], terms: List[str], term_offsets: array,
+                 pairs: array, offsets: array, doc_len: array, buf: Any, text_start: int):
+        self.meta = meta
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.pairs = pairs
+        self.offsets = offsets
+        self.doc_len = doc_len
+        self._buf = buf
+        self._text_start = text_start
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    @property
+    def source(self) -> str:
+        return self.meta["source"]
+
+    def iter_postings(self) -> Iterator[Tuple[str, memoryview]]:
+        view = memoryview(self.pairs)
+        for i, term in enumerate(self.terms):
+            yield term, view[self.term_offsets[i]:self.term_offsets[i + 1]]
+
+    def raw(self, local_id: int) -> bytes:
+        """i번째 청크의 UTF-8 바이트 (디코딩 없이 복사)"""
+        start = self._text_start + self.offsets[local_id]
+        end = self._text_start + self.offsets[local_id + 1]
+        return self._buf[start:end]
+
+    def text(self, local_id: int) -> str:
+        return self.raw(local_id).decode("utf-8")
+
+    def close(self) -> None:
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+
+
+class SegmentStore:
+    """
+    세그먼트 디렉터리 관리: 조회(유효성 검사), 저장(원자적 교체), 정리
+    """
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+
+    def _segment_path(self, path: Path) -> Path:
+        key = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()
+        return self.index_dir / f"{key}.seg"
+
+    @staticmethod
+    def _stat_key(path: Path) -> Tuple[int, int]:
+        st = path.stat()
+        return st.st_mtime_ns, st.st_size
+
+    def load(self, path: Path, chunk_size: int) -> Optional[Segment]:
+        """원본 파일이 바뀌지 않았으면 세그먼트를 매핑해 반환, 아니면 None"""
+        seg_path = self._segment_path(path)
+        if not seg_path.exists():
+            return None
+        try:
+            mtime_ns, size = self._stat_key(path)
+            with open(seg_path, "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if buf[:4] != _MAGIC:
+                buf.close()
+                return None
+            meta_len, terms_len, n_terms, n = _HEADER.unpack_from(buf, 4)
+            pos = 4 + _HEADER.size
+            meta = json.loads(bytes(buf[pos:pos + meta_len]).decode("utf-8"))
+            if (meta.get("version") != _FORMAT_VERSION
+                    or meta.get("path") != str(path.resolve())
+                    or meta.get("mtime_ns") != mtime_ns
+                    or meta.get("size") != size
+                    or meta.get("chunk_size") != chunk_size):
+                buf.close()
+                return None
+            pos += meta_len
+            terms = bytes(buf[pos:pos + terms_len]).decode("utf-8").split("\0") if n_terms else []
+            pos += terms_len
+            term_offsets = _native_array("I", buf[pos:pos + 4 * (n_terms + 1)])
+            pos += 4 * (n_terms + 1)
+            if len(terms) != n_terms or len(term_offsets) != n_terms + 1:
+                raise ValueError("용어 테이블 크기 불일치")
+            pairs = _native_array("I", buf[pos:pos + 4 * term_offsets[-1]])
+            pos += 4 * term_offsets[-1]
+            offsets = _native_array("Q", buf[pos:pos + 8 * (n + 1)])
+            pos += 8 * (n + 1)
+            doc_len = _native_array("I", buf[pos:pos + 4 * n])
+            pos += 4 * n
+            return Segment(meta, terms, term_offsets, pairs, offsets, doc_len, buf, pos)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"[LocalRAG] 세그먼트 로드 실패 {seg_path}: {e}")
+            return None
+
+    def save(self, path: Path, source: str, chunk_size: int,
+             chunks: List[str], token_lists: List[List[str]]) -> None:
+        """청크·토큰으로 세그먼트 파일 작성 (임시 파일 → os.replace)"""
+        mtime_ns, size = self._stat_key(path)
+        meta = {
+            "version": _FORMAT_VERSION,
+            "path": str(path.resolve()),
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "chunk_size": chunk_size,
+            "source": source,
+        }
+        postings: Dict[str, List[int]] = {}
+        doc_len = array("I")
+        for local_id, tokens in enumerate(token_lists):
+            tf: Dict[str, int] = {}
+            for t in tokens:
+                tf[t] = tf.get(t, 0) + 1
+            for term, freq in tf.items():
+                postings.setdefault(term, []).extend((local_id, freq))
+            doc_len.append(len(tokens))
+        encoded = [c.encode("utf-8") for c in chunks]
+        offsets = array("Q", [0])
+        for b in encoded:
+            offsets.append(offsets[-1] + len(b))
+        meta_b = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        terms_b = "\0".join(postings).encode("utf-8")
+        term_offsets = array("I", [0])
+        pairs = array("I")
+        for flat in postings.values():
+            pairs.extend(flat)
+            term_offsets.append(len(pairs))
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        seg_path = self._segment_path(path)
+        tmp_path = seg_path.with_name(f"{seg_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(_HEADER.pack(len(meta_b), len(terms_b), len(postings), len(chunks)))
+            f.write(meta_b)
+            f.write(terms_b)
+            f.write(_le_bytes(term_offsets))
+            f.write(_le_bytes(pairs))
+            f.write(_le_bytes(offsets))
+            f.write(_le_bytes(doc_len))
+            for b in encoded:
+                f.write(b)
+        os.replace(tmp_path, seg_path)
+
+    def prune(self, live_paths: List[Path]) -> int:
+        """더 이상 존재하지 않는 원본 파일의 세그먼트 중 유예 시간이 지난 것만 삭제"""
+        if not self.index_dir.exists():
+            return 0
+        live = {self._segment_path(p).name for p in live_paths}
+        removed = 0
+        for seg_path in self.index_dir.glob("*.seg"):
+            if seg_path.name not in live and is_prunable(seg_path):
+                try:
+                    seg_path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
@@ -3,9 +3,21 @@ Models Module
 모델 통합 모듈
 """
 
-from .internvl2_wrapper import InternVL2Wrapper
+try:
+    from .internvl2_wrapper import InternVL2Wrapper
+except ImportError:
+    # torch·transformers 미설치 환경에서도 배치 큐·취소 토큰·캐시 모듈은 사용 가능
+    InternVL2Wrapper = None
+from .batch_inference import BatchInferenceQueue, InferenceFuture
+from .cancellation import CancellationToken, GenerationCancelled
+from .feature_cache import VisionFeatureCache
 
 __all__ = [
     'InternVL2Wrapper',
+    'BatchInferenceQueue',
+    'InferenceFuture',
+    'CancellationToken',
+    'GenerationCancelled',
+    'VisionFeatureCache',
 ]
 
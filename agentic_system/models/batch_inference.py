@@ -0,0 +1,209 @@
+"""
+InternVL2 배치 추론 큐 — 동적 마이크로 배치
+
+동시에 들어온 계획 생성 요청을 요청마다 스레드를 띄워 모델을 번갈아 쓰지 않고,
+전용 스레드 1개가 모아서 InternVL2Wrapper.batch_chat 한 번으로 처리.
+
+- 첫 요청이 들어온 뒤 max_wait 동안 또는 max_batch_size 개가 모일 때까지 대기 후 실행
+- 생성 설정(generation_config)·이미지 유무·고정 프리픽스가 같은 요청끼리 한 배치로 묶음
+- submit() 은 concurrent.futures.Future 반환 → 배치 실행 전에 cancel() 하면 추론에서 제외,
+  실행 중 cancel() 또는 timeout 초과 시 취소 토큰으로 알려 그 요청(행)만 다음 토큰에서 생성 종료
+  (같은 배치의 다른 요청은 계속 생성, 종료된 요청의 Future 는 GenerationCancelled)
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import Future
+import json
+import queue
+import threading
+import time
+
+from .cancellation import CancellationToken, GenerationCancelled
+
+_STOP = object()
+
+
+class InferenceFuture(Future):
+    """cancel() 이 실행 중인 요청에도 취소 토큰을 전달하는 Future"""
+
+    def __init__(self, token: CancellationToken):
+        super().__init__()
+        self.token = token
+
+    def cancel(self) -> bool:
+        # 실행 중이면 Future 는 취소되지 않지만(False) 생성은 다음 토큰에서 중단됨
+        self.token.cancel()
+        return super().cancel()
+
+
+class _Request:
+    __slots__ = ("prompt", "image_path", "generation_config", "prefix", "future")
+
+    def __init__(
+        self,
+        prompt: str,
+        image_path: Optional[str],
+        generation_config: Dict[str, Any],
+        timeout: Optional[float] = None,
+        prefix: Optional[str] = None
+    ):
+        self.prompt = prompt
+        self.image_path = image_path
+        self.generation_config = generation_config
+        self.prefix = prefix
+        self.future = InferenceFuture(CancellationToken(timeout))
+
+    @property
+    def token(self) -> CancellationToken:
+        return self.future.token
+
+    def group_key(self) -> Tuple[str, bool, Optional[str]]:
+        return (
+            json.dumps(self.generation_config, sort_keys=True, default=str),
+            self.image_path is not None,
+            self.prefix,
+        )
+
+
+class BatchInferenceQueue:
+    """
+    마이크로 배치 추론 큐
+
+    Args:
+        model: batch_chat(texts, image_paths, generation_config, cancel_tokens, prefix) 를 제공하는 모델 래퍼
+        max_batch_size: 한 번에 묶을 최대 요청 수
+        max_wait: 첫 요청 이후 추가 요청을 기다리는 최대 시간 (초)
+    """
+
+    def __init__(self, model: Any, max_batch_size: int = 8, max_wait: float = 0.02):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.cancelled = 0
+        self.largest_batch = 0
+        self._thread = threading.Thread(target=self._run, name="internvl2-batch", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        prompt: str,
+        image_path: Optional[str] = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        prefix: Optional[str] = None
+    ) -> InferenceFuture:
+        """
+        추론 요청 등록 후 Future 반환 (결과는 응답 문자열)
+
+        timeout: 등록 시점부터의 생성 허용 시간 (초) — 초과 시 GenerationCancelled
+        prefix: prompt 가 시작하는 고정 문자열 (모델이 프리픽스 KV 캐시를 재사용)
+        """
+        request = _Request(prompt, image_path, dict(generation_config or {}), timeout, prefix)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("배치 추론 큐가 종료되었습니다")
+            self._queue.put(request)
+        return request.future
+
+    def _collect(self) -> Tuple[List[_Request], bool]:
+        """첫 요청을 기다린 뒤 max_wait 동안 추가 요청 수집 → (배치, 종료 여부)"""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            batch, stop = self._collect()
+            # 실행 전 취소된 요청 제외 (set_running_or_notify_cancel: 취소됐으면 False)
+            live = []
+            for request in batch:
+                if not request.future.set_running_or_notify_cancel():
+                    self.cancelled += 1
+                elif request.token.cancelled:
+                    # 대기 중에 시간 제한이 지남 → 모델을 쓰지 않고 실패 처리
+                    self.cancelled += 1
+                    request.future.set_exception(GenerationCancelled("배치 실행 전에 시간 제한을 초과했습니다"))
+                else:
+                    live.append(request)
+            groups: Dict[Tuple[str, bool, Optional[str]], List[_Request]] = {}
+            for request in live:
+                groups.setdefault(request.group_key(), []).append(request)
+            for group in groups.values():
+                self._run_group(group)
+            if stop:
+                break
+
+    def _run_group(self, group: List[_Request]) -> None:
+        self.batches += 1
+        self.requests += len(group)
+        self.largest_batch = max(self.largest_batch, len(group))
+        try:
+            responses = self.model.batch_chat(
+                [r.prompt for r in group],
+                [r.image_path for r in group],
+                group[0].generation_config,
+                cancel_tokens=[r.token for r in group],
+                prefix=group[0].prefix
+            )
+        except GenerationCancelled as e:
+            self.cancelled += len(group)
+            for request in group:
+                request.future.set_exception(e)
+            return
+        except Exception as e:
+            print(f"[BatchInference] 배치 추론 오류 ({len(group)}건): {e}")
+            for request in group:
+                request.future.set_exception(e)
+            return
+        for request, response in zip(group, responses):
+            if request.token.cancelled:
+                # 생성 도중 개별 종료됐거나 (잘린 응답) 완료 직후 호출 측이 포기함
+                self.cancelled += 1
+                request.future.set_exception(GenerationCancelled("취소 또는 시간 제한 초과"))
+            else:
+                request.future.set_result(response)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._queue.qsize(),
+            "batches": self.batches,
+            "requests": self.requests,
+            "cancelled": self.cancelled,
+            "largest_batch": self.largest_batch,
+            "avg_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """새 요청을 막고 대기 중인 배치를 마친 뒤 스레드 종료 (남은 요청은 실패 처리)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not _STOP and request.future.set_running_or_notify_cancel():
+                request.future.set_exception(RuntimeError("배치 추론 큐가 종료되었습니다"))
@@ -0,0 +1,45 @@
+"""
+LLM 생성 취소 토큰 — 명시적 취소 + 시간 제한(deadline)
+
+InternVL2Wrapper 의 StoppingCriteria 가 디코딩 스텝마다 cancelled 를 확인해
+시간이 지났거나 호출 측이 포기한 요청은 다음 토큰에서 생성을 멈춤.
+"""
+
+from typing import Optional
+import threading
+import time
+
+
+class GenerationCancelled(RuntimeError):
+    """취소 또는 시간 제한 초과로 생성이 중단됨"""
+
+
+class CancellationToken:
+    """
+    생성 취소 토큰
+
+    Args:
+        timeout: 생성 허용 시간 (초, 생략 시 시간 제한 없음)
+    """
+
+    __slots__ = ("_event", "deadline")
+
+    def __init__(self, timeout: Optional[float] = None):
+        self._event = threading.Event()
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """취소됐거나 deadline 이 지났으면 True"""
+        if self._event.is_set():
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        """deadline 까지 남은 시간 (초)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
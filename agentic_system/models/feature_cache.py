@@ -0,0 +1,80 @@
+"""
+InternViT 특징(vision embedding) 캐시 — 이미지 내용 해시 + 타일 설정 기준 LRU
+
+같은 의류 사진으로 analyze_image 작업만 바꾸거나 이어서 질문할 때
+이미지 디코딩·타일 분할·InternViT extract_feature 를 다시 하지 않고
+캐시된 임베딩을 InternVLChatModel.generate(visual_features=...) 로 전달.
+
+임베딩은 모델 디바이스(GPU)에 그대로 보관하므로 전체 바이트 상한으로 관리.
+"""
+
+from typing import Any, Dict, Hashable, Optional
+from collections import OrderedDict
+import os
+import threading
+
+INTERNVL_FEATURE_CACHE_MB = int(os.environ.get("INTERNVL_FEATURE_CACHE_MB", "512"))
+
+
+def _tensor_bytes(tensor: Any) -> int:
+    return tensor.numel() * tensor.element_size()
+
+
+class VisionFeatureCache:
+    """
+    ViT 임베딩 LRU 캐시
+
+    Args:
+        max_bytes: 보관할 임베딩 전체 크기 상한 (0 이면 캐시 안 함)
+    """
+
+    def __init__(self, max_bytes: int = INTERNVL_FEATURE_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            features = self._entries.get(key)
+            if features is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return features
+
+    def put(self, key: Hashable, features: Any) -> None:
+        size = _tensor_bytes(features)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= _tensor_bytes(old)
+            self._entries[key] = features
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _tensor_bytes(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
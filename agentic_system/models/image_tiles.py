@@ -0,0 +1,97 @@
+"""
+InternVL2 동적 타일 전처리 (벡터화)
+
+이미지를 가장 가까운 종횡비 격자(cols × rows, 타일 수 ≤ max_num)로 한 번 리사이즈한 뒤
+- 타일 분할: (H, W, 3) 텐서 reshape/permute 한 번 (타일별 crop 없음)
+- 정규화: 타일 스택 전체에 대해 한 번에 (타일별 T.Compose 없음)
+종횡비 후보 목록은 max_num 별로 한 번만 계산해 재사용.
+"""
+
+from typing import Tuple
+from functools import lru_cache
+
+import numpy as np
+import torch
+from PIL import Image
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+@lru_cache(maxsize=16)
+def target_ratios(min_num: int = 1, max_num: int = 12) -> Tuple[Tuple[int, int], ...]:
+    """타일 수 min_num~max_num 인 (cols, rows) 격자 목록 (타일 수 오름차순)"""
+    ratios = set(
+        (i, j) for n in range(min_num, max_num + 1)
+        for i in range(1, n + 1) for j in range(1, n + 1)
+        if min_num <= i * j <= max_num
+    )
+    return tuple(sorted(ratios, key=lambda x: x[0] * x[1]))
+
+
+def find_closest_aspect_ratio(
+    aspect_ratio: float,
+    ratios: Tuple[Tuple[int, int], ...],
+    width: int,
+    height: int,
+    image_size: int
+) -> Tuple[int, int]:
+    """가장 가까운 종횡비 격자 (같으면 원본 해상도를 더 살리는 큰 격자)"""
+    best_ratio_diff = float('inf')
+    best_ratio = (1, 1)
+    area = width * height
+    for ratio in ratios:
+        ratio_diff = abs(aspect_ratio - ratio[0] / ratio[1])
+        if ratio_diff < best_ratio_diff:
+            best_ratio_diff = ratio_diff
+            best_ratio = ratio
+        elif ratio_diff == best_ratio_diff:
+            if area > 0.5 * image_size * image_size * ratio[0] * ratio[1]:
+                best_ratio = ratio
+    return best_ratio
+
+
+@lru_cache(maxsize=4)
+def _norm_stats(device: str) -> Tuple[torch.Tensor, torch.Tensor]:
+    mean = torch.tensor(IMAGENET_MEAN, device=device).view(1, 3, 1, 1)
+    std = torch.tensor(IMAGENET_STD, device=device).view(1, 3, 1, 1)
+    return mean, std
+
+
+def _to_uint8_tensor(image: Image.Image) -> torch.Tensor:
+    return torch.from_numpy(np.array(image, dtype=np.uint8))
+
+
+def tile_image(
+    image: Image.Image,
+    input_size: int = 448,
+    max_num: int = 12,
+    use_thumbnail: bool = True,
+    min_num: int = 1
+) -> torch.Tensor:
+    """
+    RGB 이미지 → 정규화된 타일 스택
+
+    Returns:
+        torch.Tensor: (타일 수 [+ 썸네일 1], 3, input_size, input_size) float32
+    """
+    width, height = image.size
+    cols, rows = find_closest_aspect_ratio(
+        width / height, target_ratios(min_num, max_num), width, height, input_size
+    )
+    resized = image.resize((input_size * cols, input_size * rows), Image.Resampling.BICUBIC)
+
+    # (rows·S, cols·S, 3) → (rows, S, cols, S, 3) → (rows, cols, 3, S, S) → 행 우선 타일 순서
+    pixels = _to_uint8_tensor(resized)
+    tiles = (
+        pixels.view(rows, input_size, cols, input_size, 3)
+        .permute(0, 2, 4, 1, 3)
+        .reshape(rows * cols, 3, input_size, input_size)
+    )
+    if use_thumbnail and rows * cols != 1:
+        thumbnail = _to_uint8_tensor(image.resize((input_size, input_size), Image.Resampling.BICUBIC))
+        tiles = torch.cat([tiles, thumbnail.permute(2, 0, 1).unsqueeze(0)], dim=0)
+
+    mean, std = _norm_stats(str(tiles.device))
+    return tiles.float().div_(255.0).sub_(mean).div_(std)
+
@@ -4,18 +4,62 @@ InternVL2-8B 모델을 Agentic AI 시스템에 통합하기 위한 래퍼
 """
 
 import torch
-import torchvision.transforms as T
 from PIL import Image
 from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple
+from collections import OrderedDict
+import copy
+import hashlib
+import importlib
 import sys
+import threading
 
 # transformers 임포트
 try:
-    from transformers import AutoModel, AutoTokenizer
+    from transformers import AutoModel, AutoTokenizer, StoppingCriteria, StoppingCriteriaList
 except ImportError:
     raise ImportError("transformers 라이브러리가 필요합니다: pip install transformers")
 
+from .cancellation import CancellationToken, GenerationCancelled
+from .feature_cache import VisionFeatureCache
+from .image_tiles import tile_image
+
+
+class _CancellationCriteria(StoppingCriteria):
+    """
+    디코딩 스텝마다 취소 토큰 확인 — 취소/시간 초과된 요청(행)만 개별 종료
+
+    행별 BoolTensor 반환 (transformers>=4.39): 종료된 행은 pad 로 채워지고
+    같은 배치의 나머지 요청은 계속 생성, 모든 행이 끝나면 generate 종료
+    """
+    
+    def __init__(self, tokens: List[CancellationToken]):
+        self.tokens = tokens
+        self.stopped = False
+    
+    def __call__(self, input_ids, scores, **kwargs) -> torch.BoolTensor:
+        done = torch.tensor([t.cancelled for t in self.tokens], dtype=torch.bool, device=input_ids.device)
+        if done.any():
+            self.stopped = True
+        return done
+    
+    @property
+    def all_cancelled(self) -> bool:
+        return all(t.cancelled for t in self.tokens)
+
+
+def _with_cancellation(
+    generation_config: Dict[str, Any],
+    tokens: List[CancellationToken]
+) -> Tuple[Dict[str, Any], "_CancellationCriteria"]:
+    """generation_config 복사본에 취소 StoppingCriteria 추가 (batch_chat/chat 이 generate 로 그대로 전달)"""
+    criteria = _CancellationCriteria(tokens)
+    config = dict(generation_config)
+    config["stopping_criteria"] = StoppingCriteriaList(
+        list(config.get("stopping_criteria") or []) + [criteria]
+    )
+    return config, criteria
+
 
 class InternVL2Wrapper:
     """
@@ -61,6 +105,15 @@ class InternVL2Wrapper:
         self.input_size = 448
         self.max_num_tiles = 12
         
+        # InternViT 임베딩 캐시 (같은 이미지 재질문 시 비전 타워 생략)
+        self.feature_cache = VisionFeatureCache()
+        
+        # 고정 프리픽스(템플릿 system 메시지 + 고정 지시문)의 past_key_values 캐시 — 모델 로딩당 1회 계산
+        self._prefix_cache: "OrderedDict[str, Tuple[torch.Tensor, Any]]" = OrderedDict()
+        self._prefix_lock = threading.Lock()
+        self.max_prefixes = 4
+        self.prefix_hits = 0
+        
     def load_model(self):
         """모델 및 토크나이저 로딩"""
         if self.model is not None:
@@ -92,6 +145,7 @@ class InternVL2Wrapper:
                 use_fast=False
             )
             
+            self._prefix_cache.clear()
             print("InternVL2-8B 모델 로딩 완료")
             
         except Exception as e:
@@ -101,106 +155,18 @@ class InternVL2Wrapper:
         """
         이미지 로딩 및 전처리
         
+        InternVL2 동적 타일 분할 + 정규화를 텐서 연산으로 한 번에 수행 (image_tiles.tile_image)
+        
         Args:
             image_path: 이미지 파일 경로
             
         Returns:
             torch.Tensor: 전처리된 이미지 텐서
         """
-        image = Image.open(image_path).convert('RGB')
-        
-        # 동적 전처리 (InternVL2 방식)
-        transform = self._build_transform(self.input_size)
-        images = self._dynamic_preprocess(image, self.input_size, use_thumbnail=True, max_num=self.max_num_tiles)
-        
-        pixel_values = [transform(img) for img in images]
-        pixel_values = torch.stack(pixel_values)
-        
-        return pixel_values
-    
-    def _build_transform(self, input_size: int):
-        """이미지 전처리 변환 함수 생성"""
-        IMAGENET_MEAN = (0.485, 0.456, 0.406)
-        IMAGENET_STD = (0.229, 0.224, 0.225)
-        
-        return T.Compose([
-            T.Resize((input_size, input_size), interpolation=T.InterpolationMode.BICUBIC),
-            T.ToTensor(),
-            T.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
-        ])
-    
-    def _find_closest_aspect_ratio(self, aspect_ratio, target_ratios, width, height, image_size):
-        """가장 가까운 종횡비 찾기"""
-        best_ratio_diff = float('inf')
-        best_ratio = (1, 1)
-        area = width * height
-        for ratio in target_ratios:
-            target_aspect_ratio = ratio[0] / ratio[1]
-            ratio_diff = abs(aspect_ratio - target_aspect_ratio)
-            if ratio_diff < best_ratio_diff:
-                best_ratio_diff = ratio_diff
-                best_ratio = ratio
-            elif ratio_diff == best_ratio_diff:
-                if area > 0.5 * image_size * image_size * ratio[0] * ratio[1]:
-                    best_ratio = ratio
-        return best_ratio
-    
-    def _dynamic_preprocess(
-        self,
-        image: Image.Image,
-        input_size: int = 448,
-        use_thumbnail: bool = True,
-        max_num: int = 12,
-        min_num: int = 1
-    ) -> List[Image.Image]:
-        """
-        동적 이미지 전처리 (InternVL2 방식)
-        큰 이미지를 타일로 분할하여 처리
-        """
-        from torchvision.transforms.functional import InterpolationMode
-        
-        orig_width, orig_height = image.size
-        aspect_ratio = orig_width / orig_height
-        
-        # 가능한 타겟 종횡비 계산
-        target_ratios = set(
-            (i, j) for n in range(min_num, max_num + 1) 
-            for i in range(1, n + 1) for j in range(1, n + 1) 
-            if i * j <= max_num and i * j >= min_num
-        )
-        target_ratios = sorted(target_ratios, key=lambda x: x[0] * x[1])
-        
-        # 가장 가까운 종횡비 찾기
-        target_aspect_ratio = self._find_closest_aspect_ratio(
-            aspect_ratio, target_ratios, orig_width, orig_height, input_size
-        )
-        
-        # 타겟 너비/높이 계산
-        target_width = input_size * target_aspect_ratio[0]
-        target_height = input_size * target_aspect_ratio[1]
-        blocks = target_aspect_ratio[0] * target_aspect_ratio[1]
-        
-        # 이미지 리사이즈
-        resized_img = image.resize((int(target_width), int(target_height)), Image.Resampling.BICUBIC)
-        processed_images = []
-        
-        # 이미지 분할
-        for i in range(blocks):
-            box = (
-                (i % (int(target_width) // input_size)) * input_size,
-                (i // (int(target_width) // input_size)) * input_size,
-                ((i % (int(target_width) // input_size)) + 1) * input_size,
-                ((i // (int(target_width) // input_size)) + 1) * input_size
+        with Image.open(image_path) as image:
+            return tile_image(
+                image.convert('RGB'), self.input_size, max_num=self.max_num_tiles, use_thumbnail=True
             )
-            split_img = resized_img.crop(box)
-            processed_images.append(split_img)
-        
-        # 썸네일 추가
-        if use_thumbnail and len(processed_images) != 1:
-            thumbnail_img = image.resize((input_size, input_size), Image.Resampling.BICUBIC)
-            processed_images.append(thumbnail_img)
-        
-        return processed_images
     
     def chat(
         self,
@@ -208,7 +174,8 @@ class InternVL2Wrapper:
         image_path: Optional[str] = None,
         generation_config: Optional[Dict[str, Any]] = None,
         history: Optional[List] = None,
-        return_history: bool = True
+        return_history: bool = True,
+        cancel_token: Optional[CancellationToken] = None
     ) -> Tuple[str, Optional[List]]:
         """
         대화 형식으로 추론 수행
@@ -219,9 +186,13 @@ class InternVL2Wrapper:
             generation_config: 생성 설정
             history: 대화 히스토리
             return_history: 히스토리 반환 여부
+            cancel_token: 취소 토큰 (취소/시간 초과 시 다음 토큰에서 생성 중단)
             
         Returns:
             Tuple[str, Optional[List]]: (응답 텍스트, 히스토리)
+        
+        Raises:
+            GenerationCancelled: cancel_token 으로 생성이 중단됨
         """
         if self.model is None:
             self.load_model()
@@ -235,18 +206,18 @@ class InternVL2Wrapper:
                 "top_p": 0.9
             }
         
-        # 이미지 처리
-        pixel_values = None
-        if image_path:
-            pixel_values = self.load_image(image_path)
-            if self.device == "cuda" and torch.cuda.is_available():
-                pixel_values = pixel_values.to(self.torch_dtype).cuda()
-            else:
-                pixel_values = pixel_values.to(self.torch_dtype)
+        criteria = None
+        if cancel_token is not None:
+            if cancel_token.cancelled:
+                raise GenerationCancelled("생성 시작 전에 취소되었습니다")
+            generation_config, criteria = _with_cancellation(generation_config, [cancel_token])
+        
+        # 이미지 처리 (캐시된 ViT 임베딩 재사용)
+        pixel_values, _, generation_config = self._vision_inputs([image_path], generation_config)
         
         # 대화 수행
         try:
-            response, history = self.model.chat(
+            result = self.model.chat(
                 self.tokenizer,
                 pixel_values,
                 text,
@@ -254,15 +225,242 @@ class InternVL2Wrapper:
                 history=history,
                 return_history=return_history
             )
-            return response, history
+            # return_history=False 이면 응답 문자열만 반환됨
+            response, history = result if return_history else (result, None)
         except Exception as e:
             raise RuntimeError(f"추론 실패: {str(e)}")
+        if criteria is not None and criteria.stopped:
+            raise GenerationCancelled("취소 또는 시간 제한 초과로 생성이 중단되었습니다")
+        return response, history
+    
+    def _prepare_pixels(self, image_path: Optional[str]) -> Optional[torch.Tensor]:
+        """이미지 → 모델 dtype/디바이스의 pixel_values (이미지가 없으면 None)"""
+        if not image_path:
+            return None
+        pixel_values = self.load_image(image_path)
+        if self.device == "cuda" and torch.cuda.is_available():
+            return pixel_values.to(self.torch_dtype).cuda()
+        return pixel_values.to(self.torch_dtype)
+    
+    def _image_features(self, image_path: str) -> torch.Tensor:
+        """
+        이미지 → InternViT 임베딩 (이미지 내용 해시 + 타일 설정으로 캐시)
+        
+        Returns:
+            torch.Tensor: (타일 수, 토큰 수, hidden) 임베딩
+        """
+        with open(image_path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        key = (digest, self.input_size, self.max_num_tiles, str(self.torch_dtype), self.device)
+        features = self.feature_cache.get(key)
+        if features is None:
+            pixel_values = self._prepare_pixels(image_path)
+            with torch.no_grad():
+                features = self.model.extract_feature(pixel_values)
+            self.feature_cache.put(key, features)
+        return features
+    
+    def _vision_inputs(
+        self,
+        image_paths: List[Optional[str]],
+        generation_config: Dict[str, Any]
+    ) -> Tuple[Optional[torch.Tensor], List[int], Dict[str, Any]]:
+        """
+        이미지 목록 → (pixel_values, num_patches_list, generation_config)
+        
+        특징 캐시 사용 시 pixel_values 자리에 캐시된 임베딩을 넣고 visual_features 로도 전달
+        (generate 는 visual_features 가 있으면 extract_feature 를 건너뛰고,
+        chat/batch_chat 은 pixel_values 의 첫 차원을 타일 수로만 사용)
+        """
+        if not any(image_paths):
+            return None, [0] * len(image_paths), generation_config
+        if not all(image_paths):
+            raise ValueError("batch_chat: 이미지가 있는 요청과 없는 요청을 한 배치로 묶을 수 없습니다")
+        if self.feature_cache.enabled:
+            tensors = [self._image_features(p) for p in image_paths]
+        else:
+            tensors = [self._prepare_pixels(p) for p in image_paths]
+        num_patches_list = [t.shape[0] for t in tensors]
+        pixel_values = tensors[0] if len(tensors) == 1 else torch.cat(tensors, dim=0)
+        if self.feature_cache.enabled:
+            generation_config = {**generation_config, "visual_features": pixel_values}
+        return pixel_values, num_patches_list, generation_config
+    
+    def _split_query(self, prefix: str, suffix: str) -> Tuple[str, str, str]:
+        """
+        대화 템플릿을 적용한 전체 쿼리를 (고정 부분, 가변 부분, 구분자)로 분리
+        
+        고정 부분 = 템플릿 system 메시지 + 사용자 역할 헤더 + prefix
+        """
+        conversation = importlib.import_module(type(self.model).__module__)
+        template = conversation.get_conv_template(self.model.template)
+        template.system_message = self.model.system_message
+        template.append_message(template.roles[0], prefix + suffix)
+        template.append_message(template.roles[1], None)
+        query = template.get_prompt()
+        cut = query.index(prefix) + len(prefix)
+        return query[:cut], query[cut:], template.sep.strip()
+    
+    def _prefix_state(self, prefix_query: str) -> Tuple[torch.Tensor, Any]:
+        """고정 부분의 (input_ids, past_key_values) — 처음 한 번만 언어 모델 forward"""
+        with self._prefix_lock:
+            state = self._prefix_cache.get(prefix_query)
+            if state is not None:
+                self._prefix_cache.move_to_end(prefix_query)
+                self.prefix_hits += 1
+                return state
+            prefix_ids = self.tokenizer(prefix_query, return_tensors='pt').input_ids.to(self.model.device)
+            with torch.no_grad():
+                outputs = self.model.language_model(input_ids=prefix_ids, use_cache=True)
+            state = (prefix_ids, outputs.past_key_values)
+            self._prefix_cache[prefix_query] = state
+            while len(self._prefix_cache) > self.max_prefixes:
+                self._prefix_cache.popitem(last=False)
+            print(f"[InternVL2] 프리픽스 KV 캐시 생성: {prefix_ids.shape[1]} 토큰")
+            return state
+    
+    def warm_prefix(self, prefix: str) -> None:
+        """모델 로딩 직후 고정 프리픽스 KV 를 미리 계산 (첫 요청도 가변 부분만 인코딩)"""
+        if self.model is None:
+            self.load_model()
+        prefix_query, _, _ = self._split_query(prefix, "")
+        self._prefix_state(prefix_query)
+    
+    def prefix_stats(self) -> Dict[str, Any]:
+        with self._prefix_lock:
+            return {
+                "prefixes": len(self._prefix_cache),
+                "prefix_tokens": [ids.shape[1] for ids, _ in self._prefix_cache.values()],
+                "hits": self.prefix_hits,
+            }
+    
+    @staticmethod
+    def _expand_prefix_past(past: Any, batch_size: int) -> Optional[Any]:
+        """
+        프리픽스 past_key_values 를 요청용으로 준비 (배치 차원 1 → batch_size)
+        
+        - 레거시 tuple: 각 key/value 텐서를 expand (복사 없음, generate 는 torch.cat 으로 새 텐서를 만듦)
+        - Cache 객체(DynamicCache 등): 레거시 tuple 로 바꿔 expand 한 뒤 같은 형식으로 다시 생성
+          (generate 중 제자리 갱신되므로 캐시된 원본을 그대로 넘기지 않음)
+        - 그 밖의 Cache: batch_size 1 이면 복사본, 아니면 None (프리픽스 캐시 사용 불가)
+        """
+        cache_cls = None
+        if hasattr(past, "to_legacy_cache") and hasattr(type(past), "from_legacy_cache"):
+            cache_cls = type(past)
+            past = past.to_legacy_cache()
+        elif hasattr(past, "get_seq_length"):
+            return copy.deepcopy(past) if batch_size == 1 else None
+        past = tuple(
+            tuple(t.expand(batch_size, *t.shape[1:]) if batch_size > 1 else t for t in layer)
+            for layer in past
+        )
+        return cache_cls.from_legacy_cache(past) if cache_cls is not None else past
+    
+    def _prefix_batch_chat(
+        self,
+        prefix: str,
+        texts: List[str],
+        generation_config: Dict[str, Any]
+    ) -> List[str]:
+        """
+        고정 프리픽스 KV 를 재사용한 텍스트 전용 배치 생성
+        
+        입력 = [프리픽스 토큰 | 왼쪽 패딩된 가변 토큰], past_key_values = 프리픽스 KV (배치 크기로 expand)
+        InternLM2 의 prepare_inputs_for_generation 이 past 길이만큼 입력을 잘라
+        가변 부분만 인코딩 → 첫 토큰 지연이 가변 부분 길이에만 비례
+        """
+        splits = [self._split_query(prefix, text[len(prefix):]) for text in texts]
+        prefix_query, sep = splits[0][0], splits[0][2]
+        prefix_ids, past = self._prefix_state(prefix_query)
+        batch_size = len(texts)
+        past = self._expand_prefix_past(past, batch_size)
+        if past is None:
+            # 배치 크기로 늘릴 수 없는 Cache 형식 → 프리픽스 캐시 없이 일반 배치 생성
+            return self.model.batch_chat(
+                self.tokenizer, None, texts, dict(generation_config), num_patches_list=[0] * batch_size
+            )
+        
+        self.tokenizer.padding_side = 'left'
+        suffix = self.tokenizer(
+            [tail for _, tail, _ in splits], return_tensors='pt', padding=True, add_special_tokens=False
+        )
+        suffix_ids = suffix['input_ids'].to(prefix_ids.device)
+        suffix_mask = suffix['attention_mask'].to(prefix_ids.device)
+        input_ids = torch.cat([prefix_ids.expand(batch_size, -1), suffix_ids], dim=1)
+        attention_mask = torch.cat(
+            [torch.ones(batch_size, prefix_ids.shape[1], dtype=suffix_mask.dtype, device=suffix_mask.device), suffix_mask],
+            dim=1
+        )
+        config = dict(generation_config)
+        config['eos_token_id'] = self.tokenizer.convert_tokens_to_ids(sep)
+        config.setdefault('pad_token_id', self.tokenizer.pad_token_id)
+        with torch.no_grad():
+            outputs = self.model.language_model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                past_key_values=past,
+                use_cache=True,
+                **config
+            )
+        responses = self.tokenizer.batch_decode(outputs[:, input_ids.shape[1]:], skip_special_tokens=True)
+        return [response.split(sep)[0].strip() for response in responses]
+    
+    def batch_chat(
+        self,
+        texts: List[str],
+        image_paths: List[Optional[str]],
+        generation_config: Dict[str, Any],
+        cancel_tokens: Optional[List[CancellationToken]] = None,
+        prefix: Optional[str] = None
+    ) -> List[str]:
+        """
+        여러 프롬프트를 한 번의 forward 로 추론 (InternVLChatModel.batch_chat)
+        
+        같은 배치의 요청은 모두 이미지가 있거나 모두 없어야 함 (BatchInferenceQueue 가 묶어서 호출)
+        cancel_tokens[i] 가 취소/시간 초과되면 i 번째 요청만 다음 토큰에서 종료 (나머지는 계속 생성)
+        prefix: 모든 texts 가 이 고정 문자열로 시작하고 이미지가 없으면 프리픽스 KV 캐시 사용
+        
+        Returns:
+            List[str]: texts 순서대로의 응답 (중간에 종료된 요청의 응답은 잘린 문자열,
+            호출 측이 cancel_tokens 로 걸러냄)
+        
+        Raises:
+            GenerationCancelled: 배치 전체가 취소되어 생성이 중단됨
+        """
+        if self.model is None:
+            self.load_model()
+        
+        pixel_values, num_patches_list, config = self._vision_inputs(image_paths, generation_config)
+        
+        # batch_chat 이 eos_token_id 를 채워 넣으므로 복사본 전달
+        config, criteria = dict(config), None
+        if cancel_tokens:
+            config, criteria = _with_cancellation(config, cancel_tokens)
+        use_prefix = bool(prefix) and pixel_values is None and all(t.startswith(prefix) for t in texts)
+        try:
+            if use_prefix:
+                responses = self._prefix_batch_chat(prefix, list(texts), config)
+            else:
+                responses = self.model.batch_chat(
+                    self.tokenizer,
+                    pixel_values,
+                    list(texts),
+                    config,
+                    num_patches_list=num_patches_list
+                )
+        except Exception as e:
+            raise RuntimeError(f"배치 추론 실패: {str(e)}")
+        if criteria is not None and criteria.stopped and criteria.all_cancelled:
+            raise GenerationCancelled("배치 전체가 취소되어 생성이 중단되었습니다")
+        return responses
     
     def generate_text(
         self,
         prompt: str,
         image_path: Optional[str] = None,
-        max_new_tokens: int = 512
+        max_new_tokens: int = 512,
+        timeout: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> str:
         """
         텍스트 생성 (간단한 인터페이스)
@@ -271,10 +469,17 @@ class InternVL2Wrapper:
             prompt: 프롬프트
             image_path: 이미지 경로 (선택사항)
             max_new_tokens: 최대 생성 토큰 수
+            timeout: 생성 허용 시간 (초) — 초과 시 다음 토큰에서 중단
+            cancel_token: 호출 측 취소 토큰 (timeout 보다 우선)
             
         Returns:
             str: 생성된 텍스트
+        
+        Raises:
+            GenerationCancelled: 취소 또는 시간 제한 초과
         """
+        if cancel_token is None and timeout is not None:
+            cancel_token = CancellationToken(timeout)
         generation_config = {
             "max_new_tokens": max_new_tokens,
             "do_sample": True,
@@ -285,7 +490,8 @@ class InternVL2Wrapper:
             text=prompt,
             image_path=image_path,
             generation_config=generation_config,
-            return_history=False
+            return_history=False,
+            cancel_token=cancel_token
         )
         
         return response
@@ -0,0 +1,66 @@
+"""
+단기 메모리 대화 기록 메모리 사용량 비교 (기존 dict 레이아웃 vs ConversationTurn)
+실행: python agentic_system/scripts/bench_conversation_memory.py [세션 수] [세션당 대화 수]
+      (또는 python -m agentic_system.scripts.bench_conversation_memory ...)
+"""
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+import sys
+import tracemalloc
+
+# 프로젝트 루트를 path에 추가
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from agentic_system.core.memory import ConversationTurn
+
+USER_INPUT = "이 셔츠 입혀줘"
+AGENT_RESPONSE = "가상 피팅 결과입니다. 왼쪽 이미지에서 확인해 주세요."
+
+
+def _dict_turn(i: int) -> dict:
+    """기존 add_conversation 레이아웃"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "user_input": USER_INPUT,
+        "agent_response": AGENT_RESPONSE,
+        "metadata": {"plan_id": f"plan_{i}"}
+    }
+
+
+def _slot_turn(i: int) -> ConversationTurn:
+    return ConversationTurn(USER_INPUT, AGENT_RESPONSE, {"plan_id": f"plan_{i}"})
+
+
+def measure(factory, sessions: int, turns: int) -> int:
+    """sessions 개 세션 × turns 건 기록을 만들 때 늘어난 메모리 (바이트)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = []
+    for s in range(sessions):
+        history = deque(maxlen=turns)
+        for t in range(turns):
+            history.append(factory(s * turns + t))
+        store.append(history)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del store
+    return used
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    total = sessions * turns
+    old = measure(_dict_turn, sessions, turns)
+    new = measure(_slot_turn, sessions, turns)
+    print(f"[벤치마크] 세션 {sessions:,}개 × 대화 {turns}건 = {total:,}건")
+    print(f"[벤치마크] dict 레이아웃:       {old / 1024 / 1024:8.1f} MB ({old / total:6.0f} bytes/건)")
+    print(f"[벤치마크] ConversationTurn:   {new / 1024 / 1024:8.1f} MB ({new / total:6.0f} bytes/건)")
+    print(f"[벤치마크] 절감: {(1 - new / old) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+InternVL2 타일 전처리 벤치마크 (기존 PIL 타일별 crop + T.Compose vs image_tiles.tile_image)
+실행: python agentic_system/scripts/bench_tile_preprocess.py [이미지 경로 ...] [--repeat N]
+      (또는 python -m agentic_system.scripts.bench_tile_preprocess ...)
+
+이미지 경로를 생략하면 휴대폰 사진 크기(4032×3024, 3024×4032, 1920×1080)의 합성 이미지 사용.
+torch, torchvision 필요.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 프로젝트 루트를 path에 추가
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import torch
+import torchvision.transforms as T
+from PIL import Image
+
+from agentic_system.models.image_tiles import IMAGENET_MEAN, IMAGENET_STD, tile_image
+
+INPUT_SIZE = 448
+MAX_NUM = 12
+PHONE_SIZES = [(4032, 3024), (3024, 4032), (1920, 1080)]
+
+
+def legacy_tile_image(image: Image.Image, input_size: int = INPUT_SIZE, max_num: int = MAX_NUM) -> torch.Tensor:
+    """변경 전 InternVL2Wrapper.load_image 경로 (비교 기준)"""
+    transform = T.Compose([
+        T.Resize((input_size, input_size), interpolation=T.InterpolationMode.BICUBIC),
+        T.ToTensor(),
+        T.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+    ])
+    orig_width, orig_height = image.size
+    aspect_ratio = orig_width / orig_height
+    target_ratios = set(
+        (i, j) for n in range(1, max_num + 1)
+        for i in range(1, n + 1) for j in range(1, n + 1)
+        if i * j <= max_num and i * j >= 1
+    )
+    target_ratios = sorted(target_ratios, key=lambda x: x[0] * x[1])
+    best_ratio_diff = float('inf')
+    best_ratio = (1, 1)
+    area = orig_width * orig_height
+    for ratio in target_ratios:
+        ratio_diff = abs(aspect_ratio - ratio[0] / ratio[1])
+        if ratio_diff < best_ratio_diff:
+            best_ratio_diff = ratio_diff
+            best_ratio = ratio
+        elif ratio_diff == best_ratio_diff:
+            if area > 0.5 * input_size * input_size * ratio[0] * ratio[1]:
+                best_ratio = ratio
+    target_width = input_size * best_ratio[0]
+    target_height = input_size * best_ratio[1]
+    blocks = best_ratio[0] * best_ratio[1]
+    resized_img = image.resize((target_width, target_height), Image.Resampling.BICUBIC)
+    tiles = []
+    for i in range(blocks):
+        box = (
+            (i % (target_width // input_size)) * input_size,
+            (i // (target_width // input_size)) * input_size,
+            ((i % (target_width // input_size)) + 1) * input_size,
+            ((i // (target_width // input_size)) + 1) * input_size
+        )
+        tiles.append(resized_img.crop(box))
+    if len(tiles) != 1:
+        tiles.append(image.resize((input_size, input_size), Image.Resampling.BICUBIC))
+    return torch.stack([transform(t) for t in tiles])
+
+
+def _synthetic_photo(width: int, height: int) -> Image.Image:
+    """휴대폰 사진 크기의 합성 이미지 (그라디언트 + 노이즈)"""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)),
+                     np.full((height, width), 128, np.float32)], axis=-1)
+    noise = rng.normal(0, 12, base.shape).astype(np.float32)
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8), "RGB")
+
+
+def _time(func, image: Image.Image, repeat: int) -> float:
+    func(image)  # 워밍업
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(image)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="InternVL2 타일 전처리 벤치마크")
+    parser.add_argument("images", nargs="*", help="이미지 경로 (생략 시 합성 휴대폰 사진)")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.images:
+        samples = [(p, Image.open(p).convert("RGB")) for p in args.images]
+    else:
+        samples = [(f"합성 {w}x{h}", _synthetic_photo(w, h)) for w, h in PHONE_SIZES]
+
+    for name, image in samples:
+        legacy = legacy_tile_image(image)
+        vectorized = tile_image(image, INPUT_SIZE, max_num=MAX_NUM)
+        max_diff = (legacy - vectorized).abs().max().item()
+        legacy_ms = _time(legacy_tile_image, image, args.repeat)
+        new_ms = _time(lambda img: tile_image(img, INPUT_SIZE, max_num=MAX_NUM), image, args.repeat)
+        print(f"[벤치마크] {name}: 타일 {tuple(vectorized.shape)}, 최대 오차 {max_diff:.2e}")
+        print(f"[벤치마크]   기존 {legacy_ms:8.1f} ms  →  벡터화 {new_ms:8.1f} ms  ({legacy_ms / new_ms:.2f}배)")
+
+
+if __name__ == "__main__":
+    main()
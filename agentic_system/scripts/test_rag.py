@@ -42,6 +42,8 @@ def main():
     for i, s in enumerate(suggestions[:5], 1):
         print(f"  {i}. {s[:180]}{'...' if len(s) > 180 else ''}")
 
+    print(f"\n--- 소스별 소요 시간(ms): {ctx.get('rag_latency_ms', {})}, 시간 초과: {ctx.get('rag_timed_out', [])} ---")
+
     if internal or external or suggestions:
         print("\n[결과] RAG 기능 정상 동작 - 검색된 문맥이 API 응답 시 계획 강화에 사용됩니다.")
     else:
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+모델 추론 보조 모듈 테스트 (InternVL2 가중치·GPU 없이)
+
+- BatchInferenceQueue: 가짜 batch_chat 모델로 그룹 분리, 실행 전 취소, 대기 중 시간 초과, close() 정리
+- CancellationToken / 요청별 생성 취소 (_CancellationCriteria 는 torch·transformers 가 있을 때만)
+- VisionFeatureCache: 바이트 상한 LRU 제거
+- image_tiles.tile_image: 기존 타일별 crop + T.Compose 경로와 같은 결과 (torch·torchvision 이 있을 때만)
+- InternVL2Wrapper._expand_prefix_past: 프리픽스 KV 배치 확장 (torch·transformers 가 있을 때만)
+
+실행: python agentic_system/test_models.py  (또는 pytest agentic_system/test_models.py)
+"""
+
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# 프로젝트 루트 경로 추가
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from agentic_system.models.batch_inference import BatchInferenceQueue
+from agentic_system.models.cancellation import CancellationToken, GenerationCancelled
+from agentic_system.models.feature_cache import VisionFeatureCache
+
+
+def _require(module: str):
+    """선택 의존성 임포트 (없으면 건너뜀 — pytest 도 unittest.SkipTest 를 skip 으로 처리)"""
+    try:
+        return __import__(module)
+    except ImportError:
+        raise unittest.SkipTest(f"{module} 미설치")
+
+
+class FakeBatchModel:
+    """InternVL2Wrapper.batch_chat 대역 — 호출 기록, gate 가 있으면 열릴 때까지 대기"""
+
+    def __init__(self, gate: threading.Event = None):
+        self.calls = []
+        self.gate = gate
+        self.started = threading.Event()
+
+    def batch_chat(self, texts, image_paths, generation_config, cancel_tokens=None, prefix=None):
+        self.calls.append({
+            "texts": list(texts),
+            "images": list(image_paths),
+            "config": dict(generation_config),
+            "prefix": prefix,
+        })
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        return [f"응답:{t}" for t in texts]
+
+
+def _seen_texts(model: FakeBatchModel) -> list:
+    return [t for call in model.calls for t in call["texts"]]
+
+
+def test_batch_grouping():
+    """생성 설정·이미지 유무·프리픽스가 같은 요청끼리만 한 배치"""
+    model = FakeBatchModel()
+    q = BatchInferenceQueue(model, max_batch_size=8, max_wait=0.1)
+    try:
+        futures = [
+            q.submit("a1", generation_config={"max_new_tokens": 8}),
+            q.submit("a2", generation_config={"max_new_tokens": 8}),
+            q.submit("b1", generation_config={"max_new_tokens": 16}),
+            q.submit("c1", image_path="x.jpg", generation_config={"max_new_tokens": 8}),
+            q.submit("p1", generation_config={"max_new_tokens": 8}, prefix="p"),
+        ]
+        results = [f.result(timeout=2) for f in futures]
+    finally:
+        q.close()
+    assert results == ["응답:a1", "응답:a2", "응답:b1", "응답:c1", "응답:p1"]
+    assert sorted(sorted(call["texts"]) for call in model.calls) == [["a1", "a2"], ["b1"], ["c1"], ["p1"]]
+    for call in model.calls:
+        assert len({img is not None for img in call["images"]}) == 1
+    assert [call["prefix"] for call in model.calls if call["texts"] == ["p1"]] == ["p"]
+    assert q.stats()["requests"] == 5 and q.stats()["largest_batch"] == 2
+
+
+def test_max_batch_size():
+    """max_batch_size 를 넘는 요청은 다음 배치로"""
+    model = FakeBatchModel()
+    q = BatchInferenceQueue(model, max_batch_size=2, max_wait=0.1)
+    try:
+        futures = [q.submit(f"r{i}") for i in range(5)]
+        for f in futures:
+            f.result(timeout=2)
+    finally:
+        q.close()
+    assert all(len(call["texts"]) <= 2 for call in model.calls)
+    assert sorted(_seen_texts(model)) == [f"r{i}" for i in range(5)]
+
+
+def test_cancel_before_run():
+    """배치 실행 전에 cancel() 한 요청은 모델에 전달되지 않음"""
+    gate = threading.Event()
+    model = FakeBatchModel(gate)
+    q = BatchInferenceQueue(model, max_batch_size=8, max_wait=0.01)
+    try:
+        busy = q.submit("busy")
+        assert model.started.wait(2)
+        dropped = q.submit("dropped")
+        kept = q.submit("kept")
+        assert dropped.cancel()
+        gate.set()
+        assert busy.result(timeout=2) == "응답:busy"
+        assert kept.result(timeout=2) == "응답:kept"
+    finally:
+        q.close()
+    assert dropped.cancelled()
+    assert "dropped" not in _seen_texts(model)
+    assert q.stats()["cancelled"] == 1
+
+
+def test_timeout_before_run():
+    """큐에서 기다리는 동안 시간 제한이 지난 요청은 모델을 쓰지 않고 GenerationCancelled"""
+    gate = threading.Event()
+    model = FakeBatchModel(gate)
+    q = BatchInferenceQueue(model, max_batch_size=8, max_wait=0.01)
+    try:
+        q.submit("busy")
+        assert model.started.wait(2)
+        late = q.submit("late", timeout=0.01)
+        time.sleep(0.05)
+        gate.set()
+        try:
+            late.result(timeout=2)
+            raise AssertionError("시간 초과 요청이 결과를 반환함")
+        except GenerationCancelled:
+            pass
+    finally:
+        q.close()
+    assert "late" not in _seen_texts(model)
+
+
+def test_close_runs_pending_then_rejects():
+    """close() 는 이미 받은 요청을 처리한 뒤 종료, 이후 submit 은 RuntimeError"""
+    gate = threading.Event()
+    model = FakeBatchModel(gate)
+    q = BatchInferenceQueue(model, max_batch_size=8, max_wait=0.01)
+    busy = q.submit("busy")
+    assert model.started.wait(2)
+    pending = q.submit("pending")
+    gate.set()
+    q.close(timeout=2)
+    assert busy.result(timeout=0) == "응답:busy"
+    assert pending.result(timeout=0) == "응답:pending"
+    try:
+        q.submit("after")
+        raise AssertionError("종료된 큐가 요청을 받음")
+    except RuntimeError:
+        pass
+
+
+def test_close_drains_when_worker_stuck():
+    """스레드가 join 시간 안에 끝나지 않으면 남은 요청은 RuntimeError 로 정리"""
+    gate = threading.Event()
+    model = FakeBatchModel(gate)
+    q = BatchInferenceQueue(model, max_batch_size=8, max_wait=0.01)
+    try:
+        q.submit("busy")
+        assert model.started.wait(2)
+        stranded = q.submit("stranded")
+        q.close(timeout=0.05)
+        assert stranded.done()
+        try:
+            stranded.result(timeout=0)
+            raise AssertionError("정리된 요청이 결과를 반환함")
+        except RuntimeError as e:
+            assert not isinstance(e, GenerationCancelled)
+    finally:
+        gate.set()
+    assert "stranded" not in _seen_texts(model)
+
+
+def test_cancellation_token():
+    """명시적 취소와 deadline"""
+    token = CancellationToken()
+    assert not token.cancelled and token.remaining() is None
+    token.cancel()
+    assert token.cancelled
+    timed = CancellationToken(0.02)
+    assert not timed.cancelled and 0 < timed.remaining() <= 0.02
+    time.sleep(0.03)
+    assert timed.cancelled and timed.remaining() == 0.0
+
+
+class RowCancellingModel(FakeBatchModel):
+    """생성 도중 취소된 행은 잘린 응답을 내는 batch_chat 대역 (행별 StoppingCriteria 동작)"""
+
+    def batch_chat(self, texts, image_paths, generation_config, cancel_tokens=None, prefix=None):
+        self.calls.append({"texts": list(texts), "images": list(image_paths), "config": dict(generation_config), "prefix": prefix})
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if cancel_tokens and all(t.cancelled for t in cancel_tokens):
+            raise GenerationCancelled("배치 전체가 취소되어 생성이 중단되었습니다")
+        return [f"잘림:{t}" if tok.cancelled else f"응답:{t}" for t, tok in zip(texts, cancel_tokens)]
+
+
+def test_cancel_one_row_in_running_batch():
+    """실행 중 한 요청만 취소하면 그 요청만 GenerationCancelled, 나머지는 정상 응답"""
+    gate = threading.Event()
+    model = RowCancellingModel(gate)
+    q = BatchInferenceQueue(model, max_batch_size=8, max_wait=0.05)
+    try:
+        futures = [q.submit(f"r{i}") for i in range(3)]
+        assert model.started.wait(2)
+        futures[1].cancel()
+        gate.set()
+        assert futures[0].result(timeout=2) == "응답:r0"
+        assert futures[2].result(timeout=2) == "응답:r2"
+        try:
+            futures[1].result(timeout=2)
+            raise AssertionError("취소된 요청이 결과를 반환함")
+        except GenerationCancelled:
+            pass
+    finally:
+        q.close()
+    assert len(model.calls) == 1 and q.stats()["cancelled"] == 1
+
+
+def test_cancel_whole_running_batch():
+    """배치의 모든 요청이 실행 중 취소되면 모두 GenerationCancelled"""
+    gate = threading.Event()
+    model = RowCancellingModel(gate)
+    q = BatchInferenceQueue(model, max_batch_size=8, max_wait=0.05)
+    try:
+        futures = [q.submit(f"r{i}") for i in range(2)]
+        assert model.started.wait(2)
+        for f in futures:
+            f.cancel()
+        gate.set()
+        for f in futures:
+            try:
+                f.result(timeout=2)
+                raise AssertionError("취소된 요청이 결과를 반환함")
+            except GenerationCancelled:
+                pass
+    finally:
+        q.close()
+    assert q.stats()["cancelled"] == 2
+
+
+def test_cancellation_criteria_per_row():
+    """_CancellationCriteria 는 취소된 행만 True 인 BoolTensor 반환"""
+    torch = _require("torch")
+    _require("transformers")
+    from agentic_system.models.internvl2_wrapper import _CancellationCriteria, _with_cancellation
+
+    tokens = [CancellationToken(), CancellationToken(), CancellationToken()]
+    config, criteria = _with_cancellation({"max_new_tokens": 8}, tokens)
+    assert criteria in list(config["stopping_criteria"])
+    input_ids = torch.zeros((3, 4), dtype=torch.long)
+    assert criteria(input_ids, None).tolist() == [False, False, False]
+    assert not criteria.stopped
+    tokens[1].cancel()
+    done = criteria(input_ids, None)
+    assert done.dtype == torch.bool and done.tolist() == [False, True, False]
+    assert criteria.stopped and not criteria.all_cancelled
+    tokens[0].cancel()
+    tokens[2].cancel()
+    assert criteria.all_cancelled
+
+
+class FakeFeatures:
+    """텐서 크기만 흉내 내는 임베딩 대역 (numel × element_size 바이트)"""
+
+    def __init__(self, nbytes: int):
+        self.nbytes = nbytes
+
+    def numel(self) -> int:
+        return self.nbytes // 2
+
+    def element_size(self) -> int:
+        return 2
+
+
+def test_feature_cache_byte_cap():
+    """전체 바이트 상한을 넘으면 가장 오래 쓰지 않은 임베딩부터 제거"""
+    cache = VisionFeatureCache(max_bytes=300)
+    a, b, c = FakeFeatures(100), FakeFeatures(100), FakeFeatures(100)
+    cache.put("a", a)
+    cache.put("b", b)
+    cache.put("c", c)
+    assert cache.stats()["bytes"] == 300
+    assert cache.get("a") is a  # a 를 최근 사용으로
+    cache.put("d", FakeFeatures(150))  # 450 > 300 → b, c 제거
+    assert cache.get("b") is None and cache.get("c") is None
+    assert cache.get("a") is a and cache.get("d") is not None
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["bytes"] == 250
+    assert stats["hits"] == 3 and stats["misses"] == 2
+
+
+def test_feature_cache_replace_and_oversize():
+    """같은 키 교체 시 바이트 재계산, 상한보다 큰 임베딩은 저장 안 함, 상한 0 이면 비활성"""
+    cache = VisionFeatureCache(max_bytes=200)
+    cache.put("a", FakeFeatures(100))
+    cache.put("a", FakeFeatures(50))
+    assert cache.stats()["bytes"] == 50 and cache.stats()["entries"] == 1
+    cache.put("huge", FakeFeatures(400))
+    assert cache.get("huge") is None and cache.stats()["bytes"] == 50
+    cache.clear()
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+    disabled = VisionFeatureCache(max_bytes=0)
+    assert not disabled.enabled
+    disabled.put("a", FakeFeatures(2))
+    assert disabled.get("a") is None
+
+
+def test_tile_image_matches_baseline():
+    """벡터화 타일 분할이 기존 dynamic_preprocess + T.Compose 결과와 같은지 (종횡비별)"""
+    torch = _require("torch")
+    _require("torchvision")
+    import numpy as np
+    from PIL import Image
+    from agentic_system.models.image_tiles import tile_image
+    from agentic_system.scripts.bench_tile_preprocess import legacy_tile_image
+
+    rng = np.random.default_rng(0)
+    # 가로형, 세로형, 한 타일(썸네일 없음), 아주 긴 이미지
+    for width, height in [(1200, 900), (900, 1200), (448, 448), (2000, 400)]:
+        image = Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), "RGB")
+        expected = legacy_tile_image(image, 448, 12)
+        actual = tile_image(image, 448, max_num=12)
+        assert actual.shape == expected.shape, (width, height, actual.shape, expected.shape)
+        assert actual.dtype == torch.float32
+        assert torch.allclose(actual, expected, atol=1e-5), (width, height)
+
+
+def test_expand_prefix_past():
+    """레거시 tuple·DynamicCache 는 배치 크기로 확장, 확장할 수 없는 Cache 는 None"""
+    torch = _require("torch")
+    transformers = _require("transformers")
+    from agentic_system.models.internvl2_wrapper import InternVL2Wrapper
+
+    layers = tuple(
+        (torch.randn(1, 2, 5, 4), torch.randn(1, 2, 5, 4)) for _ in range(3)
+    )
+    expanded = InternVL2Wrapper._expand_prefix_past(layers, 3)
+    assert len(expanded) == 3
+    for (k, v), (ek, ev) in zip(layers, expanded):
+        assert ek.shape == (3, 2, 5, 4) and ev.shape == (3, 2, 5, 4)
+        assert torch.equal(ek[2], k[0]) and torch.equal(ev[1], v[0])
+    assert InternVL2Wrapper._expand_prefix_past(layers, 1)[0][0] is layers[0][0]
+
+    DynamicCache = getattr(transformers, "DynamicCache", None)
+    if DynamicCache is not None and hasattr(DynamicCache, "from_legacy_cache"):
+        cache = DynamicCache.from_legacy_cache(layers)
+        out = InternVL2Wrapper._expand_prefix_past(cache, 4)
+        assert isinstance(out, DynamicCache) and out is not cache
+        assert out.to_legacy_cache()[0][0].shape[0] == 4
+        assert cache.to_legacy_cache()[0][0].shape[0] == 1  # 캐시된 원본은 그대로
+
+    class OpaqueCache:
+        def __init__(self):
+            self.state = [1]
+
+        def get_seq_length(self):
+            return 5
+
+    opaque = OpaqueCache()
+    single = InternVL2Wrapper._expand_prefix_past(opaque, 1)
+    assert single is not opaque and single.state == opaque.state
+    assert InternVL2Wrapper._expand_prefix_past(opaque, 2) is None
+
+
+TESTS = [
+    ("배치 그룹 분리", test_batch_grouping),
+    ("최대 배치 크기", test_max_batch_size),
+    ("실행 전 취소", test_cancel_before_run),
+    ("대기 중 시간 초과", test_timeout_before_run),
+    ("close() 처리 후 종료", test_close_runs_pending_then_rejects),
+    ("close() 남은 요청 정리", test_close_drains_when_worker_stuck),
+    ("취소 토큰", test_cancellation_token),
+    ("실행 중 요청 하나 취소", test_cancel_one_row_in_running_batch),
+    ("실행 중 배치 전체 취소", test_cancel_whole_running_batch),
+    ("행별 StoppingCriteria", test_cancellation_criteria_per_row),
+    ("특징 캐시 바이트 상한", test_feature_cache_byte_cap),
+    ("특징 캐시 교체·상한 초과", test_feature_cache_replace_and_oversize),
+    ("타일 전처리 기존 경로와 동일", test_tile_image_matches_baseline),
+    ("프리픽스 KV 배치 확장", test_expand_prefix_past),
+]
+
+
+def main():
+    """메인 테스트 함수"""
+    print("=" * 60)
+    print("모델 추론 보조 모듈 테스트")
+    print("=" * 60)
+
+    all_passed = True
+    for name, test in TESTS:
+        try:
+            test()
+            print(f"✅ {name}")
+        except unittest.SkipTest as e:
+            print(f"⏭️  {name}: 건너뜀 ({e})")
+        except Exception as e:
+            all_passed = False
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+
+    print("=" * 60)
+    if all_passed:
+        print("🎉 모든 테스트 통과!")
+        return 0
+    print("⚠️  일부 테스트 실패")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
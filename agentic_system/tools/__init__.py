@@ -3,12 +3,15 @@ Tools Module - Gemini Try-On and Functions
 도구 모듈: 가상 피팅(Gemini Try-On) 및 상품 검색 기능
 """
 
-from .gemini_tryon import GeminiTryOnTool, gemini_tryon_tool
-from .functions import ProductSearchFunction
+from .gemini_tryon import GeminiTryOnTool, gemini_tryon_tool, get_gemini_tryon_tool
+from .functions import ProductSearchFunction, product_search_function_tool, get_product_search_function
 
 __all__ = [
     'GeminiTryOnTool',
     'gemini_tryon_tool',
+    'get_gemini_tryon_tool',
     'ProductSearchFunction',
+    'product_search_function_tool',
+    'get_product_search_function',
 ]
 
@@ -5,6 +5,7 @@ PoC 단계에서는 Mock 구현
 """
 
 from typing import Dict, Any, List, Optional
+import threading
 
 
 class ProductSearchFunction:
@@ -119,7 +120,8 @@ class ProductSearchFunction:
                         break
             
             if match and product["available"]:
-                results.append(product)
+                # 공용 인스턴스의 카탈로그가 호출 측에서 변경되지 않도록 복사본 반환
+                results.append(dict(product))
         
         return {
             "status": "success",
@@ -158,9 +160,22 @@ class ProductSearchFunction:
         }
 
 
+_tool: Optional[ProductSearchFunction] = None
+_tool_lock = threading.Lock()
+
+
+def get_product_search_function() -> ProductSearchFunction:
+    """프로세스 전역 공용 ProductSearchFunction (카탈로그는 최초 1회만 구성)"""
+    global _tool
+    if _tool is None:
+        with _tool_lock:
+            if _tool is None:
+                _tool = ProductSearchFunction()
+    return _tool
+
+
 # 도구 함수로 사용하기 위한 래퍼
 def product_search_function_tool(action: str, parameters: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
     """도구 함수 래퍼"""
-    tool = ProductSearchFunction()
-    return tool.execute(action, parameters, context)
+    return get_product_search_function().execute(action, parameters, context)
 
@@ -5,20 +5,28 @@ ChatGarment/GarmentCodeRC를 대체하여 Gemini API(및 향후 Vertex AI Virtua
 활용한 가상 피팅 결과를 생성합니다.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as wait_futures
 import os
 import shutil
 import base64
+import functools
+import hashlib
+import threading
+import time
 from pathlib import Path
 
+from .tryon_cache import TryOnResultCache, tryon_cache_key
+from .render_store import get_render_store
+from .image_prep import get_image_preprocessor
+
 try:
     import urllib.request
     _urllib_available = True
 except ImportError:
     _urllib_available = False
 try:
-    import requests
-    _requests_available = True
+    from ..utils.http_client import get_http_client, REQUESTS_AVAILABLE as _requests_available
 except ImportError:
     _requests_available = False
 try:
@@ -49,6 +57,79 @@ except ImportError:
         GEMINI_SDK = None
 
 
+# Try-On 합성 프롬프트·이미지 생성 모델 (앞에서부터 시도) — 결과 캐시 키에도 포함
+TRYON_PROMPT = (
+    "첫 번째 이미지는 입을 옷(의류) 사진이고, 두 번째 이미지는 그 옷을 입을 사람(인물) 사진입니다. "
+    "두 번째 이미지의 인물이 첫 번째 이미지의 옷을 입은 모습으로, 한 장의 자연스러운 합성 사진을 생성해주세요. "
+    "인물의 포즈와 얼굴은 유지하고, 옷만 정확히 입혀서 사실적으로 보이게 해주세요."
+)
+TRYON_MODELS = (
+    "gemini-2.0-flash-exp-image-generation",
+    "gemini-2.0-flash-preview-image-generation",
+    "gemini-2.5-flash-preview-image-generation",
+)
+FAL_MODEL_ID = "fal-ai/image-apps-v2/virtual-try-on"
+# 헤지 지연 (초): 앞 모델이 이 시간 안에 끝나지 않으면 다음 모델을 동시에 시작. "off" 이면 순차 시도
+_hedge_env = os.environ.get("TRYON_HEDGE_DELAY", "8").strip().lower()
+TRYON_HEDGE_DELAY: Optional[float] = None if _hedge_env in ("off", "none", "") else float(_hedge_env)
+
+
+def _fal_enabled() -> bool:
+    """fal.ai 후보 사용 여부 (fal_client 설치 + FAL_KEY 설정)"""
+    return FAL_AVAILABLE and bool(os.environ.get("FAL_KEY"))
+
+
+def tryon_candidate_models() -> Tuple[str, ...]:
+    """
+    이번 요청에서 시도할 수 있는 모델 id 목록 — 결과 캐시 키에 포함
+
+    헤지로 어느 후보가 이미지를 만들지는 요청마다 다르므로 키는 후보 집합 기준
+    (같은 입력이면 어느 후보가 만든 결과든 재사용, 실제 모델은 캐시 항목의 model)
+    """
+    return TRYON_MODELS + ((FAL_MODEL_ID,) if _fal_enabled() else ())
+
+
+class _ModelStats:
+    """
+    모델별 성공률·평균 지연 시간 (시도 순서 조정용)
+
+    성공률은 (성공 + 1) / (시도 + 2) 로 평활화해 시도가 적은 모델도 기회를 가짐
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, name: str, success: bool, elapsed: float) -> None:
+        with self._lock:
+            s = self._stats.setdefault(name, {"attempts": 0, "successes": 0, "total_sec": 0.0})
+            s["attempts"] += 1
+            s["successes"] += int(success)
+            s["total_sec"] += elapsed
+
+    def success_rate(self, name: str) -> float:
+        with self._lock:
+            s = self._stats.get(name)
+            return (s["successes"] + 1) / (s["attempts"] + 2) if s else 0.5
+
+    def order(self, candidates: List[Tuple[str, Any]]) -> List[Tuple[str, Any]]:
+        """성공률 높은 순 (같으면 원래 순서 유지)"""
+        return sorted(candidates, key=lambda c: -self.success_rate(c[0]))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            items = list(self._stats.items())
+        return {
+            name: {
+                "attempts": int(s["attempts"]),
+                "successes": int(s["successes"]),
+                "success_rate": round(self.success_rate(name), 3),
+                "avg_sec": round(s["total_sec"] / s["attempts"], 2) if s["attempts"] else 0.0,
+            }
+            for name, s in items
+        }
+
+
 class GeminiTryOnTool:
     """
     Gemini API 기반 가상 피팅 도구.
@@ -61,6 +142,14 @@ class GeminiTryOnTool:
         self.api_key = api_key or os.environ.get("GEMINI_API_KEY", "").strip()
         self.client = None
         self._sdk = GEMINI_SDK
+        # 결과 이미지는 RenderStore 에만 저장, 캐시는 입력 해시 → 결과 경로만 기록
+        self.result_cache = TryOnResultCache(_project_root / "outputs" / "tryon_cache")
+        self.renders = get_render_store()
+        self.image_prep = get_image_preprocessor()
+        self.hedge_delay = TRYON_HEDGE_DELAY
+        self.model_stats = _ModelStats()
+        # 헤지 요청용 스레드 (요청 1건당 최대 후보 수만큼 동시 실행, 요청 간 공유)
+        self._hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="tryon-hedge")
         if GEMINI_SDK == "genai" and self.api_key and genai is not None:
             try:
                 self.client = genai.Client(api_key=self.api_key)
@@ -73,6 +162,22 @@ class GeminiTryOnTool:
             except Exception as e:
                 print(f"[GeminiTryOn] Legacy 모델 초기화 실패: {e}")
 
+    def warm_up(self) -> None:
+        """서버 기동 시 1회: 결과 디렉터리 준비·오래된 결과 정리 (Client 는 생성자에서 이미 만들어 둠)"""
+        self.renders.root.mkdir(parents=True, exist_ok=True)
+        self.renders.gc()
+        self.result_cache.prune()
+        if self.client is None:
+            print("[GeminiTryOn] Gemini Client 없음 — Mock/fal.ai 경로만 사용됩니다.")
+
+    def close(self) -> None:
+        self._hedge_pool.shutdown(wait=False)
+        self.renders.close()
+        close = getattr(self.client, "close", None)
+        if callable(close):
+            close()
+        self.client = None
+
     def execute(
         self,
         action: str,
@@ -118,10 +223,11 @@ class GeminiTryOnTool:
             return self._mock_analyze(image_path, text_prompt)
 
         try:
-            with open(image_path, "rb") as f:
-                image_data = f.read()
-
             if self._sdk == "genai":
+                from google.genai import types
+                with open(image_path, "rb") as f:
+                    data, mime = self.image_prep.normalize(f.read())
+                image_data = types.Part.from_bytes(data=data, mime_type=mime)
                 prompt = (
                     "이 의류 이미지를 분석해주세요. "
                     "의류 종류, 색상, 스타일, 소재 느낌을 한 문단으로 요약해주세요."
@@ -161,24 +267,22 @@ class GeminiTryOnTool:
 
     def _fal_try_on(
         self,
-        person_path: str,
-        garment_path: str,
-        out_path: Path,
-    ) -> Optional[Dict[str, Any]]:
-        """fal.ai Virtual Try-On API로 합성 이미지 생성. FAL_KEY 필요."""
+        person: Tuple[bytes, str],
+        garment: Tuple[bytes, str],
+    ) -> Optional[bytes]:
+        """fal.ai Virtual Try-On API로 합성 이미지 생성 후 결과 이미지 바이트 반환. FAL_KEY 필요.
+
+        person / garment: 전처리된 (이미지 바이트, MIME)
+        """
         if not FAL_AVAILABLE or fal_client is None:
             return None
         try:
-            with open(person_path, "rb") as f1, open(garment_path, "rb") as f2:
-                person_b = f1.read()
-                garment_b = f2.read()
-            mime_p = "image/png" if str(person_path).lower().endswith(".png") else "image/jpeg"
-            mime_g = "image/png" if str(garment_path).lower().endswith(".png") else "image/jpeg"
+            (person_b, mime_p), (garment_b, mime_g) = person, garment
             person_uri = "data:{};base64,{}".format(mime_p, base64.b64encode(person_b).decode("ascii"))
             garment_uri = "data:{};base64,{}".format(mime_g, base64.b64encode(garment_b).decode("ascii"))
 
             result = fal_client.subscribe(
-                "fal-ai/image-apps-v2/virtual-try-on",
+                FAL_MODEL_ID,
                 arguments={
                     "person_image_url": person_uri,
                     "clothing_image_url": garment_uri,
@@ -190,23 +294,15 @@ class GeminiTryOnTool:
             url = images[0].get("url") if isinstance(images[0], dict) else getattr(images[0], "url", None)
             if not url:
                 return None
-            # 다운로드하여 저장
+            # 다운로드 (저장은 호출 측에서 RenderStore 로)
             if _requests_available:
-                resp = requests.get(url, timeout=60)
+                resp = get_http_client().get(url, timeout=60, retries=2)
                 resp.raise_for_status()
-                with open(out_path, "wb") as f:
-                    f.write(resp.content)
-            elif _urllib_available:
+                return resp.content
+            if _urllib_available:
                 with urllib.request.urlopen(url, timeout=60) as resp:
-                    with open(out_path, "wb") as f:
-                        f.write(resp.read())
-            else:
-                return None
-            return {
-                "status": "success",
-                "image_path": str(out_path),
-                "message": "가상 피팅 합성 이미지가 생성되었습니다. (fal.ai Virtual Try-On)",
-            }
+                    return resp.read()
+            return None
         except Exception as e:
             print(f"[GeminiTryOn] fal.ai Try-On 실패: {e}")
             return None
@@ -232,93 +328,84 @@ class GeminiTryOnTool:
                 "image_path": None,
             }
 
-        output_dir = _project_root / "outputs" / "renders"
-        output_dir.mkdir(parents=True, exist_ok=True)
-        out_path = output_dir / "tryon_result.png"
+        # 0) 같은 의류·인물·프롬프트·후보 모델 조합의 이전 결과가 있으면 Gemini/fal.ai 호출 생략
+        cache_key = None
+        img1 = img2 = None
+        if person_path and Path(person_path).exists():
+            with open(image_path, "rb") as f1, open(person_path, "rb") as f2:
+                img1, img2 = f1.read(), f2.read()
+            sha1, sha2 = hashlib.sha256(img1).hexdigest(), hashlib.sha256(img2).hexdigest()
+            cache_key = tryon_cache_key(
+                sha1,
+                sha2,
+                TRYON_PROMPT,
+                ",".join(tryon_candidate_models()),
+            )
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                print(f"[GeminiTryOn] 결과 캐시 적중: {cached['image_path']}")
+                return {
+                    "status": "success",
+                    "image_path": cached["image_path"],
+                    "message": cached.get("message") or "가상 피팅 결과 이미지가 생성되었습니다.",
+                    "description": cached.get("description", ""),
+                    "model": cached.get("model"),
+                    "cached": True,
+                }
 
         # 1) Gemini Try-On 우선 (SIMS Fashion 등과 동일한 GEMINI_API_KEY 사용)
-        if self.client and person_path and Path(person_path).exists():
+        if self.client and img2 is not None:
             # Gemini 이미지 생성으로 Try-On 합성 시도 (google-genai)
             try:
-                with open(image_path, "rb") as f1, open(person_path, "rb") as f2:
-                    img1, img2 = f1.read(), f2.read()
-                mime1 = "image/png" if str(image_path).lower().endswith(".png") else "image/jpeg"
-                mime2 = "image/png" if str(person_path).lower().endswith(".png") else "image/jpeg"
-
                 if self._sdk == "genai":
                     from google.genai import types
-                    prompt = (
-                        "첫 번째 이미지는 입을 옷(의류) 사진이고, 두 번째 이미지는 그 옷을 입을 사람(인물) 사진입니다. "
-                        "두 번째 이미지의 인물이 첫 번째 이미지의 옷을 입은 모습으로, 한 장의 자연스러운 합성 사진을 생성해주세요. "
-                        "인물의 포즈와 얼굴은 유지하고, 옷만 정확히 입혀서 사실적으로 보이게 해주세요."
-                    )
+                    # EXIF 회전 보정·축소·재인코딩 (원본 해시 기준 캐시)
+                    garment = self.image_prep.normalize(img1, sha1)
+                    person = self.image_prep.normalize(img2, sha2)
+                    print(f"[GeminiTryOn] 입력 이미지 정규화: {len(img1) + len(img2)} → {len(garment[0]) + len(person[0])} bytes")
                     contents = [
-                        prompt,
-                        types.Part.from_bytes(data=img1, mime_type=mime1),
-                        types.Part.from_bytes(data=img2, mime_type=mime2),
+                        TRYON_PROMPT,
+                        types.Part.from_bytes(data=garment[0], mime_type=garment[1]),
+                        types.Part.from_bytes(data=person[0], mime_type=person[1]),
+                    ]
+                    # 이미지 생성 지원 모델(exp/preview) 헤지 → 모두 실패하면 fal.ai(FAL_KEY 있을 때)
+                    candidates = [
+                        (model_id, functools.partial(self._gemini_generate, model_id, contents, types))
+                        for model_id in TRYON_MODELS
                     ]
-                    # 이미지 생성 지원 모델: exp 또는 preview
-                    for model_id in ("gemini-2.0-flash-exp-image-generation", "gemini-2.0-flash-preview-image-generation", "gemini-2.5-flash-preview-image-generation"):
-                        try:
-                            print(f"[GeminiTryOn] Gemini 이미지 생성 호출 중 ({model_id})...")
-                            response = self.client.models.generate_content(
-                                model=model_id,
-                                contents=contents,
-                                config=types.GenerateContentConfig(
-                                    response_modalities=["Text", "Image"],
-                                ),
-                            )
-                        except Exception as model_err:
-                            print(f"[GeminiTryOn] 모델 {model_id} 실패: {model_err}")
-                            continue
-                        desc = ""
-                        image_saved = False
-                        # 새 SDK: response.parts / 기존: response.candidates[0].content.parts
-                        parts = []
-                        if getattr(response, "parts", None):
-                            parts = list(response.parts)
-                        elif response.candidates and getattr(response.candidates[0], "content", None) and getattr(response.candidates[0].content, "parts", None):
-                            parts = list(response.candidates[0].content.parts)
-                        for i, part in enumerate(parts):
-                            if getattr(part, "text", None):
-                                desc = (part.text or "")[:500]
-                                print(f"[GeminiTryOn] 응답 텍스트 파트 {i}: {desc[:200]}...")
-                            # 이미지: inline_data.data 또는 as_image() (PIL)
-                            blob = None
-                            if getattr(part, "inline_data", None) and getattr(part.inline_data, "data", None):
-                                blob = part.inline_data.data
-                            elif getattr(part, "as_image", None):
-                                try:
-                                    pil_img = part.as_image()
-                                    if pil_img is not None:
-                                        import io
-                                        buf = io.BytesIO()
-                                        pil_img.save(buf, format="PNG")
-                                        blob = buf.getvalue()
-                                except Exception:
-                                    pass
-                            if blob:
-                                with open(out_path, "wb") as f:
-                                    f.write(blob)
-                                image_saved = True
-                                print(f"[GeminiTryOn] 이미지 파트 저장 완료: {out_path}")
-                                break
-                        if not image_saved:
-                            print(f"[GeminiTryOn] 응답에 이미지 파트 없음 (parts 수: {len(parts)}). 다음 모델 시도 또는 fallback.")
-                        if image_saved:
-                            break
-                    if image_saved:
-                        return {
+                    winner, blob, desc = self._hedged_generate(candidates)
+                    if not blob and _fal_enabled():
+                        # fal.ai 는 호출당 과금 → 헤지·성공률 순서 조정 대상이 아닌 마지막 수단으로 1회만
+                        print("[GeminiTryOn] Gemini 후보 모두 실패 → fal.ai Virtual Try-On 시도")
+                        outcome = self._timed_attempt(FAL_MODEL_ID, functools.partial(self._fal_generate, person, garment))
+                        if outcome:
+                            winner, (blob, desc) = FAL_MODEL_ID, outcome
+                    if blob:
+                        if winner == FAL_MODEL_ID:
+                            message = "가상 피팅 합성 이미지가 생성되었습니다. (fal.ai Virtual Try-On)"
+                        else:
+                            message = "가상 피팅 결과 이미지가 생성되었습니다."
+                            desc = desc or "Gemini 이미지 생성으로 합성되었습니다."
+                        # 요청별 내용 해시 파일명, 디스크 쓰기·캐시 기록은 백그라운드에서
+                        out_path = self.renders.save(blob)
+                        # 같은 쓰기 스레드에서 이미지 저장 다음에 실행 → 캐시 키는 항상 저장된 파일을 가리킴
+                        self.renders.submit(
+                            self.result_cache.put,
+                            cache_key, out_path,
+                            message=message,
+                            description=desc,
+                            model=winner,
+                        )
+                        print(f"[GeminiTryOn] 결과 이미지 저장 예약 ({winner}): {out_path}")
+                        result = {
                             "status": "success",
                             "image_path": str(out_path),
-                            "message": "가상 피팅 결과 이미지가 생성되었습니다.",
-                            "description": desc or "Gemini 이미지 생성으로 합성되었습니다.",
+                            "message": message,
+                            "model": winner,
                         }
-                    # Gemini에서 이미지 미반환 시 fal.ai 시도 (FAL_KEY 있을 때만)
-                    if os.environ.get("FAL_KEY"):
-                        fal_result = self._fal_try_on(person_path, image_path, out_path)
-                        if fal_result is not None:
-                            return fal_result
+                        if desc:
+                            result["description"] = desc
+                        return result
                 else:
                     import PIL.Image
                     prompt = "첫 번째: 의류, 두 번째: 인물. 이 의류를 입혀본 것처럼 설명해주세요."
@@ -348,6 +435,101 @@ class GeminiTryOnTool:
             "garment_only_fallback": True,
         }
 
+    def _gemini_generate(self, model_id: str, contents: List[Any], types: Any) -> Optional[Tuple[bytes, str]]:
+        """Gemini 모델 1개로 합성 이미지 생성 → (이미지 바이트, 설명). 이미지 파트가 없으면 None"""
+        print(f"[GeminiTryOn] Gemini 이미지 생성 호출 중 ({model_id})...")
+        response = self.client.models.generate_content(
+            model=model_id,
+            contents=contents,
+            config=types.GenerateContentConfig(
+                response_modalities=["Text", "Image"],
+            ),
+        )
+        desc = ""
+        # 새 SDK: response.parts / 기존: response.candidates[0].content.parts
+        parts = []
+        if getattr(response, "parts", None):
+            parts = list(response.parts)
+        elif response.candidates and getattr(response.candidates[0], "content", None) and getattr(response.candidates[0].content, "parts", None):
+            parts = list(response.candidates[0].content.parts)
+        for i, part in enumerate(parts):
+            if getattr(part, "text", None):
+                desc = (part.text or "")[:500]
+                print(f"[GeminiTryOn] 응답 텍스트 파트 {i}: {desc[:200]}...")
+            # 이미지: inline_data.data 또는 as_image() (PIL)
+            blob = None
+            if getattr(part, "inline_data", None) and getattr(part.inline_data, "data", None):
+                blob = part.inline_data.data
+            elif getattr(part, "as_image", None):
+                try:
+                    pil_img = part.as_image()
+                    if pil_img is not None:
+                        import io
+                        buf = io.BytesIO()
+                        pil_img.save(buf, format="PNG")
+                        blob = buf.getvalue()
+                except Exception:
+                    pass
+            if blob:
+                return blob, desc
+        print(f"[GeminiTryOn] 응답에 이미지 파트 없음 ({model_id}, parts 수: {len(parts)}).")
+        return None
+
+    def _fal_generate(self, person: Tuple[bytes, str], garment: Tuple[bytes, str]) -> Optional[Tuple[bytes, str]]:
+        blob = self._fal_try_on(person, garment)
+        return (blob, "") if blob else None
+
+    def _hedged_generate(
+        self,
+        candidates: List[Tuple[str, Callable[[], Optional[Tuple[bytes, str]]]]],
+    ) -> Tuple[Optional[str], Optional[bytes], str]:
+        """
+        헤지(hedged) 방식으로 후보 모델 실행 → (성공 모델, 이미지 바이트, 설명)
+
+        성공률이 높은 모델부터 시작하고, hedge_delay 초 안에 끝나지 않거나 실패하면
+        다음 모델을 동시에 시작. 이미지를 먼저 돌려준 모델이 채택되고 나머지는 취소
+        (이미 호출 중인 요청은 중단할 수 없어 결과만 버리고, 성공/실패는 통계에 반영).
+        hedge_delay 가 None 이면 기존처럼 앞 모델이 실패한 뒤에만 다음 모델 시도.
+        """
+        ordered = self.model_stats.order(candidates)
+        running: Dict[Future, str] = {}
+        try:
+            while ordered or running:
+                if ordered:
+                    name, fn = ordered.pop(0)
+                    running[self._hedge_pool.submit(self._timed_attempt, name, fn)] = name
+                timeout = self.hedge_delay if ordered else None
+                done, _ = wait_futures(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as model_err:
+                        print(f"[GeminiTryOn] 모델 {name} 실패: {model_err}")
+                        continue
+                    if outcome:
+                        blob, desc = outcome
+                        if running:
+                            print(f"[GeminiTryOn] {name} 채택, 나머지 {list(running.values())} 취소")
+                        return name, blob, desc
+                if not done and ordered:
+                    print(f"[GeminiTryOn] {list(running.values())} 응답 지연 → {ordered[0][0]} 동시 시작")
+        finally:
+            for future in running:
+                future.cancel()
+        return None, None, ""
+
+    def _timed_attempt(self, name: str, fn: Callable[[], Optional[Tuple[bytes, str]]]) -> Optional[Tuple[bytes, str]]:
+        """후보 1개 실행 + 성공/실패·지연 시간 기록 (채택되지 않은 요청도 통계에 반영)"""
+        started = time.monotonic()
+        ok = False
+        try:
+            outcome = fn()
+            ok = bool(outcome)
+            return outcome
+        finally:
+            self.model_stats.record(name, ok, time.monotonic() - started)
+
     def _mock_analyze(self, image_path: str, text_prompt: str) -> Dict[str, Any]:
         return {
             "status": "success",
@@ -357,7 +539,20 @@ class GeminiTryOnTool:
         }
 
 
+_tool: Optional[GeminiTryOnTool] = None
+_tool_lock = threading.Lock()
+
+
+def get_gemini_tryon_tool() -> GeminiTryOnTool:
+    """프로세스 전역 공용 GeminiTryOnTool (최초 호출 시 생성, genai.Client 재사용)"""
+    global _tool
+    if _tool is None:
+        with _tool_lock:
+            if _tool is None:
+                _tool = GeminiTryOnTool()
+    return _tool
+
+
 def gemini_tryon_tool(action: str, parameters: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
     """Agent Runtime에서 호출하는 도구 함수 (기존 extensions_2d_to_3d_tool 시그니처와 동일)."""
-    tool = GeminiTryOnTool()
-    return tool.execute(action, parameters, context)
+    return get_gemini_tryon_tool().execute(action, parameters, context)
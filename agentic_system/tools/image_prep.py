@@ -0,0 +1,161 @@
+"""
+가상 피팅 입력 이미지 전처리 — Gemini/fal.ai 전송 전 정규화·축소
+
+휴대폰 원본(8~12MB)을 그대로 보내지 않고 한 번만 디코딩해
+- EXIF 회전 정보 반영 (세로 사진이 눕지 않도록)
+- 긴 변을 max_edge 이하로 축소 (확대는 하지 않음)
+- JPEG/WebP 로 목표 품질 재인코딩
+한 결과를 보냄. 결과는 원본 내용 해시 기준으로 메모리에 캐시 (같은 사진 재전송 시 재인코딩 생략).
+
+PIL이 없거나 디코딩에 실패하면 원본 바이트를 그대로 사용 (MIME은 파일 시그니처로 판별).
+"""
+
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import io
+import os
+import threading
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = None
+    ImageOps = None
+    PIL_AVAILABLE = False
+
+# 전처리 설정 (환경 변수로 조정)
+TRYON_IMAGE_MAX_EDGE = int(os.environ.get("TRYON_IMAGE_MAX_EDGE", "1536"))
+TRYON_IMAGE_FORMAT = os.environ.get("TRYON_IMAGE_FORMAT", "JPEG").strip().upper()
+TRYON_IMAGE_QUALITY = int(os.environ.get("TRYON_IMAGE_QUALITY", "88"))
+
+_MIME = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+
+def sniff_mime(data: bytes) -> str:
+    """파일 시그니처로 이미지 MIME 판별 (확장자 추측 대신)"""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    return "image/jpeg"
+
+
+class ImagePreprocessor:
+    """
+    이미지 정규화 + 결과 캐시 (LRU, 전체 바이트 상한)
+
+    Args:
+        max_edge: 긴 변 최대 픽셀
+        fmt: 재인코딩 형식 (JPEG 또는 WEBP)
+        quality: 재인코딩 품질
+        cache_bytes: 캐시에 보관할 정규화 결과 전체 크기 상한
+    """
+
+    def __init__(
+        self,
+        max_edge: int = TRYON_IMAGE_MAX_EDGE,
+        fmt: str = TRYON_IMAGE_FORMAT,
+        quality: int = TRYON_IMAGE_QUALITY,
+        cache_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.max_edge = max_edge
+        self.fmt = fmt if fmt in ("JPEG", "WEBP") else "JPEG"
+        self.quality = quality
+        self.cache_bytes = cache_bytes
+        self._cache: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def normalize(self, data: bytes, digest: Optional[str] = None) -> Tuple[bytes, str]:
+        """
+        원본 이미지 바이트 → (전송용 바이트, MIME)
+
+        digest: 원본 SHA-256 (호출 측에서 이미 계산했으면 재사용)
+        """
+        if not PIL_AVAILABLE:
+            return data, sniff_mime(data)
+        key = f"{digest or hashlib.sha256(data).hexdigest()}:{self.max_edge}:{self.fmt}:{self.quality}"
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+        self.misses += 1
+        try:
+            result = self._encode(data)
+        except Exception as e:
+            print(f"[ImagePrep] 이미지 정규화 실패, 원본 사용: {e}")
+            return data, sniff_mime(data)
+        self._remember(key, result)
+        return result
+
+    def _encode(self, data: bytes) -> Tuple[bytes, str]:
+        with Image.open(io.BytesIO(data)) as src:
+            src_format = src.format
+            rotated = src.getexif().get(0x0112, 1) not in (0, 1)  # EXIF Orientation
+            resized = max(src.size) > self.max_edge
+            if resized:
+                # draft: JPEG는 디코딩 단계에서 1/2·1/4 등으로 줄여 읽어 전체 디코딩 비용 절감
+                src.draft("RGB", (self.max_edge, self.max_edge))
+            img = ImageOps.exif_transpose(src) if rotated else src
+            if resized:
+                img.thumbnail((self.max_edge, self.max_edge), Image.LANCZOS)
+            if img.mode in ("RGBA", "LA", "P"):
+                # 투명 배경은 흰색으로 합성 (JPEG에는 알파 채널이 없음)
+                rgba = img.convert("RGBA")
+                img = Image.new("RGB", rgba.size, (255, 255, 255))
+                img.paste(rgba, mask=rgba.split()[-1])
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+            out = io.BytesIO()
+            img.save(out, format=self.fmt, quality=self.quality, optimize=self.fmt == "JPEG")
+        encoded = out.getvalue()
+        # 회전·축소가 필요 없고 재인코딩이 더 크면 원본 유지 (이미 작은 사진)
+        if not rotated and not resized and len(encoded) >= len(data) and src_format in ("JPEG", "PNG", "WEBP"):
+            return data, sniff_mime(data)
+        return encoded, _MIME[self.fmt]
+
+    def _remember(self, key: str, result: Tuple[bytes, str]) -> None:
+        size = len(result[0])
+        if size > self.cache_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = result
+            self._cached_bytes += size
+            while self._cached_bytes > self.cache_bytes:
+                _, (old, _) = self._cache.popitem(last=False)
+                self._cached_bytes -= len(old)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._cache),
+                "bytes": self._cached_bytes,
+            }
+
+
+_prep: Optional[ImagePreprocessor] = None
+_prep_lock = threading.Lock()
+
+
+def get_image_preprocessor() -> ImagePreprocessor:
+    """프로세스 전역 공용 ImagePreprocessor"""
+    global _prep
+    if _prep is None:
+        with _prep_lock:
+            if _prep is None:
+                _prep = ImagePreprocessor()
+    return _prep
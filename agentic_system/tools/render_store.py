@@ -0,0 +1,144 @@
+"""
+가상 피팅 결과 이미지 저장소 — outputs/renders
+
+요청마다 결과 이미지를 내용 해시 파일명(tryon_<sha256>.png)으로 저장해
+동시 요청끼리 같은 파일을 덮어쓰지 않도록 함.
+
+- 백그라운드 쓰기: save() 는 경로만 정해 바로 반환하고, 디스크 쓰기는 전용 스레드 1개가 처리
+- wait(): 쓰기가 끝나기 전에 파일을 요청받으면 해당 쓰기 완료까지 대기 (/api/v1/file)
+- 보존 정책: 일정 시간이 지난 파일 삭제 + 전체 용량 상한 초과 시 오래된 파일부터 삭제
+"""
+
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
+from pathlib import Path
+import hashlib
+import os
+import threading
+import time
+
+_project_root = Path(__file__).resolve().parent.parent.parent
+
+# 보존 정책 (환경 변수로 조정)
+RENDERS_MAX_AGE_HOURS = float(os.environ.get("TRYON_RENDERS_MAX_AGE_HOURS", "24"))
+RENDERS_MAX_MB = int(os.environ.get("TRYON_RENDERS_MAX_MB", "256"))
+
+
+class RenderStore:
+    """
+    결과 이미지 백그라운드 저장 + 보존 정책
+
+    Args:
+        root: 저장 디렉터리
+        max_age: 파일 보존 시간 (초)
+        max_bytes: 디렉터리 전체 용량 상한 (바이트)
+        gc_every: 쓰기 N회마다 정리 실행
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_age: float = RENDERS_MAX_AGE_HOURS * 3600,
+        max_bytes: int = RENDERS_MAX_MB * 1024 * 1024,
+        gc_every: int = 20,
+    ):
+        self.root = Path(root)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.gc_every = gc_every
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render-writer")
+        self._lock = threading.Lock()
+        self._pending: Dict[Path, Future] = {}
+        self._writes = 0
+
+    def save(self, image_bytes: bytes, prefix: str = "tryon") -> Path:
+        """결과 이미지 저장 예약 후 최종 경로 반환 (같은 내용이면 같은 경로)"""
+        path = self.root / f"{prefix}_{hashlib.sha256(image_bytes).hexdigest()}.png"
+        with self._lock:
+            if path in self._pending:
+                return path
+            future = self._writer.submit(self._write, path, image_bytes)
+            self._pending[path] = future
+        future.add_done_callback(lambda _f: self._done(path))
+        return path
+
+    def submit(self, func: Callable, *args: Any, **kwargs: Any) -> Future:
+        """부가 디스크 작업(결과 캐시 기록 등)을 쓰기 스레드에서 순서대로 실행"""
+        return self._writer.submit(func, *args, **kwargs)
+
+    def _write(self, path: Path, data: bytes) -> None:
+        if path.exists():
+            # 같은 결과 이미지가 이미 있음 → 보존 시간만 갱신
+            os.utime(path)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _done(self, path: Path) -> None:
+        with self._lock:
+            self._pending.pop(path, None)
+            self._writes += 1
+            run_gc = self._writes % self.gc_every == 0
+        if run_gc:
+            self._writer.submit(self.gc)
+
+    def wait(self, path: Path, timeout: Optional[float] = 5.0) -> bool:
+        """path 쓰기가 대기 중이면 완료까지 기다림 (파일이 존재하면 True)"""
+        with self._lock:
+            future = self._pending.get(Path(path))
+        if future is not None:
+            wait_futures([future], timeout=timeout)
+        return Path(path).exists()
+
+    def gc(self) -> int:
+        """보존 시간이 지난 파일 삭제 후, 용량 상한 초과분을 오래된 파일부터 삭제"""
+        if not self.root.exists():
+            return 0
+        now = time.time()
+        with self._lock:
+            pending = set(self._pending)
+        files = []
+        for p in self.root.glob("*.png"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, p in files:
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            if p in pending:
+                continue
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            print(f"[RenderStore] 보존 정책에 따라 결과 이미지 {removed}개 삭제 (현재 {total // 1024}KB)")
+        return removed
+
+    def close(self) -> None:
+        """대기 중인 쓰기를 마치고 쓰기 스레드 종료"""
+        self._writer.shutdown(wait=True)
+
+
+_store: Optional[RenderStore] = None
+_store_lock = threading.Lock()
+
+
+def get_render_store() -> RenderStore:
+    """프로세스 전역 공용 RenderStore (outputs/renders)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RenderStore(_project_root / "outputs" / "renders")
+    return _store
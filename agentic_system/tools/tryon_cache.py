@@ -0,0 +1,109 @@
+"""
+가상 피팅 결과 캐시 — 입력 해시 → 결과 이미지(RenderStore) 경로 인덱스
+
+같은 의류·인물 사진으로 '입혀줘'를 다시 누르면 Gemini/fal.ai 를 호출하지 않고
+이전 합성 결과를 바로 반환.
+
+- 키: SHA-256(의류 이미지) + SHA-256(인물 이미지) + 프롬프트 + 후보 모델 id 목록 의 SHA-256
+  (후보 중 어느 모델이 만들었는지는 키가 아니라 항목의 model 에 기록 — 후보 목록이 바뀌면 새 키)
+- 결과 이미지는 RenderStore(outputs/renders/tryon_<sha256>.png) 한 곳에만 저장하고
+  캐시는 그 경로만 기록 → 보존·용량 정책은 RenderStore 하나로 관리
+- 적중 시 결과 파일 mtime 갱신 → RenderStore 정리에서 최근 사용 결과가 늦게 삭제됨 (LRU)
+- 결과 파일이 정리되어 없으면 키도 삭제하고 미적중 처리
+
+디렉터리 구조:
+    root/keys/<key>.json  → {"image_path": ..., "message": ..., "description": ..., "model": ...}
+"""
+
+from typing import Any, Dict, Optional
+from pathlib import Path
+import hashlib
+import json
+import os
+import threading
+
+
+def tryon_cache_key(garment_sha: str, person_sha: str, prompt: str, model_id: str) -> str:
+    """의류·인물 이미지 해시, 프롬프트, 모델 id (후보 목록이면 쉼표로 연결) 로 캐시 키 생성"""
+    h = hashlib.sha256()
+    for part in (garment_sha, person_sha, prompt, model_id):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class TryOnResultCache:
+    """
+    Try-On 결과 캐시 (키 → 결과 이미지 경로)
+
+    Args:
+        root: 캐시 키 디렉터리
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._keys_dir = self.root / "keys"
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """캐시된 결과 (image_path 포함) 반환, 없거나 결과 파일이 정리됐으면 None"""
+        key_path = self._keys_dir / f"{key}.json"
+        try:
+            entry = json.loads(key_path.read_text(encoding="utf-8"))
+            image_path = Path(entry["image_path"])
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        try:
+            # 사용 시각 갱신 → RenderStore 보존 정책에 반영
+            os.utime(image_path)
+        except OSError:
+            # 결과 이미지가 보존 정책으로 삭제됨 → 키도 정리
+            self.misses += 1
+            self.stale += 1
+            try:
+                key_path.unlink()
+            except OSError:
+                pass
+            return None
+        self.hits += 1
+        return {**entry, "image_path": str(image_path)}
+
+    def put(self, key: str, image_path: Path, **meta: Any) -> None:
+        """키 → 결과 이미지 경로 기록 (임시 파일 → os.replace)"""
+        entry = {"image_path": str(image_path), **meta}
+        with self._lock:
+            self._keys_dir.mkdir(parents=True, exist_ok=True)
+            key_path = self._keys_dir / f"{key}.json"
+            tmp_path = key_path.with_name(f"{key_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+            os.replace(tmp_path, key_path)
+
+    def prune(self) -> int:
+        """결과 이미지가 없어진 키 삭제"""
+        if not self._keys_dir.exists():
+            return 0
+        removed = 0
+        for key_path in self._keys_dir.glob("*.json"):
+            try:
+                image_path = json.loads(key_path.read_text(encoding="utf-8")).get("image_path")
+                if image_path and Path(image_path).exists():
+                    continue
+                key_path.unlink()
+            except (OSError, ValueError):
+                continue
+            removed += 1
+        if removed:
+            print(f"[TryOnCache] 결과 이미지가 정리된 캐시 키 {removed}개 삭제")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+        }
@@ -0,0 +1,11 @@
+"""
+Utils Module
+공용 유틸리티 모듈 (외부 HTTP 클라이언트 등)
+"""
+
+from .http_client import HttpClient, get_http_client
+
+__all__ = [
+    'HttpClient',
+    'get_http_client',
+]
@@ -0,0 +1,239 @@
+"""
+공용 외부 HTTP 클라이언트
+
+ExternalRAG(Serper), AgentRuntime(OpenAI 대화), GeminiTryOnTool(fal.ai 결과 다운로드)이
+같은 세션을 공유해 TCP/TLS 연결을 재사용(keep-alive)하도록 함.
+
+- 연결 풀: 호스트별 keep-alive 연결 재사용
+- 호스트별 동시 요청 수 제한
+- 재시도: 연결 오류·타임아웃·429·5xx 에 대해 지터가 있는 지수 백오프
+  (POST 등 비멱등 요청은 서버에 도달하지 않은 연결 실패·429·503 만 재시도 — 중복 과금 방지)
+- 시간 예산: 재시도를 포함한 전체 소요 시간 상한
+- 계측: 호스트별 지연 시간 히스토그램 (stats())
+"""
+
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import random
+import threading
+import time
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.exceptions import NewConnectionError
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    requests = None
+    HTTPAdapter = None
+    NewConnectionError = None
+    REQUESTS_AVAILABLE = False
+
+# 지연 시간 히스토그램 버킷 상한 (ms)
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float("inf"))
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+# 비멱등 요청도 재시도할 수 있는 상태 (서버가 요청을 처리하지 않았음)
+NON_IDEMPOTENT_RETRY_STATUS = frozenset({429, 503})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+def _connect_failed(error: Exception) -> bool:
+    """연결 수립 단계의 실패 (요청이 서버로 전송되지 않음) 여부"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.Timeout):
+        return False
+    reason = getattr(error.args[0], "reason", error.args[0]) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class _HostStats:
+    """호스트 1개의 요청 수·오류 수·지연 시간 히스토그램"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+
+    def observe(self, elapsed_ms: float, error: bool) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if error:
+            self.errors += 1
+        for i, upper in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= upper:
+                self.buckets[i] += 1
+                break
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "histogram_ms": {
+                ("+Inf" if upper == float("inf") else str(int(upper))): n
+                for upper, n in zip(LATENCY_BUCKETS_MS, self.buckets)
+            },
+        }
+
+
+class HttpClient:
+    """
+    연결 풀·재시도·호스트별 동시성 제한을 가진 requests 세션 래퍼
+
+    Args:
+        pool_maxsize: 호스트별 keep-alive 연결 풀 크기
+        per_host_limit: 호스트별 동시 요청 수 상한
+        backoff_base: 재시도 백오프 기본 간격 (초)
+        backoff_max: 재시도 간격 상한 (초)
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 16,
+        per_host_limit: int = 8,
+        backoff_base: float = 0.3,
+        backoff_max: float = 4.0,
+    ):
+        if not REQUESTS_AVAILABLE:
+            raise ImportError("requests 라이브러리가 필요합니다: pip install requests")
+        self.per_host_limit = per_host_limit
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        # 재시도는 아래에서 직접 처리 (백오프·예산 계산을 위해 urllib3 재시도는 끔)
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_stats: Dict[str, _HostStats] = {}
+
+    def _slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+
+    def _stats(self, host: str) -> _HostStats:
+        with self._lock:
+            stats = self._host_stats.get(host)
+            if stats is None:
+                stats = _HostStats()
+                self._host_stats[host] = stats
+            return stats
+
+    def _backoff(self, attempt: int, response: Optional[Any]) -> float:
+        """지터가 있는 지수 백오프 (Retry-After 헤더가 있으면 우선)"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: float = 10.0,
+        retries: int = 2,
+        budget: Optional[float] = None,
+        idempotent: Optional[bool] = None,
+        **kwargs: Any,
+    ):
+        """
+        HTTP 요청 (재시도 포함)
+
+        Args:
+            timeout: 시도 1회의 타임아웃 (초)
+            retries: 재시도 가능한 실패 시 추가 시도 횟수
+            budget: 재시도·대기를 포함한 전체 시간 상한 (기본: timeout * (retries + 1))
+            idempotent: 다시 보내도 안전한 요청인지 (기본: GET/HEAD/OPTIONS/PUT/DELETE 이면 True)
+                True 면 연결 오류·타임아웃·429·5xx 재시도, False 면 연결 실패·429·503 만 재시도
+
+        Returns:
+            requests.Response — 마지막 시도의 응답 (상태 코드는 호출 측에서 확인)
+        """
+        host = urlsplit(url).netloc
+        stats = self._stats(host)
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        budget = budget if budget is not None else timeout * (retries + 1)
+        deadline = time.monotonic() + budget
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise requests.Timeout(f"{host} 요청 시간 예산({budget:.1f}초) 초과")
+            response = None
+            error: Optional[Exception] = None
+            started = time.monotonic()
+            slot = self._slot(host)
+            if not slot.acquire(timeout=remaining):
+                raise requests.Timeout(f"{host} 동시 요청 슬롯 대기 시간 초과")
+            try:
+                response = self.session.request(method, url, timeout=min(timeout, remaining), **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            finally:
+                slot.release()
+                elapsed_ms = (time.monotonic() - started) * 1000
+                with self._lock:
+                    stats.observe(elapsed_ms, error is not None or (response is not None and response.status_code >= 500))
+            if idempotent:
+                retryable = error is not None or response.status_code in RETRY_STATUS
+            else:
+                # 응답 대기 중 타임아웃·5xx 는 서버가 이미 처리했을 수 있음 → 다시 보내지 않음
+                retryable = (
+                    _connect_failed(error) if error is not None
+                    else response.status_code in NON_IDEMPOTENT_RETRY_STATUS
+                )
+            if not retryable or attempt >= retries:
+                if error is not None:
+                    raise error
+                return response
+            delay = self._backoff(attempt, response)
+            if time.monotonic() + delay >= deadline:
+                if error is not None:
+                    raise error
+                return response
+            with self._lock:
+                stats.retries += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs: Any):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """호스트별 요청 통계·지연 시간 히스토그램"""
+        with self._lock:
+            return {host: s.to_dict() for host, s in self._host_stats.items()}
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """프로세스 전역 공용 HttpClient (최초 호출 시 생성)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client